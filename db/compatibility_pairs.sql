@@ -0,0 +1,263 @@
+-- db/compatibility_pairs.sql
+-- Precomputed compatibility for the parts API, so a compatibility lookup is an index scan
+-- instead of a join over a whole *_specs table. Load after new_compatibility.sql; running
+-- this file builds the tables, and statement-level triggers keep them current as the
+-- *_specs tables change.
+--
+-- The rules are those of new_compatibility.sql. Pairs are stored where the relation is
+-- sparse (CPU-motherboard, CPU-cooler, motherboard-memory). Where it is nearly complete
+-- the table is keyed by the one motherboard attribute the rule depends on instead:
+-- video cards by PCIe width, cases by form factor with their maximum GPU length.
+
+-- Helpers parsing the text columns the same way the stored functions do.
+CREATE OR REPLACE FUNCTION motherboard_pcie_width(pci_slots text)
+RETURNS int AS $$
+    SELECT CASE
+        WHEN pci_slots LIKE '%PCIe x16%' THEN 16
+        WHEN pci_slots LIKE '%PCIe x8%' THEN 8
+        WHEN pci_slots LIKE '%PCIe x4%' THEN 4
+        ELSE 1
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION gpu_length_mm(length text)
+RETURNS numeric AS $$
+    SELECT CASE
+        WHEN length ~ '([0-9]+(\.[0-9]+)?).*mm' THEN
+            (regexp_match(length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric
+        WHEN length ~ '([0-9]+(\.[0-9]+)?).*in' THEN
+            (regexp_match(length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric * 25.4
+        WHEN length ~ '([0-9]+(\.[0-9]+)?)' THEN
+            (regexp_match(length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION case_max_gpu_length_mm(maximum_video_card_length text)
+RETURNS numeric AS $$
+    SELECT CASE
+        WHEN maximum_video_card_length ~ '([0-9]+(\.[0-9]+)?).*mm' THEN
+            (regexp_match(maximum_video_card_length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric
+        WHEN maximum_video_card_length ~ '([0-9]+(\.[0-9]+)?).*"' THEN
+            (regexp_match(maximum_video_card_length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric * 25.4
+        WHEN maximum_video_card_length ~ '([0-9]+(\.[0-9]+)?)' THEN
+            (regexp_match(maximum_video_card_length, '([0-9]+(\.[0-9]+)?)'))[1]::numeric
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Precomputed tables. Each one is filled from the view with the same name plus _source.
+CREATE TABLE IF NOT EXISTS compat_cpu_motherboard (
+    cpu_id int NOT NULL,
+    motherboard_id int NOT NULL,
+    PRIMARY KEY (cpu_id, motherboard_id)
+);
+CREATE INDEX IF NOT EXISTS compat_cpu_motherboard_motherboard ON compat_cpu_motherboard (motherboard_id);
+
+CREATE TABLE IF NOT EXISTS compat_cpu_cooler (
+    cpu_id int NOT NULL,
+    cooler_id int NOT NULL,
+    PRIMARY KEY (cpu_id, cooler_id)
+);
+CREATE INDEX IF NOT EXISTS compat_cpu_cooler_cooler ON compat_cpu_cooler (cooler_id);
+
+CREATE TABLE IF NOT EXISTS compat_motherboard_memory (
+    motherboard_id int NOT NULL,
+    memory_id int NOT NULL,
+    PRIMARY KEY (motherboard_id, memory_id)
+);
+CREATE INDEX IF NOT EXISTS compat_motherboard_memory_memory ON compat_motherboard_memory (memory_id);
+
+-- Video cards a motherboard with a given PCIe width takes
+CREATE TABLE IF NOT EXISTS compat_gpu_pcie (
+    pcie_width int NOT NULL,
+    gpu_id int NOT NULL,
+    PRIMARY KEY (pcie_width, gpu_id)
+);
+CREATE INDEX IF NOT EXISTS compat_gpu_pcie_gpu ON compat_gpu_pcie (gpu_id);
+
+-- Cases for a motherboard form factor, searchable by the longest GPU they take
+CREATE TABLE IF NOT EXISTS compat_case_form_factor (
+    form_factor text NOT NULL,
+    case_id int NOT NULL,
+    max_gpu_length_mm numeric NOT NULL,
+    PRIMARY KEY (form_factor, case_id)
+);
+CREATE INDEX IF NOT EXISTS compat_case_form_factor_length ON compat_case_form_factor (form_factor, max_gpu_length_mm);
+CREATE INDEX IF NOT EXISTS compat_case_form_factor_case ON compat_case_form_factor (case_id);
+
+-- Lookups the pair tables need to be refilled quickly, and the PSU range scan
+CREATE INDEX IF NOT EXISTS motherboard_specs_socket_cpu ON motherboard_specs (socket_cpu);
+CREATE INDEX IF NOT EXISTS psu_specs_type_wattage ON psu_specs (type, wattage);
+
+CREATE OR REPLACE VIEW compat_cpu_motherboard_source AS
+SELECT c.id AS cpu_id, m.id AS motherboard_id
+FROM cpu_specs c
+JOIN motherboard_specs m ON m.socket_cpu = c.socket;
+
+CREATE OR REPLACE VIEW compat_cpu_cooler_source AS
+SELECT c.id AS cpu_id, k.id AS cooler_id
+FROM cpu_specs c
+JOIN cooler_specs k ON c.socket = ANY(string_to_array(k.cpu_socket, E'\n'));
+
+CREATE OR REPLACE VIEW compat_motherboard_memory_source AS
+SELECT m.id AS motherboard_id, r.id AS memory_id
+FROM motherboard_specs m
+JOIN memory_specs r ON left(r.speed, 4) = m.memory_type
+WHERE m.memory_type IN ('DDR4', 'DDR5')
+AND (
+    m.memory_speed LIKE '%' || r.speed || '%'
+    OR m.memory_speed LIKE '%' || (regexp_match(r.speed, 'DDR[45]-([0-9]+)'))[1] || '%'
+);
+
+CREATE OR REPLACE VIEW compat_gpu_pcie_source AS
+SELECT w.pcie_width, g.id AS gpu_id
+FROM (VALUES (1), (4), (8), (16)) w (pcie_width)
+JOIN gpu_specs g ON
+    CASE
+        WHEN g.interface LIKE '%PCIe x16%' AND w.pcie_width >= 16 THEN true
+        WHEN g.interface LIKE '%PCIe x8%' AND w.pcie_width >= 8 THEN true
+        WHEN g.interface LIKE '%PCIe x4%' AND w.pcie_width >= 4 THEN true
+        WHEN g.interface LIKE '%PCIe x1%' THEN true
+        WHEN g.interface IS NULL OR g.interface = '' THEN true
+        WHEN g.interface LIKE '%PCIe%' THEN true
+        ELSE false
+    END;
+
+CREATE OR REPLACE VIEW compat_case_form_factor_source AS
+SELECT DISTINCT f.form_factor, c.id AS case_id, case_max_gpu_length_mm(c.maximum_video_card_length) AS max_gpu_length_mm
+FROM case_specs c
+CROSS JOIN LATERAL unnest(string_to_array(c.motherboard_form_factor, E'\n')) f (form_factor)
+WHERE case_max_gpu_length_mm(c.maximum_video_card_length) IS NOT NULL;
+
+-- Which precomputed table depends on which *_specs table: the id column naming that
+-- table's rows, and the columns the rule reads from it.
+CREATE TABLE IF NOT EXISTS compat_dependencies (
+    source_table text NOT NULL,
+    pair_table text NOT NULL,
+    id_column text NOT NULL,
+    key_columns text[] NOT NULL,
+    PRIMARY KEY (source_table, pair_table)
+);
+
+INSERT INTO compat_dependencies (source_table, pair_table, id_column, key_columns) VALUES
+    ('cpu_specs', 'compat_cpu_motherboard', 'cpu_id', '{socket}'),
+    ('motherboard_specs', 'compat_cpu_motherboard', 'motherboard_id', '{socket_cpu}'),
+    ('cpu_specs', 'compat_cpu_cooler', 'cpu_id', '{socket}'),
+    ('cooler_specs', 'compat_cpu_cooler', 'cooler_id', '{cpu_socket}'),
+    ('motherboard_specs', 'compat_motherboard_memory', 'motherboard_id', '{memory_type,memory_speed}'),
+    ('memory_specs', 'compat_motherboard_memory', 'memory_id', '{speed}'),
+    ('gpu_specs', 'compat_gpu_pcie', 'gpu_id', '{interface}'),
+    ('case_specs', 'compat_case_form_factor', 'case_id', '{motherboard_form_factor,maximum_video_card_length}')
+ON CONFLICT (source_table, pair_table) DO UPDATE
+SET id_column = EXCLUDED.id_column, key_columns = EXCLUDED.key_columns;
+
+-- Rebuild the rows of a precomputed table that involve the given ids.
+CREATE OR REPLACE FUNCTION refill_compatibility_pairs(p_pair_table text, p_id_column text, p_ids int[])
+RETURNS void AS $$
+BEGIN
+    IF p_ids IS NULL THEN
+        RETURN;
+    END IF;
+
+    EXECUTE format('DELETE FROM %I WHERE %I = ANY($1)', p_pair_table, p_id_column) USING p_ids;
+    EXECUTE format('INSERT INTO %I SELECT * FROM %I WHERE %I = ANY($1)',
+                   p_pair_table, p_pair_table || '_source', p_id_column) USING p_ids;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild every precomputed table from scratch.
+CREATE OR REPLACE FUNCTION refresh_compatibility_pairs()
+RETURNS void AS $$
+DECLARE
+    v_pair_table text;
+BEGIN
+    FOR v_pair_table IN SELECT DISTINCT pair_table FROM compat_dependencies LOOP
+        EXECUTE format('TRUNCATE %I', v_pair_table);
+        EXECUTE format('INSERT INTO %I SELECT * FROM %I', v_pair_table, v_pair_table || '_source');
+        EXECUTE format('ANALYZE %I', v_pair_table);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level trigger for inserts, deletes and truncates on the *_specs tables; the
+-- transition tables hold the rows a statement touched.
+CREATE OR REPLACE FUNCTION compatibility_source_changed()
+RETURNS trigger AS $$
+DECLARE
+    v_dependency record;
+    v_ids int[];
+BEGIN
+    FOR v_dependency IN
+        SELECT * FROM compat_dependencies WHERE source_table = TG_TABLE_NAME
+    LOOP
+        IF TG_OP = 'TRUNCATE' THEN
+            EXECUTE format('TRUNCATE %I', v_dependency.pair_table);
+            CONTINUE;
+        ELSIF TG_OP = 'INSERT' THEN
+            SELECT array_agg(n.id) INTO v_ids FROM new_rows n;
+        ELSE
+            SELECT array_agg(o.id) INTO v_ids FROM old_rows o;
+        END IF;
+
+        PERFORM refill_compatibility_pairs(v_dependency.pair_table, v_dependency.id_column, v_ids);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Row-level trigger for updates. Transition tables cannot be combined with a column list,
+-- and the column list is what keeps score, price and *_num writes from firing it at all;
+-- the WHEN clause then skips rows whose key columns kept their values.
+CREATE OR REPLACE FUNCTION compatibility_key_changed()
+RETURNS trigger AS $$
+DECLARE
+    v_dependency record;
+BEGIN
+    FOR v_dependency IN
+        SELECT * FROM compat_dependencies WHERE source_table = TG_TABLE_NAME
+    LOOP
+        IF ARRAY(SELECT to_jsonb(OLD) ->> k FROM unnest(v_dependency.key_columns) k)
+            IS DISTINCT FROM ARRAY(SELECT to_jsonb(NEW) ->> k FROM unnest(v_dependency.key_columns) k) THEN
+            PERFORM refill_compatibility_pairs(v_dependency.pair_table, v_dependency.id_column,
+                                               ARRAY[OLD.id, NEW.id]);
+        END IF;
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event; the update trigger lists every key column
+-- of its table.
+DO $$
+DECLARE
+    v_source_table text;
+    v_key_columns text[];
+BEGIN
+    FOR v_source_table, v_key_columns IN
+        SELECT source_table, array_agg(DISTINCT k ORDER BY k)
+        FROM compat_dependencies, unnest(key_columns) k
+        GROUP BY source_table
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS compat_insert ON %I', v_source_table);
+        EXECUTE format('CREATE TRIGGER compat_insert AFTER INSERT ON %I
+                        REFERENCING NEW TABLE AS new_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION compatibility_source_changed()', v_source_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS compat_update ON %I', v_source_table);
+        EXECUTE format('CREATE TRIGGER compat_update AFTER UPDATE OF %s ON %I
+                        FOR EACH ROW WHEN ((%s) IS DISTINCT FROM (%s))
+                        EXECUTE FUNCTION compatibility_key_changed()',
+                       (SELECT string_agg(quote_ident(k), ', ') FROM unnest(v_key_columns) k),
+                       v_source_table,
+                       (SELECT string_agg('OLD.' || quote_ident(k), ', ') FROM unnest(v_key_columns) k),
+                       (SELECT string_agg('NEW.' || quote_ident(k), ', ') FROM unnest(v_key_columns) k));
+        EXECUTE format('DROP TRIGGER IF EXISTS compat_delete ON %I', v_source_table);
+        EXECUTE format('CREATE TRIGGER compat_delete AFTER DELETE ON %I
+                        REFERENCING OLD TABLE AS old_rows
+                        FOR EACH STATEMENT EXECUTE FUNCTION compatibility_source_changed()', v_source_table);
+        EXECUTE format('DROP TRIGGER IF EXISTS compat_truncate ON %I', v_source_table);
+        EXECUTE format('CREATE TRIGGER compat_truncate AFTER TRUNCATE ON %I
+                        FOR EACH STATEMENT EXECUTE FUNCTION compatibility_source_changed()', v_source_table);
+    END LOOP;
+END;
+$$;
+
+SELECT refresh_compatibility_pairs();
@@ -1,6 +1,7 @@
 // src/app/api/parts/[partType]/route.ts
 import { NextResponse } from "next/server";
-import { Pool } from "pg";
+import { Pool, type PoolClient } from "pg";
+import { getPriceIndex } from "@/lib/priceIndex";
 
 // Create a pool with error logging
 const pool = new Pool({
@@ -23,6 +24,72 @@ const TABLE_MAP: Record<string, string> = {
   storage: "ssd_specs",
 };
 
+// Part types with a score, which src/recommendation/update_scores.py keeps up to date
+const PRICE_INDEXED_PARTS = new Set([
+  "cpu",
+  "motherboard",
+  "cpuCooler",
+  "gpu",
+  "case",
+  "psu",
+  "ram",
+]);
+const PRICE_QUERY_PARAMS = ["min_price", "max_price", "top", "min_score"];
+// Parameters of the compatibility lookups, which the price index cannot filter by
+const COMPATIBILITY_PARAMS = ["cpu_id", "mobo_id", "gpu_id", "case_id"];
+const MAX_TOP = 100;
+
+// A request the API cannot answer as asked; returned as a 400
+class BadRequestError extends Error {}
+// A request naming a part that does not exist; returned as a 404
+class NotFoundError extends Error {}
+
+function numberParam(searchParams: URLSearchParams, name: string, fallback: number) {
+  const value = searchParams.get(name);
+  if (value === null) return fallback;
+  const parsed = Number(value);
+  if (value.trim() === "" || Number.isNaN(parsed)) throw new BadRequestError(`Invalid ${name}`);
+  return parsed;
+}
+
+type PriceQuery =
+  | { kind: "cheapest"; minScore: number }
+  | { kind: "top"; minPrice: number; maxPrice: number; top: number };
+
+// The price query of a request, refusing parameters the price index would have to ignore
+function priceQuery(partType: string, searchParams: URLSearchParams): PriceQuery {
+  if (!PRICE_INDEXED_PARTS.has(partType))
+    throw new BadRequestError(`Price queries are not available for ${partType}`);
+  const compatibility = COMPATIBILITY_PARAMS.filter((name) => searchParams.has(name));
+  if (compatibility.length > 0)
+    throw new BadRequestError(
+      `Price queries cannot be combined with ${compatibility.join(", ")}`
+    );
+
+  if (searchParams.has("min_score")) {
+    const ranged = ["min_price", "max_price", "top"].filter((name) => searchParams.has(name));
+    if (ranged.length > 0)
+      throw new BadRequestError(`min_score cannot be combined with ${ranged.join(", ")}`);
+    return { kind: "cheapest", minScore: numberParam(searchParams, "min_score", 0) };
+  }
+
+  const top = Math.floor(numberParam(searchParams, "top", 1));
+  if (top < 1) throw new BadRequestError("top must be at least 1");
+  return {
+    kind: "top",
+    minPrice: numberParam(searchParams, "min_price", -Infinity),
+    maxPrice: numberParam(searchParams, "max_price", Infinity),
+    top: Math.min(top, MAX_TOP),
+  };
+}
+
+// The SQL functions the compatibility lookups replaced raised for unknown ids; the
+// precomputed tables would just give an empty list
+async function requirePart(client: PoolClient, table: string, label: string, id: string) {
+  const result = await client.query(`SELECT 1 FROM ${table} WHERE id = $1`, [id]);
+  if (result.rows.length === 0) throw new NotFoundError(`${label} with ID ${id} does not exist`);
+}
+
 export async function GET(
   request: Request,
   { params }: { params: Promise<{ partType: string }> }
@@ -37,6 +104,19 @@ export async function GET(
   }
 
   try {
+    // Price queries (?max_price=&top=, ?min_price=&max_price=, ?min_score=) are answered
+    // from the cached price index of the table instead of a query per request; top is
+    // capped at MAX_TOP
+    if (PRICE_QUERY_PARAMS.some((name) => searchParams.has(name))) {
+      const query = priceQuery(partType, searchParams);
+      const index = await getPriceIndex(pool, tableName);
+      if (query.kind === "cheapest") {
+        const cheapest = index.cheapestWithScore(query.minScore);
+        return NextResponse.json(cheapest ? [cheapest] : []);
+      }
+      return NextResponse.json(index.topInRange(query.minPrice, query.maxPrice, query.top));
+    }
+
     console.log(
       `Connecting to database to fetch ${partType} from ${tableName}...`
     );
@@ -45,25 +125,47 @@ export async function GET(
       let queryText: string;
       let params: unknown[] = [];
 
+      // Compatibility lookups read the precomputed tables from db/compatibility_pairs.sql;
+      // unknown ids give a 404
       switch (partType) {
         case "motherboard":
           const cpuId = searchParams.get("cpu_id");
           if (!cpuId) throw new Error("CPU ID required");
-          queryText = "SELECT * FROM get_compatible_motherboards($1)";
+          await requirePart(client, "cpu_specs", "CPU", cpuId);
+          queryText = `
+            SELECT m.id, m.name, m.price, m.form_factor, m.socket_cpu,
+                   m.memory_max, m.memory_slots, m.memory_type, m.memory_speed,
+                   m.chipset, m.color, m.m2_slots, m.sata_ports
+            FROM compat_cpu_motherboard p
+            JOIN motherboard_specs m ON m.id = p.motherboard_id
+            WHERE p.cpu_id = $1`;
           params = [cpuId];
           break;
 
         case "cpuCooler":
           const coolerCpuId = searchParams.get("cpu_id");
           if (!coolerCpuId) throw new Error("CPU ID required");
-          queryText = "SELECT * FROM get_compatible_cpu_coolers($1)";
+          await requirePart(client, "cpu_specs", "CPU", coolerCpuId);
+          queryText = `
+            SELECT c.id, c.name, c.price, c.fan_rpm, c.noise_level, c.color,
+                   c.radiator_size, c.height, c.cpu_socket, c.water_cooled, c.fanless
+            FROM compat_cpu_cooler p
+            JOIN cooler_specs c ON c.id = p.cooler_id
+            WHERE p.cpu_id = $1`;
           params = [coolerCpuId];
           break;
 
         case "gpu":
           const moboId = searchParams.get("mobo_id");
           if (!moboId) throw new Error("Motherboard ID required");
-          queryText = "SELECT * FROM get_compatible_video_cards($1)";
+          await requirePart(client, "motherboard_specs", "Motherboard", moboId);
+          queryText = `
+            SELECT g.id, g.name, g.price, g.chipset, g.memory, g.core_clock,
+                   g.boost_clock, g.color, g.length, g.tdp, g.interface
+            FROM motherboard_specs m
+            JOIN compat_gpu_pcie p ON p.pcie_width = motherboard_pcie_width(m.pci_slots)
+            JOIN gpu_specs g ON g.id = p.gpu_id
+            WHERE m.id = $1`;
           params = [moboId];
           break;
 
@@ -72,7 +174,16 @@ export async function GET(
           const caseMotherboardId = searchParams.get("mobo_id");
           if (!gpuId || !caseMotherboardId)
             throw new Error("GPU ID and Motherboard ID required");
-          queryText = "SELECT * FROM get_compatible_case($1, $2)";
+          await requirePart(client, "gpu_specs", "GPU", gpuId);
+          await requirePart(client, "motherboard_specs", "Motherboard", caseMotherboardId);
+          queryText = `
+            SELECT c.id, c.name, c.price, c.type, c.color, c.power_supply,
+                   c.side_panel, c.motherboard_form_factor, c.maximum_video_card_length
+            FROM motherboard_specs m
+            JOIN compat_case_form_factor p ON p.form_factor = m.form_factor
+            JOIN case_specs c ON c.id = p.case_id
+            WHERE m.id = $2
+            AND p.max_gpu_length_mm >= (SELECT gpu_length_mm(length) FROM gpu_specs WHERE id = $1)`;
           params = [gpuId, caseMotherboardId];
           break;
 
@@ -130,8 +241,15 @@ export async function GET(
           const ramCpuId = searchParams.get("cpu_id");
           if (!ramMoboId || !ramCpuId)
             throw new Error("Motherboard and CPU IDs required");
-          queryText = "SELECT * FROM get_compatible_ram($1, $2)";
-          params = [ramMoboId, ramCpuId];
+          await requirePart(client, "cpu_specs", "CPU", ramCpuId);
+          await requirePart(client, "motherboard_specs", "Motherboard", ramMoboId);
+          queryText = `
+            SELECT r.id, r.name, r.price, r.speed, r.modules, r.price_per_gb, r.color,
+                   r.first_word_latency, r.cas_latency, r.voltage, r.timing, r.ecc, r.heat_spreader
+            FROM compat_motherboard_memory p
+            JOIN memory_specs r ON r.id = p.memory_id
+            WHERE p.motherboard_id = $1`;
+          params = [ramMoboId];
           break;
 
         case "storage":
@@ -161,6 +279,8 @@ export async function GET(
     console.error("API error:", error);
     const errorMessage =
       error instanceof Error ? error.message : "Unknown error";
-    return NextResponse.json({ error: errorMessage }, { status: 500 });
+    const status =
+      error instanceof BadRequestError ? 400 : error instanceof NotFoundError ? 404 : 500;
+    return NextResponse.json({ error: errorMessage }, { status });
   }
 }
@@ -0,0 +1,104 @@
+"""
+Compare single-row and multi-row enrichment prompts: rows/s and tokens per row.
+
+Rows come straight from the catalog CSVs and answers are not written to the database, so
+only the LLM side is measured. Run it against Ollama, or against fake_ollama.py:
+
+    python fake_ollama.py --latency 0.5 --drop-rate 0.05
+    OLLAMA_HOST=http://localhost:11435 python benchmark_enrichment.py --rows 200 --batch-sizes 1 4 8 16
+"""
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import mod_data
+from catalog_registry import CATALOG, read_catalog_csv
+from mod_data import ENRICHMENT_CATEGORIES, EnrichmentCategory, EnrichmentStats, LLMDataEnricher, PendingWrite
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+
+
+def load_rows(table: str, limit: int) -> List[Dict[str, Any]]:
+    """First limit rows of a table's CSV, shaped like the enricher's SELECT * results"""
+    csv_name, spec = next((name, spec) for name, spec in CATALOG.items() if spec.table == table)
+    df = read_catalog_csv(DATA_DIR / csv_name, spec).head(limit)
+    df = df.astype(object).where(df.notna(), None)
+    return [dict(row, id=i) for i, row in enumerate(df.to_dict('records'), 1)]
+
+
+class BenchmarkEnricher(LLMDataEnricher):
+    """LLMDataEnricher reading rows from memory and discarding the answers"""
+    def __init__(self, rows: Dict[str, List[Dict[str, Any]]], batch_size: int):
+        super().__init__({})
+        self.rows = rows
+        self.prompt_batch_size = batch_size
+        self.cache = None  # Every run has to reach the model
+        self.use_job_table = False
+
+    def fetch_rows(self, category: EnrichmentCategory) -> Iterator[List[Dict[str, Any]]]:
+        yield self.rows[category.table]
+
+    def write_batch(self, writes: List[PendingWrite], failures: List[Tuple[str, int, str, str]]):
+        pass
+
+
+async def run_benchmark(categories: List[EnrichmentCategory], rows: Dict[str, List[Dict[str, Any]]],
+                        batch_size: int) -> Dict[str, float]:
+    enricher = BenchmarkEnricher(rows, batch_size)
+    enricher.stats = EnrichmentStats()
+    start = time.perf_counter()
+    await asyncio.gather(*(enricher.enrich_category(category) for category in categories))
+    elapsed = time.perf_counter() - start
+
+    stats = enricher.stats
+    done = sum(stats.done.values())
+    return {
+        'batch_size': batch_size,
+        'rows': done,
+        'failed': sum(stats.failed.values()),
+        'requeued': stats.requeued,
+        'requests': stats.requests,
+        'seconds': elapsed,
+        'rows_per_second': done / elapsed,
+        'prompt_tokens_per_row': stats.prompt_tokens / max(done, 1),
+        'completion_tokens_per_row': stats.completion_tokens / max(done, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--categories', nargs='+', default=['cpu', 'storage', 'case', 'psu', 'cooler'],
+                        choices=list(ENRICHMENT_CATEGORIES))
+    parser.add_argument('--rows', type=int, default=100, help="Rows per category")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 4, 8, 16],
+                        help="Rows per prompt to compare; 1 is the single-row path")
+    args = parser.parse_args()
+
+    # Measure the row prompts themselves, not family grouping
+    mod_data.ENRICH_BY_FAMILY = False
+    logging.getLogger('mod_data').setLevel(logging.WARNING)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    categories = [ENRICHMENT_CATEGORIES[name] for name in args.categories]
+    rows = {category.table: load_rows(category.table, args.rows) for category in categories}
+    logger.info(f"Benchmarking {sum(map(len, rows.values()))} rows from {len(categories)} tables "
+                f"against {mod_data.OLLAMA_HOST}")
+
+    results = [asyncio.run(run_benchmark(categories, rows, size)) for size in args.batch_sizes]
+
+    print(f"{'batch':>5} {'rows':>6} {'failed':>6} {'requeued':>8} {'requests':>8} {'seconds':>8} "
+          f"{'rows/s':>8} {'prompt tok/row':>14} {'output tok/row':>14}")
+    for r in results:
+        print(f"{r['batch_size']:>5} {r['rows']:>6} {r['failed']:>6} {r['requeued']:>8} {r['requests']:>8} "
+              f"{r['seconds']:>8.2f} {r['rows_per_second']:>8.2f} {r['prompt_tokens_per_row']:>14.0f} "
+              f"{r['completion_tokens_per_row']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import pandas as pd
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from pathlib import Path
+
+# Column dtypes passed straight to pd.read_csv so no column is inferred or left as object
+TEXT = 'string'
+INT = 'Int64'
+FLOAT = 'Float64'
+BOOL = 'boolean'
+
+
+class Composite(NamedTuple):
+    """Parse rule for a CSV field packing several values as "a,b" (e.g. memory speed "4,3200")"""
+    targets: Tuple[str, ...]  # Output columns, one per comma-separated part
+    dtype: str  # dtype of every output column
+    single_fills: Tuple[int, ...] = (0,)  # Targets a lone value fills, e.g. both ends of a "1550" range
+    keep_source: bool = True  # Also import the raw field as text
+
+
+class CatalogTable(NamedTuple):
+    """Target table, CSV column dtypes and composite parse rules for one catalog CSV"""
+    table: str
+    dtypes: Dict[str, str]
+    composites: Dict[str, Composite] = {}
+
+    @property
+    def csv_columns(self) -> List[str]:
+        return list(self.dtypes)
+
+    @property
+    def columns(self) -> List[str]:
+        """Table columns produced after the parse rules are applied"""
+        columns = []
+        for column in self.dtypes:
+            composite = self.composites.get(column)
+            if composite is None or composite.keep_source:
+                columns.append(column)
+            if composite is not None:
+                columns.extend(composite.targets)
+        return columns
+
+
+def range_of(column: str, dtype: str) -> Composite:
+    """Composite rule for "min,max" ranges that may also hold a single value"""
+    return Composite((f'{column}_min', f'{column}_max'), dtype, single_fills=(0, 1))
+
+
+# CSV file -> how it is loaded; ordered so related tables load together
+CATALOG: Dict[str, CatalogTable] = {
+    'cpu.csv': CatalogTable('cpu', {
+        'name': TEXT, 'price': FLOAT, 'core_count': INT, 'core_clock': FLOAT,
+        'boost_clock': FLOAT, 'tdp': INT, 'graphics': TEXT, 'smt': BOOL,
+    }),
+    'motherboard.csv': CatalogTable('motherboard', {
+        'name': TEXT, 'price': FLOAT, 'socket': TEXT, 'form_factor': TEXT,
+        'max_memory': INT, 'memory_slots': INT, 'color': TEXT,
+    }),
+    'memory.csv': CatalogTable('memory', {
+        'name': TEXT, 'price': FLOAT, 'speed': TEXT, 'modules': TEXT, 'price_per_gb': FLOAT,
+        'color': TEXT, 'first_word_latency': FLOAT, 'cas_latency': FLOAT,
+    }, {
+        # A lone value ("400") is a legacy speed without a DDR generation
+        'speed': Composite(('ddr_version', 'memory_speed'), INT, single_fills=(1,)),
+        'modules': Composite(('module_count', 'module_size_gb'), INT),
+    }),
+    'internal-hard-drive.csv': CatalogTable('storage', {
+        'name': TEXT, 'price': FLOAT, 'capacity': FLOAT, 'price_per_gb': FLOAT,
+        'type': TEXT, 'cache': FLOAT, 'form_factor': TEXT, 'interface': TEXT,
+    }),
+    'video-card.csv': CatalogTable('video_card', {
+        'name': TEXT, 'price': FLOAT, 'chipset': TEXT, 'memory': FLOAT,
+        'core_clock': FLOAT, 'boost_clock': FLOAT, 'color': TEXT, 'length': FLOAT,
+    }),
+    'case.csv': CatalogTable('case_enclosure', {
+        'name': TEXT, 'price': FLOAT, 'type': TEXT, 'color': TEXT, 'psu': FLOAT,
+        'side_panel': TEXT, 'external_volume': FLOAT, 'internal_35_bays': INT,
+    }),
+    'power-supply.csv': CatalogTable('power_supply', {
+        'name': TEXT, 'price': FLOAT, 'type': TEXT, 'efficiency': TEXT,
+        'wattage': INT, 'modular': TEXT, 'color': TEXT,
+    }),
+    'cpu-cooler.csv': CatalogTable('cpu_cooler', {
+        'name': TEXT, 'price': FLOAT, 'rpm': TEXT, 'noise_level': TEXT, 'color': TEXT, 'size': FLOAT,
+    }, {
+        'rpm': range_of('rpm', INT),
+        'noise_level': range_of('noise_level', FLOAT),
+    }),
+    'case-fan.csv': CatalogTable('case_fan', {
+        'name': TEXT, 'price': FLOAT, 'size': INT, 'color': TEXT, 'rpm': TEXT,
+        'airflow': TEXT, 'noise_level': TEXT, 'pwm': BOOL,
+    }, {
+        'rpm': range_of('rpm', INT),
+        'airflow': range_of('airflow', FLOAT),
+        'noise_level': range_of('noise_level', FLOAT),
+    }),
+    'case-accessory.csv': CatalogTable('case_accessory', {
+        'name': TEXT, 'price': FLOAT, 'type': TEXT, 'form_factor': FLOAT,
+    }),
+    'fan-controller.csv': CatalogTable('fan_controller', {
+        'name': TEXT, 'price': FLOAT, 'channels': INT, 'channel_wattage': FLOAT,
+        'pwm': BOOL, 'form_factor': TEXT, 'color': TEXT,
+    }),
+    'thermal-paste.csv': CatalogTable('thermal_paste', {
+        'name': TEXT, 'price': FLOAT, 'amount': FLOAT,
+    }),
+    'external-hard-drive.csv': CatalogTable('external_storage', {
+        'name': TEXT, 'price': FLOAT, 'type': TEXT, 'interface': TEXT,
+        'capacity': FLOAT, 'price_per_gb': FLOAT, 'color': TEXT,
+    }),
+    'optical-drive.csv': CatalogTable('optical_drive', {
+        'name': TEXT, 'price': FLOAT, 'bd': INT, 'dvd': INT, 'cd': INT,
+        'bd_write': TEXT, 'dvd_write': TEXT, 'cd_write': TEXT,
+    }),
+    'sound-card.csv': CatalogTable('sound_card', {
+        'name': TEXT, 'price': FLOAT, 'channels': FLOAT, 'digital_audio': INT, 'snr': INT,
+        'sample_rate': FLOAT, 'chipset': TEXT, 'interface': TEXT,
+    }),
+    'wired-network-card.csv': CatalogTable('wired_network_card', {
+        'name': TEXT, 'price': FLOAT, 'interface': TEXT, 'color': TEXT,
+    }),
+    'wireless-network-card.csv': CatalogTable('wireless_network_card', {
+        'name': TEXT, 'price': FLOAT, 'protocol': TEXT, 'interface': TEXT, 'color': TEXT,
+    }),
+    'monitor.csv': CatalogTable('monitor', {
+        'name': TEXT, 'price': FLOAT, 'screen_size': FLOAT, 'resolution': TEXT, 'refresh_rate': INT,
+        'response_time': FLOAT, 'panel_type': TEXT, 'aspect_ratio': TEXT,
+    }, {
+        'resolution': Composite(('resolution_width', 'resolution_height'), INT, keep_source=False),
+    }),
+    'keyboard.csv': CatalogTable('keyboard', {
+        'name': TEXT, 'price': FLOAT, 'style': TEXT, 'switches': TEXT, 'backlit': TEXT,
+        'tenkeyless': BOOL, 'connection_type': TEXT, 'color': TEXT,
+    }),
+    'mouse.csv': CatalogTable('mouse', {
+        'name': TEXT, 'price': FLOAT, 'tracking_method': TEXT, 'connection_type': TEXT,
+        'max_dpi': INT, 'hand_orientation': TEXT, 'color': TEXT,
+    }),
+    'headphones.csv': CatalogTable('headphones', {
+        'name': TEXT, 'price': FLOAT, 'type': TEXT, 'frequency_response': TEXT, 'microphone': BOOL,
+        'wireless': BOOL, 'enclosure_type': TEXT, 'color': TEXT,
+    }, {
+        # "6,75" is 6 Hz - 75 kHz
+        'frequency_response': Composite(('frequency_low_hz', 'frequency_high_khz'), FLOAT, keep_source=False),
+    }),
+    'speakers.csv': CatalogTable('speakers', {
+        'name': TEXT, 'price': FLOAT, 'configuration': FLOAT, 'wattage': FLOAT,
+        'frequency_response': TEXT, 'color': TEXT,
+    }, {
+        'frequency_response': Composite(('frequency_low_hz', 'frequency_high_khz'), FLOAT, keep_source=False),
+    }),
+    'webcam.csv': CatalogTable('webcam', {
+        'name': TEXT, 'price': FLOAT, 'resolutions': TEXT, 'connection': TEXT,
+        'focus_type': TEXT, 'os': TEXT, 'fov': FLOAT,
+    }),
+    'os.csv': CatalogTable('operating_system', {
+        'name': TEXT, 'price': FLOAT, 'mode': TEXT, 'max_memory': INT,
+    }),
+    'ups.csv': CatalogTable('ups', {
+        'name': TEXT, 'price': FLOAT, 'capacity_w': INT, 'capacity_va': INT,
+    }),
+}
+
+
+def apply_parse_rules(df: pd.DataFrame, spec: CatalogTable) -> pd.DataFrame:
+    """Expand composite fields into typed columns and return the frame in table column order"""
+    for column, composite in spec.composites.items():
+        parts = df[column].str.split(',', expand=True)
+        if parts.empty:
+            parts = pd.DataFrame({0: pd.Series(dtype=TEXT, index=df.index)})
+        single = parts[1].isna() if 1 in parts.columns else pd.Series(True, index=df.index)
+
+        for i, target in enumerate(composite.targets):
+            part = parts[i] if i in parts.columns else pd.Series(pd.NA, index=df.index, dtype=TEXT)
+            part = part.where(~single, parts[0] if i in composite.single_fills else pd.NA)
+            values = pd.to_numeric(part.str.strip(), errors='coerce')
+            df[target] = values.astype(composite.dtype)
+
+    return df[spec.columns]
+
+
+def read_catalog_csv(csv_path: Path, spec: CatalogTable,
+                     chunksize: Optional[int] = None) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Read a catalog CSV with explicit dtypes; yields parsed chunks when chunksize is set"""
+    reader = pd.read_csv(csv_path, usecols=spec.csv_columns, dtype=spec.dtypes, chunksize=chunksize)
+    if chunksize is None:
+        return apply_parse_rules(reader, spec)
+    return (apply_parse_rules(chunk, spec) for chunk in reader)
@@ -0,0 +1,207 @@
+"""
+Shared database configuration and connection pools for the Python tools.
+
+db_config() builds connection parameters from the standard libpq environment variables
+(PGHOST, PGPORT, PGDATABASE, PGUSER, PGPASSWORD), falling back to the local development
+database. get_pool() hands out one DatabasePool per set of parameters, so every part of
+a process that talks to the same database reuses the same connections:
+
+    pool = get_pool(db_config('pc_builder'))
+    with pool.connection() as conn:
+        ...
+
+A DatabasePool keeps every connection it opens for reuse, up to a maximum; it blocks until
+a connection is free instead of failing, checks connections that have sat idle before
+handing them out, sets a statement timeout on every connection, and keeps metrics on
+waits and use.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+# Configuration
+POOL_MIN_CONNECTIONS = 1  # Opened when a pool is created; the rest are opened on demand and then kept
+POOL_MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX', 10))  # Keep above IMPORT_WORKERS in import_data.py
+POOL_TIMEOUT = 60.0  # Seconds to wait for a free connection before giving up
+STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30_000))  # Default, for interactive queries
+# Scoring and import runs, whose statements over whole tables take minutes; 0 = no limit
+BULK_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_BULK_STATEMENT_TIMEOUT_MS', 0))
+HEALTH_CHECK_AFTER = 30.0  # Seconds a connection can sit idle before it is checked with SELECT 1
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG = {
+    'host': 'localhost',
+    'port': '5432',
+    'user': 'pc_builder_admin',
+    'password': 'pc_builder',
+}
+
+
+def db_config(database: str, statement_timeout_ms: int = STATEMENT_TIMEOUT_MS) -> Dict[str, Any]:
+    """
+    Connection parameters for a tool whose default database is database; PG* variables override.
+    Bulk runs pass BULK_STATEMENT_TIMEOUT_MS, which gives them a pool of their own.
+    """
+    config = {
+        'host': os.environ.get('PGHOST', DEFAULT_CONFIG['host']),
+        'port': os.environ.get('PGPORT', DEFAULT_CONFIG['port']),
+        'dbname': os.environ.get('PGDATABASE', database),
+        'user': os.environ.get('PGUSER', DEFAULT_CONFIG['user']),
+        'password': os.environ.get('PGPASSWORD', DEFAULT_CONFIG['password']),
+    }
+    # Always set, so 0 lifts a limit the server or role may have configured
+    config['options'] = f'-c statement_timeout={statement_timeout_ms}'
+    return config
+
+
+@dataclass
+class PoolMetrics:
+    acquired: int = 0  # Connections handed out
+    wait_seconds: float = 0.0  # Total time callers waited for a free connection
+    max_wait_seconds: float = 0.0
+    in_use: int = 0
+    peak_in_use: int = 0
+    opened: int = 0  # Distinct connections handed out, replacements included
+    replaced: int = 0  # Connections a health check found broken
+
+    def summary(self) -> str:
+        average_ms = self.wait_seconds / self.acquired * 1000 if self.acquired else 0.0
+        return (f"{self.acquired} checkouts, wait avg {average_ms:.2f} ms / max {self.max_wait_seconds * 1000:.1f} ms, "
+                f"{self.in_use} in use (peak {self.peak_in_use}), {self.opened} connections opened, "
+                f"{self.replaced} replaced")
+
+
+class DatabasePool:
+    def __init__(self, config: Dict[str, Any], min_connections: int = POOL_MIN_CONNECTIONS,
+                 max_connections: int = POOL_MAX_CONNECTIONS, timeout: float = POOL_TIMEOUT):
+        self.config = config
+        self.timeout = timeout
+        self.metrics = PoolMetrics()
+        # At most max_connections are handed out at once; callers queue on this for a free one
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.lock = threading.Lock()
+        self.closed = False
+        # Returned connections, kept open for reuse: (connection, when it went back), latest last.
+        # Connections opened ahead of use have no return time.
+        self.idle: List[Tuple[Any, Optional[float]]] = [(self._connect(), None) for _ in range(min_connections)]
+        self.in_use: Dict[int, Any] = {}  # id(connection) -> connection
+
+    def _connect(self):
+        return psycopg2.connect(**self.config)
+
+    def getconn(self):
+        """A healthy connection from the pool, waiting up to timeout for one to be free"""
+        start = time.perf_counter()
+        if not self.slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(f"No free connection to {self.config['dbname']} after {self.timeout:g}s")
+        waited = time.perf_counter() - start
+        try:
+            conn = self._healthy_connection()
+        except Exception:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.metrics.acquired += 1
+            self.metrics.wait_seconds += waited
+            self.metrics.max_wait_seconds = max(self.metrics.max_wait_seconds, waited)
+            self.metrics.in_use += 1
+            self.metrics.peak_in_use = max(self.metrics.peak_in_use, self.metrics.in_use)
+        return conn
+
+    def _healthy_connection(self):
+        while True:
+            with self.lock:
+                if self.closed:
+                    raise pg_pool.PoolError(f"The pool for {self.config['dbname']} is closed")
+                conn, returned_at = self.idle.pop() if self.idle else (None, None)
+            if conn is None:
+                conn = self._connect()
+            with self.lock:
+                self.in_use[id(conn)] = conn
+                if returned_at is None:
+                    self.metrics.opened += 1
+            # Fresh connections and recently used ones are trusted; the server may have dropped an idle one
+            if returned_at is None or (not conn.closed and time.monotonic() - returned_at < HEALTH_CHECK_AFTER):
+                return conn
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                conn.rollback()
+                return conn
+            except psycopg2.Error as e:
+                logger.warning(f"Replacing a broken connection to {self.config['dbname']}: {e}")
+                with self.lock:
+                    del self.in_use[id(conn)]
+                    self.metrics.replaced += 1
+                conn.close()
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection; an open transaction is rolled back, a closed connection dropped"""
+        close = close or bool(conn.closed)
+        if not close and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                close = True
+        with self.lock:
+            if self.in_use.pop(id(conn), None) is None:
+                raise pg_pool.PoolError("Returning a connection the pool did not hand out")
+            self.metrics.in_use -= 1
+            close = close or self.closed
+            if not close:
+                self.idle.append((conn, time.monotonic()))
+        if close:
+            conn.close()
+        self.slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """A pooled connection for the duration of a with block; uncommitted work is rolled back"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close(self):
+        """Close every connection, including those handed out"""
+        with self.lock:
+            self.closed = True
+            connections = [conn for conn, _ in self.idle] + list(self.in_use.values())
+            self.idle.clear()
+        logger.info(f"Pool for {self.config['dbname']}: {self.metrics.summary()}")
+        for conn in connections:
+            conn.close()
+
+
+_pools: Dict[tuple, DatabasePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: Dict[str, Any]) -> DatabasePool:
+    """The process-wide pool for a set of connection parameters, created on first use"""
+    key = tuple(sorted(config.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = DatabasePool(dict(config))
+        return _pools[key]
+
+
+@atexit.register
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            if not pool.closed:
+                pool.close()
+        _pools.clear()
@@ -0,0 +1,126 @@
+"""
+Stand-in for the Ollama /api/chat endpoint, for load-testing mod_data.py without a GPU.
+
+Every request sleeps for the configured latency and then answers with a JSON object that
+holds the fields the prompt asks for, filled with placeholder values. Multi-row prompts get
+a JSON array with one such object per "Component ID". Run it and point the enricher at it:
+
+    python fake_ollama.py --port 11435 --latency 0.5 --failure-rate 0.05 --drop-rate 0.1
+    OLLAMA_HOST=http://localhost:11435 python mod_data.py
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# '"field": example' lines of the JSON skeleton in a prompt
+FIELD_PATTERN = re.compile(r'^\s*"(\w+)":\s*(.+?),?\s*$', re.MULTILINE)
+COMPONENT_ID_PATTERN = re.compile(r'Component ID: (\d+)')
+
+
+def placeholder_value(example: str) -> Any:
+    """Value shaped like the example the prompt gives for a field"""
+    if example.startswith('['):
+        return ["fake"] if '"' in example else [random.randint(1, 99)]
+    if example.startswith('{'):
+        return {key: 1 for key in re.findall(r'"(\w+)"', example)}
+    if example.startswith('"'):
+        return "fake"
+    if 'boolean' in example:
+        return random.random() < 0.5
+    # Small enough for the narrowest numeric column (voltage, DECIMAL(4,2))
+    return random.randint(1, 99)
+
+
+def fake_completion(prompt: str) -> Dict[str, Any]:
+    return {field: placeholder_value(example) for field, example in FIELD_PATTERN.findall(prompt)}
+
+
+def fake_batch_completion(prompt: str, ids: List[str], drop_rate: float) -> List[Dict[str, Any]]:
+    """One object per component, leaving out a drop_rate fraction of them"""
+    return [dict(fake_completion(prompt), id=int(component_id))
+            for component_id in ids if random.random() >= drop_rate]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    latency = 0.5
+    jitter = 0.0
+    failure_rate = 0.0
+    drop_rate = 0.0
+
+    def do_POST(self):
+        if self.path != '/api/chat':
+            self.send_error(404)
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        time.sleep(max(self.latency + random.uniform(-self.jitter, self.jitter), 0))
+        if random.random() < self.failure_rate:
+            self.send_json(500, {'error': "injected failure"})
+            return
+
+        prompt = request['messages'][-1]['content']
+        ids = COMPONENT_ID_PATTERN.findall(prompt)
+        answer = fake_batch_completion(prompt, ids, self.drop_rate) if ids else fake_completion(prompt)
+        content = json.dumps(answer)
+        self.send_json(200, {
+            'model': request.get('model'),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'message': {'role': 'assistant', 'content': content},
+            'done': True,
+            'done_reason': 'stop',
+            # Rough token counts so throughput reports have something to show
+            'prompt_eval_count': sum(len(m['content']) for m in request['messages']) // 4,
+            'eval_count': len(content) // 4,
+        })
+
+    def send_json(self, status: int, payload: Dict[str, Any]):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--latency', type=float, default=0.5, help="Seconds each request takes")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Random +/- seconds added to the latency")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help="Fraction of components left out of multi-row answers")
+    args = parser.parse_args()
+
+    FakeOllamaHandler.latency = args.latency
+    FakeOllamaHandler.jitter = args.jitter
+    FakeOllamaHandler.failure_rate = args.failure_rate
+    FakeOllamaHandler.drop_rate = args.drop_rate
+
+    server = ThreadingHTTPServer((args.host, args.port), FakeOllamaHandler)
+    logger.info(f"Fake Ollama listening on http://{args.host}:{args.port} "
+                f"(latency {args.latency}s +/- {args.jitter}s, failure rate {args.failure_rate:.0%}, "
+                f"drop rate {args.drop_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,21 @@
 import pandas as pd
-import psycopg2
 from psycopg2.extras import execute_values
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 import logging
+import io
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from catalog_registry import CATALOG, CatalogTable, read_catalog_csv
+from db_pool import BULK_STATEMENT_TIMEOUT_MS, db_config, get_pool
+
+# Configuration
+IMPORT_MODE = 'copy'  # 'insert' (execute_values), 'copy' (COPY FROM STDIN) or 'delta' (upsert changed rows only)
+COPY_CHUNK_SIZE = 5000  # Rows buffered in memory per COPY round trip
+PARALLEL_IMPORT = True  # Load each table on its own connection concurrently
+IMPORT_WORKERS = 8  # Tables loaded at the same time; the largest tables each get a worker
+IMPORT_FILES: Optional[List[str]] = None  # Subset of CATALOG to load; None ingests the whole catalog
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -21,7 +33,7 @@ class PCPartsDBImporter:
 
     def connect(self):
         try:
-            self.conn = psycopg2.connect(**self.db_params)
+            self.conn = get_pool(self.db_params).getconn()
             self.cursor = self.conn.cursor()
             logger.info("Successfully connected to the database")
         except Exception as e:
@@ -32,13 +44,23 @@ class PCPartsDBImporter:
         if self.cursor:
             self.cursor.close()
         if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+            get_pool(self.db_params).putconn(self.conn)
+            self.conn = None
+            logger.info("Database connection returned to the pool")
+
+    def blank_to_null(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Empty text fields -> NA, so every import mode stores them as NULL: COPY's NULL ''
+        cannot tell an empty string from a missing value, while INSERT would keep ''
+        """
+        text_columns = [column for column, dtype in df.dtypes.items() if pd.api.types.is_string_dtype(dtype)]
+        df[text_columns] = df[text_columns].mask(df[text_columns] == '')
+        return df
 
     def clean_dataframe(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
         """Clean and prepare DataFrame for import"""
         # Select only the required columns
-        df = df[columns].copy()
+        df = self.blank_to_null(df[columns].copy())
         
         # Remove duplicates based on 'name' column
         df = df.drop_duplicates(subset=['name'], keep='first')
@@ -48,10 +70,165 @@ class PCPartsDBImporter:
         
         return df
 
-    def import_csv_to_table(self, csv_path: Path, table_name: str, columns: List[str]):
+    def prepare_copy_chunk(self, chunk: pd.DataFrame, columns: List[str], seen_names: Set[str]) -> pd.DataFrame:
+        """Clean one CSV chunk for COPY, dropping names already sent in earlier chunks"""
+        chunk = chunk[columns].drop_duplicates(subset=['name'], keep='first')
+        chunk = self.blank_to_null(chunk[~chunk['name'].isin(seen_names)].copy())
+        seen_names.update(chunk['name'])
+        return chunk
+
+    def copy_csv_to_table(self, csv_path: Path, spec: CatalogTable, chunk_size: Optional[int] = None):
+        """Stream a CSV into a table via COPY FROM STDIN, one bounded chunk at a time"""
+        chunk_size = chunk_size or COPY_CHUNK_SIZE
+        table_name, columns = spec.table, spec.columns
+        try:
+            logger.info(f"Streaming CSV file: {csv_path} (chunks of {chunk_size} rows)")
+
+            self.cursor.execute(f"TRUNCATE TABLE {table_name} CASCADE")
+            self.forget_fingerprints(table_name)
+
+            copy_query = f"""
+                COPY {table_name} ({', '.join(columns)})
+                FROM STDIN WITH (FORMAT csv, NULL '')
+            """
+
+            seen_names: Set[str] = set()
+            total = 0
+            for chunk in read_catalog_csv(csv_path, spec, chunksize=chunk_size):
+                chunk = self.prepare_copy_chunk(chunk, columns, seen_names)
+                if chunk.empty:
+                    continue
+
+                buffer = io.StringIO()
+                chunk.to_csv(buffer, header=False, index=False, na_rep='')
+                buffer.seek(0)
+                self.cursor.copy_expert(copy_query, buffer)
+                total += len(chunk)
+
+            # TRUNCATE and COPY commit together, so a failed load leaves the old rows in place
+            self.conn.commit()
+            logger.info(f"Successfully copied {total} rows into {table_name}")
+
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Error copying data to {table_name}: {e}")
+            raise
+
+    def ensure_fingerprint_table(self):
+        """Create the table holding one content hash per imported row"""
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_fingerprints (
+                table_name VARCHAR(100) NOT NULL,
+                name VARCHAR(255) NOT NULL,
+                row_hash CHAR(32) NOT NULL,
+                PRIMARY KEY (table_name, name)
+            )
+        """)
+
+    def forget_fingerprints(self, table_name: str):
+        """Drop a table's row hashes after a full reload, so the next delta import compares every row"""
+        self.ensure_fingerprint_table()
+        self.cursor.execute("DELETE FROM import_fingerprints WHERE table_name = %s", (table_name,))
+
+    def delete_dependent_rows(self, table_name: str, names: List[str]):
+        """
+        Delete the rows referencing the named rows through a foreign key (the compatibility
+        tables have no ON DELETE CASCADE), as TRUNCATE ... CASCADE does for a full reload
+        """
+        self.cursor.execute("""
+            SELECT c.conrelid::regclass::text, referencing.attname, referenced.attname
+            FROM pg_constraint c
+            JOIN pg_attribute referencing ON referencing.attrelid = c.conrelid AND referencing.attnum = c.conkey[1]
+            JOIN pg_attribute referenced ON referenced.attrelid = c.confrelid AND referenced.attnum = c.confkey[1]
+            WHERE c.contype = 'f' AND c.confrelid = %s::regclass AND cardinality(c.conkey) = 1
+        """, (table_name,))
+        for dependent_table, column, referenced_column in self.cursor.fetchall():
+            self.cursor.execute(f"""
+                DELETE FROM {dependent_table}
+                WHERE {column} IN (SELECT {referenced_column} FROM {table_name} WHERE name = ANY(%s))
+            """, (names,))
+
+    def row_values(self, row: tuple) -> tuple:
+        """Normalize a DataFrame row for psycopg2 (NaN/NA -> None, NumPy scalars -> Python)"""
+        return tuple(None if pd.isna(value) else getattr(value, 'item', lambda: value)() for value in row)
+
+    def hash_row(self, values: tuple) -> str:
+        """Stable content hash of a cleaned row"""
+        text = '\x1f'.join('' if value is None else str(value) for value in values)
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def delta_import_csv_to_table(self, csv_path: Path, spec: CatalogTable) -> Dict[str, int]:
+        """Upsert only new or changed rows and delete vanished ones, leaving enriched columns intact"""
+        table_name, columns = spec.table, spec.columns
+        try:
+            logger.info(f"Reading CSV file for delta import: {csv_path}")
+            df = self.clean_dataframe(read_catalog_csv(csv_path, spec), columns)
+
+            rows = [self.row_values(row) for row in df.itertuples(index=False, name=None)]
+            hashes = {row[0]: self.hash_row(row) for row in rows}
+
+            self.ensure_fingerprint_table()
+            self.cursor.execute(
+                "SELECT name, row_hash FROM import_fingerprints WHERE table_name = %s", (table_name,)
+            )
+            known_hashes = dict(self.cursor.fetchall())
+            self.cursor.execute(f"SELECT name FROM {table_name}")
+            existing_names = {name for (name,) in self.cursor.fetchall()}
+
+            # Rows already in the table without a fingerprint (first delta run) are upserted once
+            new_rows = [row for row in rows if row[0] not in existing_names]
+            changed_rows = [row for row in rows
+                            if row[0] in existing_names and known_hashes.get(row[0]) != hashes[row[0]]]
+            deleted_names = list(existing_names - hashes.keys())
+
+            upsert_rows = new_rows + changed_rows
+            if upsert_rows:
+                update_columns = [column for column in columns if column != 'name']
+                upsert_query = f"""
+                    INSERT INTO {table_name} ({', '.join(columns)})
+                    VALUES %s
+                    ON CONFLICT (name) DO UPDATE
+                    SET {', '.join(f'{column} = EXCLUDED.{column}' for column in update_columns)}
+                """
+                execute_values(self.cursor, upsert_query, upsert_rows)
+                execute_values(self.cursor, """
+                    INSERT INTO import_fingerprints (table_name, name, row_hash)
+                    VALUES %s
+                    ON CONFLICT (table_name, name) DO UPDATE SET row_hash = EXCLUDED.row_hash
+                """, [(table_name, row[0], hashes[row[0]]) for row in upsert_rows])
+
+            if deleted_names:
+                self.delete_dependent_rows(table_name, deleted_names)
+                self.cursor.execute(f"DELETE FROM {table_name} WHERE name = ANY(%s)", (deleted_names,))
+                self.cursor.execute(
+                    "DELETE FROM import_fingerprints WHERE table_name = %s AND name = ANY(%s)",
+                    (table_name, deleted_names)
+                )
+
+            self.conn.commit()
+
+            counts = {
+                'inserted': len(new_rows),
+                'updated': len(changed_rows),
+                'deleted': len(deleted_names),
+                'unchanged': len(rows) - len(upsert_rows),
+            }
+            logger.info(
+                f"Delta import into {table_name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['deleted']} deleted, {counts['unchanged']} unchanged"
+            )
+            return counts
+
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Error delta importing data to {table_name}: {e}")
+            raise
+
+    def import_csv_to_table(self, csv_path: Path, spec: CatalogTable):
+        table_name, columns = spec.table, spec.columns
         try:
             logger.info(f"Reading CSV file: {csv_path}")
-            df = pd.read_csv(csv_path)
+            df = read_catalog_csv(csv_path, spec)
             
             # Clean and prepare data
             df = self.clean_dataframe(df, columns)
@@ -59,10 +236,11 @@ class PCPartsDBImporter:
             
             # Clear existing data from the table
             self.cursor.execute(f"TRUNCATE TABLE {table_name} CASCADE")
+            self.forget_fingerprints(table_name)
             self.conn.commit()
             
             # Convert DataFrame to list of tuples
-            data = [tuple(row) for row in df.values]
+            data = [self.row_values(row) for row in df.itertuples(index=False, name=None)]
             
             # Create the INSERT query
             insert_query = f"""
@@ -81,45 +259,81 @@ class PCPartsDBImporter:
             logger.error(f"Error importing data to {table_name}: {e}")
             raise
 
-    def process_all_files(self):
-        file_mappings = {
-            'cpu.csv': ('cpu', ['name', 'price', 'core_count', 'core_clock', 'boost_clock', 'tdp', 'graphics', 'smt']),
-            'motherboard.csv': ('motherboard', ['name', 'price', 'socket', 'form_factor', 'max_memory', 'memory_slots', 'color']),
-            'memory.csv': ('memory', ['name', 'price', 'speed', 'modules', 'price_per_gb', 'color', 'first_word_latency', 'cas_latency']),
-            'internal-hard-drive.csv': ('storage', ['name', 'price', 'capacity', 'price_per_gb', 'type', 'cache', 'form_factor', 'interface']),
-            'video-card.csv': ('video_card', ['name', 'price', 'chipset', 'memory', 'core_clock', 'boost_clock', 'color', 'length']),
-            'case.csv': ('case_enclosure', ['name', 'price', 'type', 'color', 'psu', 'side_panel', 'external_volume', 'internal_35_bays']),
-            'power-supply.csv': ('power_supply', ['name', 'price', 'type', 'efficiency', 'wattage', 'modular', 'color']),
-            'cpu-cooler.csv': ('cpu_cooler', ['name', 'price', 'rpm', 'noise_level', 'color', 'size'])
-        }
-
-        for csv_file, (table_name, columns) in file_mappings.items():
-            try:
-                csv_path = DATA_DIR / csv_file
-                if not csv_path.exists():
-                    logger.warning(f"CSV file not found: {csv_path}")
-                    continue
-                    
-                logger.info(f"Processing {csv_file}...")
-                self.import_csv_to_table(csv_path, table_name, columns)
-            except Exception as e:
-                logger.error(f"Error processing {csv_file}: {e}")
-                continue  # Continue with next file even if current one fails
+    def import_file(self, csv_file: str, spec: CatalogTable) -> bool:
+        """Import one CSV into its table; returns False if the file is missing"""
+        csv_path = DATA_DIR / csv_file
+        if not csv_path.exists():
+            logger.warning(f"CSV file not found: {csv_path}")
+            return False
+
+        logger.info(f"Processing {csv_file}...")
+        if IMPORT_MODE == 'delta':
+            self.delta_import_csv_to_table(csv_path, spec)
+        elif IMPORT_MODE == 'copy':
+            self.copy_csv_to_table(csv_path, spec)
+        else:
+            self.import_csv_to_table(csv_path, spec)
+        return True
+
+    def import_file_on_own_connection(self, csv_file: str, spec: CatalogTable) -> bool:
+        """Import one CSV on its own pooled connection so it commits or rolls back independently"""
+        worker = PCPartsDBImporter(self.db_params)
+        worker.connect()
+        try:
+            return worker.import_file(csv_file, spec)
+        finally:
+            worker.close()
+
+    def process_all_files(self, parallel: bool = PARALLEL_IMPORT, max_workers: int = IMPORT_WORKERS):
+        results: Dict[str, Tuple[str, float]] = {}
+        total_start = time.perf_counter()
+        catalog = {csv_file: spec for csv_file, spec in CATALOG.items()
+                   if IMPORT_FILES is None or csv_file in IMPORT_FILES}
+
+        if parallel:
+            logger.info(f"Importing {len(catalog)} tables with {max_workers} workers...")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {}
+                for csv_file, spec in catalog.items():
+                    future = executor.submit(self.timed_import, self.import_file_on_own_connection, csv_file, spec)
+                    futures[future] = spec.table
+
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+        else:
+            for csv_file, spec in catalog.items():
+                results[spec.table] = self.timed_import(self.import_file, csv_file, spec)
+
+        self.log_import_summary(results, time.perf_counter() - total_start)
+        return results
+
+    def timed_import(self, import_func, csv_file: str, spec: CatalogTable) -> Tuple[str, float]:
+        """Run one table import and return its status and elapsed seconds"""
+        start = time.perf_counter()
+        try:
+            status = 'ok' if import_func(csv_file, spec) else 'missing'
+        except Exception as e:
+            logger.error(f"Error processing {csv_file}: {e}")
+            status = 'failed'  # Continue with next file even if current one fails
+        return status, time.perf_counter() - start
+
+    def log_import_summary(self, results: Dict[str, Tuple[str, float]], total_seconds: float):
+        logger.info("Import summary:")
+        for table_name, (status, seconds) in sorted(results.items(), key=lambda item: -item[1][1]):
+            logger.info(f"  {table_name:<22} {status:<8} {seconds:8.2f}s")
+        table_seconds = sum(seconds for _, seconds in results.values())
+        logger.info(f"Wall time {total_seconds:.2f}s (sum of table times {table_seconds:.2f}s)")
 
 def main():
-    # Database connection parameters
-    db_params = {
-        'dbname': 'pc_builder',
-        'user': 'pc_builder_admin',
-        'password': 'pc_builder',  # Replace with your actual password
-        'host': 'localhost',
-        'port': '5432'
-    }
+    # Database connection parameters; set PGHOST, PGDATABASE, PGPASSWORD etc. to override.
+    # COPY and the deduplication run over whole tables, so the import has no statement timeout
+    db_params = db_config('pc_builder', BULK_STATEMENT_TIMEOUT_MS)
 
     importer = PCPartsDBImporter(db_params)
     
     try:
-        importer.connect()
+        if not PARALLEL_IMPORT:
+            importer.connect()  # Parallel workers open their own connections
         importer.process_all_files()
     except Exception as e:
         logger.error(f"Import process failed: {e}")
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of parsed LLM responses, keyed by a hash of (model, system prompt, prompt).
+    Holds at most max_entries responses; the least recently used ones are evicted first.
+    The file (and its directory) is only created on the first lookup or store.
+    """
+    def __init__(self, path: Union[str, Path], max_entries: int = 100_000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.entries = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self.open()
+        return self._conn
+
+    def open(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        conn.commit()
+        self.entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return conn
+
+    @staticmethod
+    def make_key(model: str, system: str, prompt: str) -> str:
+        # Length-prefix each part so different splits of the same text never collide
+        parts = [model, system, prompt]
+        return hashlib.sha256(''.join(f"{len(part)}:{part}" for part in parts).encode()).hexdigest()
+
+    def get(self, model: str, system: str, prompt: str) -> Optional[Dict]:
+        key = self.make_key(model, system, prompt)
+        row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, model: str, system: str, prompt: str, response: Dict):
+        key = self.make_key(model, system, prompt)
+        cursor = self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, model, response, last_used) VALUES (?, ?, ?, ?)",
+            (key, model, json.dumps(response), time.time())
+        )
+        # Replacing an entry also reports a rowcount of 1, so recount before evicting anything
+        self.entries += cursor.rowcount
+        if self.entries > self.max_entries:
+            self.entries = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = self.entries - self.max_entries
+            if excess > 0:
+                self.conn.execute("""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY last_used LIMIT ?
+                    )
+                """, (excess,))
+                self.entries -= excess
+                self.evictions += excess
+        self.conn.commit()
+
+    def log_stats(self):
+        if self._conn is None:
+            return
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0
+        logger.info(f"LLM cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate), "
+                    f"{self.evictions} evicted, {self.entries} entries in {self.path.name}")
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
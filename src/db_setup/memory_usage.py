@@ -0,0 +1,15 @@
+import sys
+from typing import Optional
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process so far, or None where it cannot be read"""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
@@ -1,45 +1,611 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+import argparse
+import hashlib
 import json
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import socket
+import random
+import time
+from typing import Callable, Deque, Dict, Iterator, List, Any, NamedTuple, Optional, Set, Tuple
 import asyncio
+from collections import deque
+from functools import partial
 from ollama import AsyncClient
 import re
+from pathlib import Path
+from llm_cache import LLMResponseCache
+from db_pool import db_config, get_pool
+from memory_usage import peak_rss_mb
 
 # Configuration
-CONTINUE_FROM_LAST = False  # Set to False to start fresh, True to continue from last position
+CONTINUE_FROM_LAST = False  # Set to False to start fresh, True to continue from last position (USE_JOB_TABLE off)
+USE_JOB_TABLE = True  # Track each row in enrichment_jobs; resumes exactly and lets several processes share the work
+RESET_JOBS = False  # Hand done and failed rows out again (--reset); rows other processes are running are left alone
+JOB_CLAIM_SIZE = 500  # Rows a process claims from enrichment_jobs at a time
+JOB_LEASE_SECONDS = 900  # A claim older than this is assumed dead and handed out again; keep it above a chunk's run time
+MAX_JOB_ATTEMPTS = 3  # Runs a failed row is claimed in before it is left as failed
 BATCH_SIZE: Optional[int] = None  # Set to None for processing all records at once
+READ_CHUNK_SIZE = 1000  # Rows streamed from a server-side cursor at a time when USE_JOB_TABLE is off
+OLLAMA_HOST = os.environ.get('OLLAMA_HOST', 'http://localhost:11434')  # Point at fake_ollama.py for load tests
+OLLAMA_MODEL = "qwen2.5:14b"
+MAX_CONCURRENT_REQUESTS = 8  # In-flight LLM requests across all categories
+CATEGORY_CONCURRENCY = 4  # Default in-flight requests per category
+MAX_RETRIES = 3  # Extra attempts for a row whose completion failed or was not valid JSON
+RETRY_BACKOFF = 1.0  # Seconds before the first retry, doubled for each further attempt
+STATS_INTERVAL = 10.0  # Seconds between throughput log lines
+USER_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'pc_builder'
+# Response cache, kept out of the source tree; LLM_CACHE_PATH overrides it, None disables it
+LLM_CACHE_PATH: Optional[Path] = Path(os.environ.get('LLM_CACHE_PATH') or USER_CACHE_DIR / 'llm_cache.sqlite3')
+LLM_CACHE_MAX_ENTRIES = 100_000
+ENRICH_BY_FAMILY = True  # One LLM call per chipset/model family where the category defines one
+PROMPT_BATCH_SIZE: Optional[int] = None  # Rows packed into one multi-row prompt; None sends one prompt per row
+WRITE_BATCH_SIZE = 200  # Buffered results that trigger a write-back transaction
+WRITE_FLUSH_INTERVAL = 5.0  # Seconds before buffered results are written regardless of count
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """You are a PC hardware expert. Analyze the component specifications and provide 
+                    detailed technical specifications in JSON format. Do not include explanations or thinking process in your response.
+                    And your responses should be consistent throughout - for a field example: (PCIe4 or 4) choose one format and stick with it throughout the column
+                    Provide only valid JSON with actual values, not placeholder values and nothing else. The output should only be json."""
+
+# Every row prompt ends with this line followed by the JSON skeleton of the answer
+RESPONSE_HEADER = "Return a JSON object with ONLY these fields and actual values (not placeholders):"
+RESPONSE_FIELD_PATTERN = re.compile(r'^\s*"(\w+)":', re.MULTILINE)
+# Named parameters of an update query; all but the ids come from the LLM's answer
+QUERY_FIELD_PATTERN = re.compile(r'%\((\w+)\)s')
+
+# Several row prompts packed into one; {components} holds each row's specifications under its ID
+BATCH_PROMPT = """
+            Below are the specifications of {count} components, each starting with its Component ID.
+            {components}
+            Return a JSON array with one object per component. Each object has an "id" field with the
+            Component ID and ONLY these other fields, with actual values (not placeholders):
+            {skeleton}
+            """
+
+
+class FamilyEnrichment(NamedTuple):
+    """Fields shared by every row of a family, asked for once and written to all of its rows"""
+    key: Callable[[Dict[str, Any]], Optional[str]]  # Normalized family key; None enriches the row on its own
+    prompt: str  # str.format template over the family's first row plus {family}
+    update_query: str  # Named parameters from the LLM's JSON, plus ids
+    # Per-row prompt for the fields that vary within a family; asked for every row of a family,
+    # so together with update_query it writes everything the category's per-row update does
+    override_prompt: Optional[str] = None
+    override_query: Optional[str] = None
+
+
+def gpu_family(row: Dict[str, Any]) -> Optional[str]:
+    chipset = ' '.join(str(row.get('chipset') or '').split())
+    return chipset.lower() or None
+
+
+# Chipset model in a board name: "B650" in "MSI MAG B650 TOMAHAWK", "H310" in "H310CM-DVS", "990FX" in "GA-990FXA-UD3"
+CHIPSET_PATTERN = re.compile(r'(?<![A-Z])(TRX\d{2}|WRX\d{2}|[ABGHPQXZ]\d{2,3}E?|\d{3}[FG]X)(?=[A-Z]{0,2}(?:[^A-Z0-9]|$))')
+DDR4_PATTERN = re.compile(r'\b(?:DDR4|D4)\b')
+
+
+def motherboard_family(row: Dict[str, Any]) -> Optional[str]:
+    name = str(row.get('name') or '').upper()
+    match = CHIPSET_PATTERN.search(name)
+    if not match or not row.get('socket'):
+        return None
+    # Boards sold in DDR4 and DDR5 variants only say so for DDR4
+    variant = ' DDR4' if DDR4_PATTERN.search(name) else ''
+    return f"{row['socket']} {match.group(1)}{variant}"
+
+
+def memory_family(row: Dict[str, Any]) -> Optional[str]:
+    # The family prompt names the CAS latency, so kits only share an answer when it matches too
+    if not row.get('speed') or not row.get('modules') or row.get('cas_latency') is None:
+        return None
+    return f"{row['speed']}|{row['modules']}|{row['cas_latency']}".replace(' ', '').lower()
+
+
+class EnrichmentCategory(NamedTuple):
+    """Rows to read, prompt to send and columns to update for one component table"""
+    table: str
+    progress_column: str  # Set by enrichment; CONTINUE_FROM_LAST resumes at the first row without it or an outcome
+    label: str  # Used in per-row log lines
+    plural: str  # Used in per-table log lines
+    prompt: str  # str.format template over the row's columns
+    update_query: str  # Named parameters from the LLM's JSON, plus id
+    json_fields: Tuple[str, ...] = ()  # Response fields stored as jsonb
+    concurrency: int = CATEGORY_CONCURRENCY
+    family: Optional[FamilyEnrichment] = None  # Used when ENRICH_BY_FAMILY is set
+
+
+# Category -> enrichment spec, in the order categories are started
+ENRICHMENT_CATEGORIES: Dict[str, EnrichmentCategory] = {
+    'cpu': EnrichmentCategory(
+        table='cpu', progress_column='socket_type', label='CPU', plural='CPUs',
+        prompt="""
+            Based on these CPU specifications:
+            Name: {name}
+            Core Count: {core_count}
+            Core Clock: {core_clock} GHz
+            Boost Clock: {boost_clock} GHz
+            TDP: {tdp}W
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "socket_type": "The actual socket type (e.g. AM4, LGA1700)",
+                "memory_type_support": ["The actual supported memory types"],
+                "memory_speed_support": actual_max_speed_in_mhz,
+                "chipset_support": ["list", "of", "compatible", "chipsets"],
+                "max_memory_support": max_memory_in_gb
+            }}
+            """,
+        update_query="""
+            UPDATE cpu
+            SET socket_type = %(socket_type)s,
+                memory_type_support = %(memory_type_support)s,
+                memory_speed_support = %(memory_speed_support)s,
+                chipset_support = %(chipset_support)s,
+                max_memory_support = %(max_memory_support)s
+            WHERE id = %(id)s
+        """,
+    ),
+    'motherboard': EnrichmentCategory(
+        table='motherboard', progress_column='chipset', label='Motherboard', plural='motherboards',
+        prompt="""
+            Based on these motherboard specifications:
+            Name: {name}
+            Socket: {socket}
+            Form Factor: {form_factor}
+            Max Memory: {max_memory}
+            Memory Slots: {memory_slots}
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "memory_type": "The memory type (DDR4/DDR5)",
+                "supported_memory_speeds": [list_of_supported_speeds_in_mhz],
+                "chipset": "actual_chipset_model",
+                "pcie_version": "pcie_version_number",
+                "max_pcie_lanes": number_of_lanes,
+                "m2_slots": number_of_m2_slots,
+                "sata_ports": number_of_sata_ports
+            }}
+            """,
+        update_query="""
+            UPDATE motherboard
+            SET memory_type = %(memory_type)s,
+                supported_memory_speeds = %(supported_memory_speeds)s,
+                chipset = %(chipset)s,
+                pcie_version = %(pcie_version)s,
+                max_pcie_lanes = %(max_pcie_lanes)s,
+                m2_slots = %(m2_slots)s,
+                sata_ports = %(sata_ports)s
+            WHERE id = %(id)s
+        """,
+        family=FamilyEnrichment(
+            key=motherboard_family,
+            prompt="""
+            Based on this motherboard platform:
+            Socket and chipset: {family}
+
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "memory_type": "The memory type (DDR4/DDR5)",
+                "supported_memory_speeds": [list_of_supported_speeds_in_mhz],
+                "chipset": "actual_chipset_model",
+                "pcie_version": "pcie_version_number",
+                "max_pcie_lanes": number_of_lanes
+            }}
+            """,
+            update_query="""
+                UPDATE motherboard
+                SET memory_type = %(memory_type)s,
+                    supported_memory_speeds = %(supported_memory_speeds)s,
+                    chipset = %(chipset)s,
+                    pcie_version = %(pcie_version)s,
+                    max_pcie_lanes = %(max_pcie_lanes)s
+                WHERE id = ANY(%(ids)s)
+            """,
+            override_prompt="""
+            Based on these motherboard specifications:
+            Name: {name}
+            Form Factor: {form_factor}
+
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "m2_slots": number_of_m2_slots,
+                "sata_ports": number_of_sata_ports
+            }}
+            """,
+            override_query="""
+                UPDATE motherboard
+                SET m2_slots = %(m2_slots)s,
+                    sata_ports = %(sata_ports)s
+                WHERE id = %(id)s
+            """,
+        ),
+    ),
+    'memory': EnrichmentCategory(
+        table='memory', progress_column='memory_type', label='Memory', plural='memory modules',
+        prompt="""
+            Based on these memory specifications:
+            Name: {name}
+            Speed: {speed}
+            Modules: {modules}
+            CAS Latency: {cas_latency}
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "memory_type": "actual_memory_type",
+                "voltage": voltage_in_volts,
+                "memory_format": "DIMM_or_SODIMM",
+                "ecc_support": boolean_true_or_false
+            }}
+            """,
+        update_query="""
+            UPDATE memory
+            SET memory_type = %(memory_type)s,
+                voltage = %(voltage)s,
+                memory_format = %(memory_format)s,
+                ecc_support = %(ecc_support)s
+            WHERE id = %(id)s
+        """,
+        family=FamilyEnrichment(
+            key=memory_family,
+            prompt="""
+            Based on these memory kit specifications:
+            Speed: {speed}
+            Modules: {modules}
+            CAS Latency: {cas_latency}
+
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "memory_type": "actual_memory_type",
+                "voltage": voltage_in_volts,
+                "memory_format": "DIMM_or_SODIMM",
+                "ecc_support": boolean_true_or_false
+            }}
+            """,
+            update_query="""
+                UPDATE memory
+                SET memory_type = %(memory_type)s,
+                    voltage = %(voltage)s,
+                    memory_format = %(memory_format)s,
+                    ecc_support = %(ecc_support)s
+                WHERE id = ANY(%(ids)s)
+            """,
+        ),
+    ),
+    'storage': EnrichmentCategory(
+        table='storage', progress_column='nvme', label='Storage', plural='storage devices',
+        prompt="""
+            Based on these storage specifications:
+            Name: {name}
+            Type: {type}
+            Form Factor: {form_factor}
+            Interface: {interface}
+            Capacity: {capacity} GB
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "power_consumption": power_consumption_in_watts,
+                "nvme": is_nvme_drive_boolean,
+                "pcie_version": "pcie_version_if_nvme"
+            }}
+            """,
+        update_query="""
+            UPDATE storage
+            SET power_consumption = %(power_consumption)s,
+                nvme = %(nvme)s,
+                pcie_version = %(pcie_version)s
+            WHERE id = %(id)s
+        """,
+    ),
+    'gpu': EnrichmentCategory(
+        table='video_card', progress_column='tdp', label='GPU', plural='GPUs',
+        prompt="""
+            Based on these GPU specifications:
+            Name: {name}
+            Chipset: {chipset}
+            Memory: {memory} GB
+            Core Clock: {core_clock} MHz
+            Boost Clock: {boost_clock} MHz
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "tdp": power_consumption_in_watts,
+                "required_psu_wattage": recommended_psu_watts,
+                "pcie_version": "actual_pcie_version",
+                "pcie_lanes_required": number_of_lanes,
+                "height": height_in_mm,
+                "power_connectors": ["list", "of", "required", "connectors"]
+            }}
+            """,
+        update_query="""
+            UPDATE video_card
+            SET tdp = %(tdp)s,
+                required_psu_wattage = %(required_psu_wattage)s,
+                pcie_version = %(pcie_version)s,
+                pcie_lanes_required = %(pcie_lanes_required)s,
+                height = %(height)s,
+                power_connectors = %(power_connectors)s
+            WHERE id = %(id)s
+        """,
+        family=FamilyEnrichment(
+            key=gpu_family,
+            prompt="""
+            Based on this GPU chipset:
+            Chipset: {chipset}
+
+            Return a JSON object with ONLY these fields and actual values for the reference design (not placeholders):
+            {{
+                "tdp": power_consumption_in_watts,
+                "required_psu_wattage": recommended_psu_watts,
+                "pcie_version": "actual_pcie_version",
+                "pcie_lanes_required": number_of_lanes,
+                "power_connectors": ["list", "of", "required", "connectors"]
+            }}
+            """,
+            update_query="""
+                UPDATE video_card
+                SET tdp = %(tdp)s,
+                    required_psu_wattage = %(required_psu_wattage)s,
+                    pcie_version = %(pcie_version)s,
+                    pcie_lanes_required = %(pcie_lanes_required)s,
+                    power_connectors = %(power_connectors)s
+                WHERE id = ANY(%(ids)s)
+            """,
+            override_prompt="""
+            Based on these GPU specifications:
+            Name: {name}
+            Chipset: {chipset}
+
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "height": height_in_mm
+            }}
+            """,
+            override_query="""
+                UPDATE video_card
+                SET height = %(height)s
+                WHERE id = %(id)s
+            """,
+        ),
+    ),
+    'case': EnrichmentCategory(
+        table='case_enclosure', progress_column='max_gpu_length', label='Case', plural='cases',
+        prompt="""
+            Based on these case specifications:
+            Name: {name}
+            Type: {type}
+            External Volume: {external_volume}
+            Internal 3.5" Bays: {internal_35_bays}
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "max_gpu_length": max_gpu_length_in_mm,
+                "max_gpu_height": max_gpu_height_in_mm,
+                "max_cpu_cooler_height": max_cpu_cooler_height_in_mm,
+                "supported_motherboard_sizes": ["list", "of", "supported", "sizes"],
+                "max_psu_length": max_psu_length_in_mm,
+                "radiator_support": ["list", "of", "supported", "radiator", "sizes"],
+                "included_fans": number_of_included_fans,
+                "max_fan_slots": total_number_of_fan_slots
+            }}
+            """,
+        update_query="""
+            UPDATE case_enclosure
+            SET max_gpu_length = %(max_gpu_length)s,
+                max_gpu_height = %(max_gpu_height)s,
+                max_cpu_cooler_height = %(max_cpu_cooler_height)s,
+                supported_motherboard_sizes = %(supported_motherboard_sizes)s,
+                max_psu_length = %(max_psu_length)s,
+                radiator_support = %(radiator_support)s,
+                included_fans = %(included_fans)s,
+                max_fan_slots = %(max_fan_slots)s
+            WHERE id = %(id)s
+        """,
+    ),
+    'psu': EnrichmentCategory(
+        table='power_supply', progress_column='psu_length', label='PSU', plural='power supplies',
+        prompt="""
+            Based on these power supply specifications:
+            Name: {name}
+            Type: {type}
+            Efficiency: {efficiency}
+            Wattage: {wattage}
+            Modular: {modular}
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "available_connectors": {{"cpu": number_of_cpu_connectors, "pcie": number_of_pcie_connectors, "sata": number_of_sata_connectors}},
+                "psu_length": length_in_mm,
+                "fan_size": fan_size_in_mm,
+                "protection_features": ["list", "of", "protection", "features"],
+                "atx_version": "atx_version_number"
+            }}
+            """,
+        update_query="""
+            UPDATE power_supply
+            SET available_connectors = %(available_connectors)s::jsonb,
+                psu_length = %(psu_length)s,
+                fan_size = %(fan_size)s,
+                protection_features = %(protection_features)s,
+                atx_version = %(atx_version)s
+            WHERE id = %(id)s
+        """,
+        json_fields=('available_connectors',),
+    ),
+    'cooler': EnrichmentCategory(
+        table='cpu_cooler', progress_column='height', label='CPU Cooler', plural='CPU coolers',
+        prompt="""
+            Based on these CPU cooler specifications:
+            Name: {name}
+            RPM: {rpm}
+            Noise Level: {noise_level}
+            Size: {size}
+            
+            Return a JSON object with ONLY these fields and actual values (not placeholders):
+            {{
+                "supported_sockets": ["list", "of", "supported", "socket", "types"],
+                "height": height_in_mm,
+                "tdp_support": max_tdp_support_in_watts,
+                "radiator_size": "radiator_size_if_liquid_cooler",
+                "clearance_required": clearance_required_in_mm
+            }}
+            """,
+        update_query="""
+            UPDATE cpu_cooler
+            SET supported_sockets = %(supported_sockets)s,
+                height = %(height)s,
+                tdp_support = %(tdp_support)s,
+                radiator_size = %(radiator_size)s,
+                clearance_required = %(clearance_required)s
+            WHERE id = %(id)s
+        """,
+    ),
+}
+
+
+def query_fields(query: str) -> Set[str]:
+    """Answer fields an update query writes"""
+    return set(QUERY_FIELD_PATTERN.findall(query)) - {'id', 'ids'}
+
+
+def check_family_fields(category: EnrichmentCategory):
+    """
+    Refuse a family spec that would leave fields empty which per-row enrichment fills: the
+    family update and the override together must write every field of the per-row update,
+    and each prompt must ask for exactly the fields its query writes
+    """
+    spec = category.family
+    missing = query_fields(category.update_query) - query_fields(spec.update_query)
+    if spec.override_query:
+        missing -= query_fields(spec.override_query)
+    if missing:
+        raise ValueError(f"Family enrichment of {category.table} never writes {', '.join(sorted(missing))}")
+    for prompt, query in ((spec.prompt, spec.update_query), (spec.override_prompt, spec.override_query)):
+        if (prompt is None) != (query is None):
+            raise ValueError(f"Family enrichment of {category.table} has an override prompt or query without the other")
+        if prompt is not None and set(RESPONSE_FIELD_PATTERN.findall(prompt)) != query_fields(query):
+            raise ValueError(f"A family prompt of {category.table} does not ask for the fields its query writes")
+
+
+for _category in ENRICHMENT_CATEGORIES.values():
+    if _category.family:
+        check_family_fields(_category)
+
+
+def hash_prompt(prompt: str) -> str:
+    return hashlib.md5(prompt.encode()).hexdigest()
+
+
+class PendingWrite(NamedTuple):
+    """An enrichment result waiting in the write buffer"""
+    category: EnrichmentCategory
+    query: str
+    values: Dict[str, Any]  # Query parameters: the LLM's JSON plus id or ids
+    target: str  # Used in error log lines
+    rows: int  # Rows the write enriches, for the stats
+    prompt_hash: str  # Recorded in enrichment_jobs alongside the status
+
+    @property
+    def ids(self) -> List[int]:
+        return self.values.get('ids') or [self.values['id']]
+
+
+class EnrichmentStats:
+    """Live counters for an enrichment run"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queued: Dict[str, int] = {}
+        self.done: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self.finished: Dict[str, float] = {}
+        self.retries = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requeued = 0  # Rows a batched answer missed or mangled, retried on their own
+
+    def record(self, table: str, rows: int, succeeded: bool) -> int:
+        """Count finished rows; returns the table's running total"""
+        counts = self.done if succeeded else self.failed
+        counts[table] = counts.get(table, 0) + rows
+        return counts[table]
+
+    def rate(self, rows: int, table: Optional[str] = None) -> float:
+        """Rows per second, up to when the table finished if given"""
+        end = self.finished.get(table, time.perf_counter())
+        return rows / max(end - self.start, 1e-9)
+
+    def log(self):
+        done = sum(self.done.values())
+        logger.info(f"Throughput: {done}/{sum(self.queued.values())} rows enriched ({self.rate(done):.2f} rows/s), "
+                    f"{sum(self.failed.values())} failed, {self.retries} retries, {self.in_flight} in flight")
+
+    def log_summary(self):
+        for table, queued in self.queued.items():
+            done = self.done.get(table, 0)
+            logger.info(f"{table:<15} {done}/{queued} enriched, {self.failed.get(table, 0)} failed, "
+                        f"{self.rate(done, table):.2f} rows/s")
+        self.log()
+        done = max(sum(self.done.values()), 1)
+        logger.info(f"{self.requests} LLM requests, {self.prompt_tokens / done:.0f} prompt + "
+                    f"{self.completion_tokens / done:.0f} completion tokens per enriched row, "
+                    f"{self.requeued} rows re-queued from batches")
+
+
 class LLMDataEnricher:
     def __init__(self, db_params: Dict[str, str]):
         self.db_params = db_params
         self.conn = None
         self.cursor = None
-        self.ollama_client = AsyncClient()
+        self.ollama_client = AsyncClient(host=OLLAMA_HOST)
+        self.request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.stats = EnrichmentStats()
+        self.cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES) if LLM_CACHE_PATH else None
+        self.prompt_batch_size = PROMPT_BATCH_SIZE
+        self.write_buffer: List[PendingWrite] = []
+        self.use_job_table = USE_JOB_TABLE
+        self.reset_jobs = RESET_JOBS
+        self.job_failures: List[Tuple[str, int, str, str]] = []  # (table, id, prompt hash, error) to record
+        # (table, family) -> (answer, prompt), so a family spread over several chunks is asked about once
+        self.family_answers: Dict[Tuple[str, str], Tuple[Dict, str]] = {}
+        # Distinguishes this process's claims; a run does not retry rows it failed itself
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{int(time.time())}"
 
     async def connect(self):
-        self.conn = psycopg2.connect(**self.db_params)
+        self.conn = get_pool(self.db_params).getconn()
         self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
         logger.info("Connected to database")
 
     def close(self):
+        if self.cache:
+            self.cache.log_stats()
         if self.cursor:
             self.cursor.close()
         if self.conn:
-            self.conn.close()
+            get_pool(self.db_params).putconn(self.conn)
+            self.conn = None
 
     def get_last_processed_id(self, table_name: str, column_name: str) -> int:
         """Get the last processed ID for a given table and column"""
+        # Rows finish out of order (concurrent calls, families, batched writes), so resume below the
+        # first row still missing the column rather than after the highest one that has it. Rows with
+        # a recorded outcome are skipped: a row the LLM always fails on, or whose answer left the
+        # column NULL, would otherwise send every resume back to it.
         query = f"""
-            SELECT MAX(id) FROM {table_name} 
-            WHERE {column_name} IS NOT NULL
+            SELECT COALESCE(
+                (SELECT MIN(t.id) - 1 FROM {table_name} t
+                 WHERE t.{column_name} IS NULL
+                   AND NOT EXISTS (SELECT 1 FROM enrichment_jobs j
+                                   WHERE j.table_name = %s AND j.id = t.id AND j.status IN ('done', 'failed'))),
+                (SELECT MAX(id) FROM {table_name})
+            ) AS last_id
         """
-        self.cursor.execute(query)
-        return self.cursor.fetchone()['max'] or 0
+        self.cursor.execute(query, (table_name,))
+        return self.cursor.fetchone()['last_id'] or 0
 
     def build_select_query(self, table_name: str, last_id: int) -> str:
         """Build SELECT query based on BATCH_SIZE configuration"""
@@ -52,35 +618,142 @@ class LLMDataEnricher:
             query += f"\nLIMIT {BATCH_SIZE}"
         return query
 
-    def clean_llm_response(self, response: str) -> str:
+    def ensure_job_table(self):
+        """Create the table that records the enrichment state of every row"""
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS enrichment_jobs (
+                table_name TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done or failed
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                prompt_hash TEXT,
+                claimed_by TEXT,
+                claimed_at TIMESTAMPTZ,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (table_name, id)
+            )
+        """)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS enrichment_jobs_status ON enrichment_jobs (table_name, status)")
+        self.conn.commit()
+
+    def seed_jobs(self, category: EnrichmentCategory):
+        """Add a pending job for every row that has none; with RESET_JOBS, also for finished rows"""
+        # Running rows belong to a live process until their lease expires, and claim_rows takes them then
+        if self.reset_jobs:
+            self.cursor.execute("""
+                UPDATE enrichment_jobs
+                SET status = 'pending', attempts = 0, last_error = NULL,
+                    claimed_by = NULL, claimed_at = NULL, updated_at = now()
+                WHERE table_name = %s AND status IN ('done', 'failed')
+            """, (category.table,))
+        self.cursor.execute(f"""
+            INSERT INTO enrichment_jobs (table_name, id)
+            SELECT %s, id FROM {category.table}
+            ON CONFLICT DO NOTHING
+        """, (category.table,))
+        self.conn.commit()
+
+    def claim_rows(self, category: EnrichmentCategory) -> List[Dict[str, Any]]:
+        """
+        Claim up to JOB_CLAIM_SIZE rows: pending ones, ones another run failed, and ones whose claim
+        expired. SKIP LOCKED lets concurrent processes claim disjoint rows without waiting on each other.
+        """
+        self.cursor.execute("""
+            UPDATE enrichment_jobs j
+            SET status = 'running', attempts = j.attempts + 1, claimed_by = %(worker)s,
+                claimed_at = now(), updated_at = now()
+            FROM (
+                SELECT table_name, id FROM enrichment_jobs
+                WHERE table_name = %(table)s
+                  AND (status = 'pending'
+                       OR (status = 'failed' AND attempts < %(max_attempts)s
+                           AND claimed_by IS DISTINCT FROM %(worker)s)
+                       OR (status = 'running' AND claimed_at < now() - %(lease)s * interval '1 second'))
+                ORDER BY id
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            ) claimable
+            WHERE j.table_name = claimable.table_name AND j.id = claimable.id
+            RETURNING j.id
+        """, {'worker': self.worker_id, 'table': category.table, 'max_attempts': MAX_JOB_ATTEMPTS,
+              'lease': JOB_LEASE_SECONDS, 'limit': JOB_CLAIM_SIZE})
+        ids = [row['id'] for row in self.cursor.fetchall()]
+        self.conn.commit()
+        if not ids:
+            return []
+        self.cursor.execute(f"SELECT * FROM {category.table} WHERE id = ANY(%s) ORDER BY id", (ids,))
+        return self.cursor.fetchall()
+
+    def record_jobs(self, writes: List[PendingWrite], failures: List[Tuple[str, int, str, str]]):
+        """
+        Mark written rows done and failed ones failed, in the caller's transaction. Streamed rows
+        (USE_JOB_TABLE off) have no job yet and get one, so CONTINUE_FROM_LAST can skip them.
+        """
+        entries = [(write.category.table, row_id, 'done', write.prompt_hash, None)
+                   for write in writes if write.rows for row_id in write.ids]
+        entries += [(table, row_id, 'failed', prompt_hash, error) for table, row_id, prompt_hash, error in failures]
+        if not entries:
+            return
+        execute_values(self.cursor, """
+            INSERT INTO enrichment_jobs (table_name, id, status, prompt_hash, last_error)
+            VALUES %s
+            ON CONFLICT (table_name, id) DO UPDATE
+            SET status = EXCLUDED.status, prompt_hash = EXCLUDED.prompt_hash,
+                last_error = EXCLUDED.last_error, updated_at = now()
+        """, entries)
+
+    def log_job_summary(self):
+        self.cursor.execute("""
+            SELECT table_name, status, COUNT(*) AS count FROM enrichment_jobs
+            GROUP BY table_name, status ORDER BY table_name, status
+        """)
+        counts: Dict[str, List[str]] = {}
+        for row in self.cursor.fetchall():
+            counts.setdefault(row['table_name'], []).append(f"{row['count']} {row['status']}")
+        for table, statuses in counts.items():
+            logger.info(f"Jobs {table:<15} {', '.join(statuses)}")
+
+    def clean_llm_response(self, response: str, batch: bool = False) -> str:
         """Remove thinking part and extract just the JSON"""
         response = re.sub(r'<think>.*?</think>', '', response, flags=re.DOTALL)
-        json_match = re.search(r'\{[\s\S]*\}', response)
+        # A batched answer is an array, though some models wrap it in an object
+        pattern = r'[\[{][\s\S]*[\]}]' if batch else r'\{[\s\S]*\}'
+        json_match = re.search(pattern, response)
         if json_match:
             return json_match.group(0)
         return None
 
-    async def get_llm_completion(self, prompt: str) -> Dict:
+    async def get_llm_completion(self, prompt: str, batch: bool = False) -> Any:
         """Get completion from Ollama and process response"""
         try:
+            # Batched answers are cached per row by enrich_batch instead
+            if self.cache and not batch:
+                cached = self.cache.get(OLLAMA_MODEL, SYSTEM_PROMPT, prompt)
+                if cached is not None:
+                    return cached
+
             response = await self.ollama_client.chat(
-                model="qwen2.5:14b",
+                model=OLLAMA_MODEL,
                 messages=[{
                     "role": "system",
-                    "content": """You are a PC hardware expert. Analyze the component specifications and provide 
-                    detailed technical specifications in JSON format. Do not include explanations or thinking process in your response.
-                    And your responses should be consistent throughout - for a field example: (PCIe4 or 4) choose one format and stick with it throughout the column
-                    Provide only valid JSON with actual values, not placeholder values and nothing else. The output should only be json."""
+                    "content": SYSTEM_PROMPT
                 }, {
                     "role": "user",
                     "content": prompt
                 }]
             )
+            self.stats.requests += 1
+            self.stats.prompt_tokens += response.prompt_eval_count or 0
+            self.stats.completion_tokens += response.eval_count or 0
             
-            json_str = self.clean_llm_response(response.message.content)
+            json_str = self.clean_llm_response(response.message.content, batch)
             if json_str:
                 try:
-                    return json.loads(json_str)
+                    data = json.loads(json_str)
+                    if self.cache and data and not batch:
+                        self.cache.put(OLLAMA_MODEL, SYSTEM_PROMPT, prompt, data)
+                    return data
                 except json.JSONDecodeError:
                     logger.error(f"Invalid JSON in response: {json_str}")
                     return None
@@ -90,476 +763,376 @@ class LLMDataEnricher:
             logger.error(f"Error getting LLM completion: {e}")
             return None
 
-    async def enrich_cpu_data(self):
-        """Enrich CPU data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('cpu', 'socket_type')
-        
-        query = self.build_select_query('cpu', last_id)
-        self.cursor.execute(query)
-        cpus = self.cursor.fetchall()
-
-        if not cpus:
-            logger.info("No new CPUs to process")
-            return
-
-        total = len(cpus)
-        logger.info(f"Processing {total} CPUs...")
-
-        for i, cpu in enumerate(cpus, 1):
-            prompt = f"""
-            Based on these CPU specifications:
-            Name: {cpu['name']}
-            Core Count: {cpu['core_count']}
-            Core Clock: {cpu['core_clock']} GHz
-            Boost Clock: {cpu['boost_clock']} GHz
-            TDP: {cpu['tdp']}W
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "socket_type": "The actual socket type (e.g. AM4, LGA1700)",
-                "memory_type_support": ["The actual supported memory types"],
-                "memory_speed_support": actual_max_speed_in_mhz,
-                "chipset_support": ["list", "of", "compatible", "chipsets"],
-                "max_memory_support": max_memory_in_gb
-            }}
-            """
-
-            data = await self.get_llm_completion(prompt)
-            if data:
+    async def complete_with_retries(self, prompt: str, batch: bool = False) -> Any:
+        """get_llm_completion within the global request limit, retried with exponential backoff"""
+        # A failed batch is not retried as a whole; its rows fall back to single-row prompts
+        retries = 0 if batch else MAX_RETRIES
+        for attempt in range(retries + 1):
+            async with self.request_slots:
+                self.stats.in_flight += 1
                 try:
-                    update_query = """
-                        UPDATE cpu 
-                        SET socket_type = %(socket_type)s,
-                            memory_type_support = %(memory_type_support)s,
-                            memory_speed_support = %(memory_speed_support)s,
-                            chipset_support = %(chipset_support)s,
-                            max_memory_support = %(max_memory_support)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = cpu['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated CPU {i}/{total}: {cpu['name']} (ID: {cpu['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating CPU {cpu['name']}: {e}")
+                    data = await self.get_llm_completion(prompt, batch)
+                finally:
+                    self.stats.in_flight -= 1
+            if data:
+                return data
+            if attempt < retries:
+                self.stats.retries += 1
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+        return None
 
-    async def enrich_gpu_data(self):
-        """Enrich GPU data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('video_card', 'tdp')
-        
-        query = self.build_select_query('video_card', last_id)
-        self.cursor.execute(query)
-        gpus = self.cursor.fetchall()
-
-        if not gpus:
-            logger.info("No new GPUs to process")
+    def fetch_rows(self, category: EnrichmentCategory) -> Iterator[List[Dict[str, Any]]]:
+        """Rows to enrich, READ_CHUNK_SIZE at a time from a server-side cursor"""
+        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id(category.table, category.progress_column)
+        # WITH HOLD keeps the cursor open across the write-back commits; committing right away
+        # also keeps it safe from the rollback of a failed write-back
+        with self.conn.cursor(name=f"enrich_{category.table}", cursor_factory=RealDictCursor,
+                              withhold=True) as cursor:
+            cursor.itersize = READ_CHUNK_SIZE
+            cursor.execute(self.build_select_query(category.table, last_id))
+            self.conn.commit()
+            while True:
+                rows = cursor.fetchmany(READ_CHUNK_SIZE)
+                if not rows:
+                    return
+                yield rows
+
+    def row_chunks(self, category: EnrichmentCategory) -> Iterator[List[Dict[str, Any]]]:
+        """Rows to enrich in chunks: claimed from enrichment_jobs, or streamed from the table"""
+        if not self.use_job_table:
+            yield from self.fetch_rows(category)
             return
+        self.seed_jobs(category)
+        while True:
+            rows = self.claim_rows(category)
+            if not rows:
+                return
+            yield rows
 
-        total = len(gpus)
-        logger.info(f"Processing {total} GPUs...")
+    def save_enrichment(self, category: EnrichmentCategory, query: str, data: Dict,
+                        params: Dict[str, Any], target: str, prompt: str, rows: int = 1):
+        """Buffer a result for the next write-back; rows is what it counts for in the stats"""
+        values = dict(data, **params)
+        # Nested objects are stored as jsonb
+        for field in category.json_fields:
+            if isinstance(values.get(field), dict):
+                values[field] = json.dumps(values[field])
+        self.write_buffer.append(PendingWrite(category, query, values, target, rows, hash_prompt(prompt)))
+        if len(self.write_buffer) >= WRITE_BATCH_SIZE:
+            self.flush_writes()
 
-        for i, gpu in enumerate(gpus, 1):
-            prompt = f"""
-            Based on these GPU specifications:
-            Name: {gpu['name']}
-            Chipset: {gpu['chipset']}
-            Memory: {gpu['memory']} GB
-            Core Clock: {gpu['core_clock']} MHz
-            Boost Clock: {gpu['boost_clock']} MHz
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "tdp": power_consumption_in_watts,
-                "required_psu_wattage": recommended_psu_watts,
-                "pcie_version": "actual_pcie_version",
-                "pcie_lanes_required": number_of_lanes,
-                "height": height_in_mm,
-                "power_connectors": ["list", "of", "required", "connectors"]
-            }}
-            """
+    def save_failure(self, category: EnrichmentCategory, ids: List[int], prompt: str):
+        """Count rows that got no usable answer; their jobs are marked failed with the next write-back"""
+        self.stats.record(category.table, len(ids), False)
+        error = f"No valid JSON answer after {MAX_RETRIES + 1} attempts"
+        self.job_failures += [(category.table, row_id, hash_prompt(prompt), error) for row_id in ids]
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    update_query = """
-                        UPDATE video_card 
-                        SET tdp = %(tdp)s,
-                            required_psu_wattage = %(required_psu_wattage)s,
-                            pcie_version = %(pcie_version)s,
-                            pcie_lanes_required = %(pcie_lanes_required)s,
-                            height = %(height)s,
-                            power_connectors = %(power_connectors)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = gpu['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated GPU {i}/{total}: {gpu['name']} (ID: {gpu['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating GPU {gpu['name']}: {e}")
+    def write_batch(self, writes: List[PendingWrite], failures: List[Tuple[str, int, str, str]]):
+        """All buffered updates and their job states in one transaction, one execute_batch per query"""
+        by_query: Dict[str, List[Dict[str, Any]]] = {}
+        for write in writes:
+            by_query.setdefault(write.query, []).append(write.values)
+        for query, values in by_query.items():
+            execute_batch(self.cursor, query, values, page_size=WRITE_BATCH_SIZE)
+        self.record_jobs(writes, failures)
+        self.conn.commit()
 
-    async def enrich_motherboard_data(self):
-        """Enrich motherboard data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('motherboard', 'chipset')
-        query = self.build_select_query('motherboard', last_id)
-        self.cursor.execute(query)
-        motherboards = self.cursor.fetchall()
+    def write_one(self, write: PendingWrite) -> Optional[str]:
+        """Write a single result with its job state; returns the error if it failed"""
+        try:
+            self.cursor.execute(write.query, write.values)
+            self.record_jobs([write], [])
+            self.conn.commit()
+            return None
+        except Exception as e:
+            self.conn.rollback()
+            logger.error(f"Error updating {write.category.label} {write.target}: {e}")
+            logger.error(f"Data that caused error: {write.values}")
+            return str(e)
 
-        if not motherboards:
-            logger.info("No new motherboards to process")
+    def flush_writes(self):
+        """Write the buffer back; if the batch fails, retry its writes one by one to isolate the bad ones"""
+        writes, self.write_buffer = self.write_buffer, []
+        failures, self.job_failures = self.job_failures, []
+        if not writes and not failures:
             return
+        try:
+            self.write_batch(writes, failures)
+            errors = [None] * len(writes)
+        except Exception as e:
+            self.conn.rollback()
+            logger.warning(f"Batched write of {len(writes)} results failed ({e}), writing them one by one")
+            errors = [self.write_one(write) for write in writes]
+            failures += [(write.category.table, row_id, write.prompt_hash, error)
+                         for write, error in zip(writes, errors) if error and write.rows for row_id in write.ids]
+            try:
+                self.record_jobs([], failures)
+                self.conn.commit()
+            except Exception as e:
+                self.conn.rollback()
+                logger.error(f"Error recording {len(failures)} failed jobs: {e}")
 
-        total = len(motherboards)
-        logger.info(f"Processing {total} motherboards...")
+        saved: Dict[EnrichmentCategory, int] = {}
+        for write, error in zip(writes, errors):
+            self.stats.record(write.category.table, write.rows, error is None)
+            if error is None and write.rows:
+                saved[write.category] = saved.get(write.category, 0) + write.rows
+        for category, rows in saved.items():
+            logger.info(f"Saved {rows} {category.plural} "
+                        f"({self.stats.done[category.table]}/{self.stats.queued[category.table]})")
 
-        for i, mobo in enumerate(motherboards, 1):
-            prompt = f"""
-            Based on these motherboard specifications:
-            Name: {mobo['name']}
-            Socket: {mobo['socket']}
-            Form Factor: {mobo['form_factor']}
-            Max Memory: {mobo['max_memory']}
-            Memory Slots: {mobo['memory_slots']}
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "memory_type": "The memory type (DDR4/DDR5)",
-                "supported_memory_speeds": [list_of_supported_speeds_in_mhz],
-                "chipset": "actual_chipset_model",
-                "pcie_version": "pcie_version_number",
-                "max_pcie_lanes": number_of_lanes,
-                "m2_slots": number_of_m2_slots,
-                "sata_ports": number_of_sata_ports
-            }}
-            """
+    def save_row(self, category: EnrichmentCategory, row: Dict[str, Any], data: Optional[Dict], prompt: str):
+        if data:
+            self.save_enrichment(category, category.update_query, data, {'id': row['id']}, row['name'], prompt)
+        else:
+            self.save_failure(category, [row['id']], prompt)
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    update_query = """
-                        UPDATE motherboard 
-                        SET memory_type = %(memory_type)s,
-                            supported_memory_speeds = %(supported_memory_speeds)s,
-                            chipset = %(chipset)s,
-                            pcie_version = %(pcie_version)s,
-                            max_pcie_lanes = %(max_pcie_lanes)s,
-                            m2_slots = %(m2_slots)s,
-                            sata_ports = %(sata_ports)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = mobo['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated Motherboard {i}/{total}: {mobo['name']} (ID: {mobo['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating motherboard {mobo['name']}: {e}")
+    async def enrich_row(self, category: EnrichmentCategory, row: Dict[str, Any]):
+        prompt = category.prompt.format(**row)
+        data = await self.complete_with_retries(prompt)
+        self.save_row(category, row, data, prompt)
 
-    async def enrich_memory_data(self):
-        """Enrich memory data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('memory', 'memory_type')
-        query = self.build_select_query('memory', last_id)
-        self.cursor.execute(query)
-        memories = self.cursor.fetchall()
+    def build_batch_prompt(self, category: EnrichmentCategory, rows: List[Dict[str, Any]]) -> str:
+        """category.prompt for several rows at once, answered as a JSON array keyed by id"""
+        specs, _, skeleton = category.prompt.partition(RESPONSE_HEADER)
+        components = ''.join(f"\n            Component ID: {row['id']}{specs.format(**row).rstrip()}\n"
+                             for row in rows)
+        return BATCH_PROMPT.format(count=len(rows), components=components, skeleton=skeleton.format().strip())
 
-        if not memories:
-            logger.info("No new memory modules to process")
-            return
+    def split_batch_response(self, category: EnrichmentCategory, data: Any) -> Dict[int, Dict]:
+        """Row id -> answer for every well-formed item of a batched answer"""
+        if isinstance(data, dict):
+            if 'id' in data:
+                data = [data]
+            elif len(data) == 1 and isinstance(next(iter(data.values())), list):
+                data = next(iter(data.values()))  # {"components": [...]}
+            else:
+                data = [dict(item, id=item.get('id', key)) for key, item in data.items() if isinstance(item, dict)]
+        if not isinstance(data, list):
+            return {}
 
-        total = len(memories)
-        logger.info(f"Processing {total} memory modules...")
+        fields = set(RESPONSE_FIELD_PATTERN.findall(category.prompt.partition(RESPONSE_HEADER)[2]))
+        answers = {}
+        for item in data:
+            if not isinstance(item, dict) or not fields.issubset(item):
+                continue
+            try:
+                row_id = int(item['id'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            answers[row_id] = {field: value for field, value in item.items() if field != 'id'}
+        return answers
 
-        for i, mem in enumerate(memories, 1):
-            prompt = f"""
-            Based on these memory specifications:
-            Name: {mem['name']}
-            Speed: {mem['speed']}
-            Modules: {mem['modules']}
-            CAS Latency: {mem['cas_latency']}
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "memory_type": "actual_memory_type",
-                "voltage": voltage_in_volts,
-                "memory_format": "DIMM_or_SODIMM",
-                "ecc_support": boolean_true_or_false
-            }}
-            """
+    async def enrich_batch(self, category: EnrichmentCategory, rows: List[Dict[str, Any]], jobs: Deque[Callable]):
+        """One prompt for several rows; rows the answer misses or mangles go back on jobs as single-row prompts"""
+        prompts = {row['id']: category.prompt.format(**row) for row in rows}
+        pending = []
+        for row in rows:
+            cached = self.cache.get(OLLAMA_MODEL, SYSTEM_PROMPT, prompts[row['id']]) if self.cache else None
+            if cached is not None:
+                self.save_row(category, row, cached, prompts[row['id']])
+            else:
+                pending.append(row)
+        if not pending:
+            return
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    update_query = """
-                        UPDATE memory 
-                        SET memory_type = %(memory_type)s,
-                            voltage = %(voltage)s,
-                            memory_format = %(memory_format)s,
-                            ecc_support = %(ecc_support)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = mem['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated Memory {i}/{total}: {mem['name']} (ID: {mem['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating memory {mem['name']}: {e}")
+        data = await self.complete_with_retries(self.build_batch_prompt(category, pending), batch=True)
+        answers = self.split_batch_response(category, data) if data else {}
+        for row in pending:
+            answer = answers.get(row['id'])
+            if answer is None:
+                self.stats.requeued += 1
+                jobs.appendleft(partial(self.enrich_row, category, row))
+                continue
+            # Cached under the single-row prompt, so later runs hit it in either mode
+            if self.cache:
+                self.cache.put(OLLAMA_MODEL, SYSTEM_PROMPT, prompts[row['id']], answer)
+            self.save_row(category, row, answer, prompts[row['id']])
 
-    async def enrich_storage_data(self):
-        """Enrich storage data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('storage', 'nvme')
-        query = self.build_select_query('storage', last_id)
-        self.cursor.execute(query)
-        storages = self.cursor.fetchall()
+    async def enrich_family(self, category: EnrichmentCategory, family: str, rows: List[Dict[str, Any]]):
+        """One completion for a whole family, written to all of its rows in a single UPDATE"""
+        spec = category.family
+        prompt = spec.prompt.format(family=family, **rows[0])
+        data = await self.complete_with_retries(prompt)
+        if data:
+            self.family_answers[(category.table, family)] = (data, prompt)
+            self.save_family(category, family, rows, data, prompt)
+        else:
+            self.save_failure(category, [row['id'] for row in rows], prompt)
 
-        if not storages:
-            logger.info("No new storage devices to process")
-            return
+    def save_family(self, category: EnrichmentCategory, family: str, rows: List[Dict[str, Any]],
+                    data: Dict, prompt: str):
+        ids = [row['id'] for row in rows]
+        self.save_enrichment(category, category.family.update_query, data, {'ids': ids}, f"family {family}", prompt,
+                             rows=len(rows))
 
-        total = len(storages)
-        logger.info(f"Processing {total} storage devices...")
+    async def enrich_override(self, category: EnrichmentCategory, row: Dict[str, Any]):
+        """Per-row fields that vary within a family"""
+        spec = category.family
+        prompt = spec.override_prompt.format(**row)
+        data = await self.complete_with_retries(prompt)
+        if data:
+            self.save_enrichment(category, spec.override_query, data, {'id': row['id']}, row['name'], prompt, rows=0)
 
-        for i, storage in enumerate(storages, 1):
-            prompt = f"""
-            Based on these storage specifications:
-            Name: {storage['name']}
-            Type: {storage['type']}
-            Form Factor: {storage['form_factor']}
-            Interface: {storage['interface']}
-            Capacity: {storage['capacity']} GB
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "power_consumption": power_consumption_in_watts,
-                "nvme": is_nvme_drive_boolean,
-                "pcie_version": "pcie_version_if_nvme"
-            }}
-            """
+    def row_jobs(self, category: EnrichmentCategory, rows: List[Dict[str, Any]], jobs: Deque[Callable]) -> List[Callable]:
+        """One call per row, or per prompt_batch_size rows when batching"""
+        size = self.prompt_batch_size
+        if not size or size < 2:
+            return [partial(self.enrich_row, category, row) for row in rows]
+        return [partial(self.enrich_batch, category, rows[i:i + size], jobs) for i in range(0, len(rows), size)]
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    update_query = """
-                        UPDATE storage 
-                        SET power_consumption = %(power_consumption)s,
-                            nvme = %(nvme)s,
-                            pcie_version = %(pcie_version)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = storage['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated Storage {i}/{total}: {storage['name']} (ID: {storage['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating storage {storage['name']}: {e}")
+    def plan_jobs(self, category: EnrichmentCategory, rows: List[Dict[str, Any]], jobs: Deque[Callable]):
+        """Queue the enrichment calls for a table: one per family where possible, per row (or batch) otherwise"""
+        spec = category.family
+        if not ENRICH_BY_FAMILY or spec is None:
+            jobs.extend(self.row_jobs(category, rows, jobs))
+            return
 
-    async def enrich_case_data(self):
-        """Enrich case data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('case_enclosure', 'max_gpu_length')
-        query = self.build_select_query('case_enclosure', last_id)
-        self.cursor.execute(query)
-        cases = self.cursor.fetchall()
+        families: Dict[str, List[Dict[str, Any]]] = {}
+        singles = []
+        for row in rows:
+            family = spec.key(row)
+            if family:
+                families.setdefault(family, []).append(row)
+            else:
+                singles.append(row)
+        # Families answered in an earlier chunk of this run are written without asking again
+        answered = {family: self.family_answers[(category.table, family)] for family in families
+                    if (category.table, family) in self.family_answers}
+        logger.info(f"Grouped {len(rows) - len(singles)} {category.plural} into {len(families)} families "
+                    f"({len(answered)} answered in earlier chunks), {len(singles)} enriched individually")
 
-        if not cases:
-            logger.info("No new cases to process")
+        for family, members in families.items():
+            if family in answered:
+                self.save_family(category, family, members, *answered[family])
+            else:
+                jobs.append(partial(self.enrich_family, category, family, members))
+        jobs.extend(self.row_jobs(category, singles, jobs))
+        # The fields the family prompt leaves out (see check_family_fields)
+        if spec.override_prompt:
+            jobs.extend(partial(self.enrich_override, category, row) for members in families.values() for row in members)
+
+    async def enrich_category(self, category: EnrichmentCategory):
+        """Enrich one table chunk by chunk, so memory stays bounded by the chunk size"""
+        chunks = 0
+        for rows in self.row_chunks(category):
+            await self.enrich_rows(category, rows)
+            chunks += 1
+        if not chunks:
+            logger.info(f"No new {category.plural} to process")
             return
+        self.stats.finished[category.table] = time.perf_counter()
 
-        total = len(cases)
-        logger.info(f"Processing {total} cases...")
+    async def enrich_rows(self, category: EnrichmentCategory, rows: List[Dict[str, Any]]):
+        """Enrich rows of one table with up to category.concurrency LLM calls in flight"""
+        self.stats.queued[category.table] = self.stats.queued.get(category.table, 0) + len(rows)
+        logger.info(f"Processing {len(rows)} {category.plural}...")
 
-        for i, case in enumerate(cases, 1):
-            prompt = f"""
-            Based on these case specifications:
-            Name: {case['name']}
-            Type: {case['type']}
-            External Volume: {case['external_volume']}
-            Internal 3.5" Bays: {case['internal_35_bays']}
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "max_gpu_length": max_gpu_length_in_mm,
-                "max_gpu_height": max_gpu_height_in_mm,
-                "max_cpu_cooler_height": max_cpu_cooler_height_in_mm,
-                "supported_motherboard_sizes": ["list", "of", "supported", "sizes"],
-                "max_psu_length": max_psu_length_in_mm,
-                "radiator_support": ["list", "of", "supported", "radiator", "sizes"],
-                "included_fans": number_of_included_fans,
-                "max_fan_slots": total_number_of_fan_slots
-            }}
-            """
+        # Workers share one queue, so each job is handed out exactly once; batches push their misses to the front
+        jobs: Deque[Callable] = deque()
+        self.plan_jobs(category, rows, jobs)
 
-            data = await self.get_llm_completion(prompt)
-            if data:
+        running = 0
+
+        async def worker():
+            nonlocal running
+            while jobs or running:
+                if not jobs:
+                    # A batch still running may yet re-queue rows
+                    await asyncio.sleep(0.1)
+                    continue
+                running += 1
                 try:
-                    update_query = """
-                        UPDATE case_enclosure 
-                        SET max_gpu_length = %(max_gpu_length)s,
-                            max_gpu_height = %(max_gpu_height)s,
-                            max_cpu_cooler_height = %(max_cpu_cooler_height)s,
-                            supported_motherboard_sizes = %(supported_motherboard_sizes)s,
-                            max_psu_length = %(max_psu_length)s,
-                            radiator_support = %(radiator_support)s,
-                            included_fans = %(included_fans)s,
-                            max_fan_slots = %(max_fan_slots)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = case['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated Case {i}/{total}: {case['name']} (ID: {case['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating case {case['name']}: {e}")
+                    await jobs.popleft()()
+                finally:
+                    running -= 1
 
-    async def enrich_psu_data(self):
-        """Enrich power supply data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('power_supply', 'psu_length')
-        query = self.build_select_query('power_supply', last_id)
-        self.cursor.execute(query)
-        psus = self.cursor.fetchall()
+        await asyncio.gather(*(worker() for _ in range(min(category.concurrency, len(jobs)))))
+        self.flush_writes()
 
-        if not psus:
-            logger.info("No new power supplies to process")
-            return
+    async def enrich_cpu_data(self):
+        """Enrich CPU data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['cpu'])
 
-        total = len(psus)
-        logger.info(f"Processing {total} power supplies...")
+    async def enrich_gpu_data(self):
+        """Enrich GPU data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['gpu'])
 
-        for i, psu in enumerate(psus, 1):
-            prompt = f"""
-            Based on these power supply specifications:
-            Name: {psu['name']}
-            Type: {psu['type']}
-            Efficiency: {psu['efficiency']}
-            Wattage: {psu['wattage']}
-            Modular: {psu['modular']}
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "available_connectors": {{"cpu": number_of_cpu_connectors, "pcie": number_of_pcie_connectors, "sata": number_of_sata_connectors}},
-                "psu_length": length_in_mm,
-                "fan_size": fan_size_in_mm,
-                "protection_features": ["list", "of", "protection", "features"],
-                "atx_version": "atx_version_number"
-            }}
-            """
+    async def enrich_motherboard_data(self):
+        """Enrich motherboard data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['motherboard'])
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    # Convert the connectors dictionary to JSON string
-                    if isinstance(data.get('available_connectors'), dict):
-                        data['available_connectors'] = json.dumps(data['available_connectors'])
-
-                    update_query = """
-                        UPDATE power_supply 
-                        SET available_connectors = %(available_connectors)s::jsonb,
-                            psu_length = %(psu_length)s,
-                            fan_size = %(fan_size)s,
-                            protection_features = %(protection_features)s,
-                            atx_version = %(atx_version)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = psu['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated PSU {i}/{total}: {psu['name']} (ID: {psu['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating PSU {psu['name']}: {e}")
-                    logger.error(f"Data that caused error: {data}")  # Add this for debugging
+    async def enrich_memory_data(self):
+        """Enrich memory data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['memory'])
 
-    async def enrich_cooler_data(self):
-        """Enrich CPU cooler data using LLM"""
-        last_id = 0 if not CONTINUE_FROM_LAST else self.get_last_processed_id('cpu_cooler', 'height')
-        query = self.build_select_query('cpu_cooler', last_id)
-        self.cursor.execute(query)
-        coolers = self.cursor.fetchall()
+    async def enrich_storage_data(self):
+        """Enrich storage data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['storage'])
 
-        if not coolers:
-            logger.info("No new CPU coolers to process")
-            return
+    async def enrich_case_data(self):
+        """Enrich case data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['case'])
+
+    async def enrich_psu_data(self):
+        """Enrich power supply data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['psu'])
 
-        total = len(coolers)
-        logger.info(f"Processing {total} CPU coolers...")
+    async def enrich_cooler_data(self):
+        """Enrich CPU cooler data using LLM"""
+        await self.enrich_category(ENRICHMENT_CATEGORIES['cooler'])
 
-        for i, cooler in enumerate(coolers, 1):
-            prompt = f"""
-            Based on these CPU cooler specifications:
-            Name: {cooler['name']}
-            RPM: {cooler['rpm']}
-            Noise Level: {cooler['noise_level']}
-            Size: {cooler['size']}
-            
-            Return a JSON object with ONLY these fields and actual values (not placeholders):
-            {{
-                "supported_sockets": ["list", "of", "supported", "socket", "types"],
-                "height": height_in_mm,
-                "tdp_support": max_tdp_support_in_watts,
-                "radiator_size": "radiator_size_if_liquid_cooler",
-                "clearance_required": clearance_required_in_mm
-            }}
-            """
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(WRITE_FLUSH_INTERVAL)
+            self.flush_writes()
 
-            data = await self.get_llm_completion(prompt)
-            if data:
-                try:
-                    update_query = """
-                        UPDATE cpu_cooler 
-                        SET supported_sockets = %(supported_sockets)s,
-                            height = %(height)s,
-                            tdp_support = %(tdp_support)s,
-                            radiator_size = %(radiator_size)s,
-                            clearance_required = %(clearance_required)s
-                        WHERE id = %(id)s
-                    """
-                    data['id'] = cooler['id']
-                    self.cursor.execute(update_query, data)
-                    self.conn.commit()
-                    logger.info(f"Updated CPU Cooler {i}/{total}: {cooler['name']} (ID: {cooler['id']})")
-                except Exception as e:
-                    self.conn.rollback()
-                    logger.error(f"Error updating CPU Cooler {cooler['name']}: {e}")
-                    logger.error(f"Data that caused error: {data}")  # Add this for debugging
+    async def report_throughput(self):
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            self.stats.log()
 
     async def run_enrichment(self):
         """Run all enrichment tasks"""
         await self.connect()
+        # Also holds the outcome of streamed rows, which CONTINUE_FROM_LAST resumes from
+        self.ensure_job_table()
+        reporter = asyncio.create_task(self.report_throughput())
+        flusher = asyncio.create_task(self.flush_periodically())
         try:
             logger.info("Starting enrichment process...")
-            
-            # Process all component types
-            await self.enrich_cpu_data()
-            await self.enrich_motherboard_data()
-            await self.enrich_memory_data()
-            await self.enrich_storage_data()
-            await self.enrich_gpu_data()
-            await self.enrich_case_data()
-            await self.enrich_psu_data()
-            await self.enrich_cooler_data()
-            
+            self.stats = EnrichmentStats()
+
+            # All categories run at once; request_slots caps the total load on Ollama
+            await asyncio.gather(*(self.enrich_category(category) for category in ENRICHMENT_CATEGORIES.values()))
+
+            self.stats.log_summary()
+            if self.use_job_table:
+                self.log_job_summary()
+            peak = peak_rss_mb()
+            if peak is not None:
+                logger.info(f"Peak memory: {peak:.0f} MB")
             logger.info("Completed enrichment process")
         except Exception as e:
             logger.error(f"Error during enrichment process: {e}")
         finally:
+            reporter.cancel()
+            flusher.cancel()
+            # Whatever is still buffered has been answered; keep it
+            self.flush_writes()
             self.close()
 
-async def main():
-    # Configuration for the database connection
-    db_params = {
-        'dbname': 'pc_builder',
-        'user': 'pc_builder_admin',
-        'password': 'pc_builder',
-        'host': 'localhost',
-        'port': '5432'
-    }
+async def main(reset_jobs: bool = RESET_JOBS):
+    # Configuration for the database connection; set PGHOST, PGDATABASE, PGPASSWORD etc. to override
+    db_params = db_config('pc_builder')
 
     # Create and run the enricher
     enricher = LLMDataEnricher(db_params)
+    enricher.reset_jobs = reset_jobs
     await enricher.run_enrichment()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Enrich the component tables with an LLM")
+    parser.add_argument('--reset', action='store_true',
+                        help="Enrich done and failed rows again (enrichment_jobs); running rows are left alone")
+    asyncio.run(main(parser.parse_args().reset or RESET_JOBS))
\ No newline at end of file
@@ -5,6 +5,24 @@
 DROP TABLE IF EXISTS cpu_motherboard_compatibility;
 DROP TABLE IF EXISTS case_motherboard_compatibility;
 DROP TABLE IF EXISTS memory_motherboard_compatibility;
+DROP TABLE IF EXISTS import_fingerprints;
+DROP TABLE IF EXISTS case_fan;
+DROP TABLE IF EXISTS case_accessory;
+DROP TABLE IF EXISTS fan_controller;
+DROP TABLE IF EXISTS thermal_paste;
+DROP TABLE IF EXISTS external_storage;
+DROP TABLE IF EXISTS optical_drive;
+DROP TABLE IF EXISTS sound_card;
+DROP TABLE IF EXISTS wired_network_card;
+DROP TABLE IF EXISTS wireless_network_card;
+DROP TABLE IF EXISTS monitor;
+DROP TABLE IF EXISTS keyboard;
+DROP TABLE IF EXISTS mouse;
+DROP TABLE IF EXISTS headphones;
+DROP TABLE IF EXISTS speakers;
+DROP TABLE IF EXISTS webcam;
+DROP TABLE IF EXISTS operating_system;
+DROP TABLE IF EXISTS ups;
 DROP TABLE IF EXISTS cpu_cooler;
 DROP TABLE IF EXISTS power_supply;
 DROP TABLE IF EXISTS case_enclosure;
@@ -43,7 +61,11 @@ CREATE TABLE IF NOT EXISTS memory (
     name VARCHAR(255) NOT NULL UNIQUE,
     price DECIMAL(10,2),
     speed VARCHAR(50),
+    ddr_version INTEGER,
+    memory_speed INTEGER,
     modules VARCHAR(50),
+    module_count INTEGER,
+    module_size_gb INTEGER,
     price_per_gb DECIMAL(10,2),
     color VARCHAR(50),
     first_word_latency DECIMAL(5,2),
@@ -102,11 +124,199 @@ CREATE TABLE IF NOT EXISTS cpu_cooler (
     name VARCHAR(255) NOT NULL UNIQUE,
     price DECIMAL(10,2),
     rpm VARCHAR(100),
+    rpm_min INTEGER,
+    rpm_max INTEGER,
     noise_level VARCHAR(50),
+    noise_level_min DECIMAL(5,2),
+    noise_level_max DECIMAL(5,2),
     color VARCHAR(50),
     size DECIMAL(5,2)
 );
 
+-- Peripheral and accessory categories (see catalog_registry.py for the CSV mapping)
+CREATE TABLE IF NOT EXISTS case_fan (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    size INTEGER,
+    color VARCHAR(50),
+    rpm VARCHAR(100),
+    rpm_min INTEGER,
+    rpm_max INTEGER,
+    airflow VARCHAR(50),
+    airflow_min DECIMAL(6,2),
+    airflow_max DECIMAL(6,2),
+    noise_level VARCHAR(50),
+    noise_level_min DECIMAL(5,2),
+    noise_level_max DECIMAL(5,2),
+    pwm BOOLEAN
+);
+
+CREATE TABLE IF NOT EXISTS case_accessory (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    type VARCHAR(100),
+    form_factor DECIMAL(4,2)
+);
+
+CREATE TABLE IF NOT EXISTS fan_controller (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    channels INTEGER,
+    channel_wattage DECIMAL(6,2),
+    pwm BOOLEAN,
+    form_factor VARCHAR(50),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS thermal_paste (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    amount DECIMAL(8,2)
+);
+
+CREATE TABLE IF NOT EXISTS external_storage (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    type VARCHAR(50),
+    interface VARCHAR(255),
+    capacity DECIMAL(10,2),
+    price_per_gb DECIMAL(10,3),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS optical_drive (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    bd INTEGER,
+    dvd INTEGER,
+    cd INTEGER,
+    bd_write VARCHAR(50),
+    dvd_write VARCHAR(50),
+    cd_write VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS sound_card (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    channels DECIMAL(3,1),
+    digital_audio INTEGER,
+    snr INTEGER,
+    sample_rate DECIMAL(6,1),
+    chipset VARCHAR(100),
+    interface VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS wired_network_card (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    interface VARCHAR(100),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS wireless_network_card (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    protocol VARCHAR(50),
+    interface VARCHAR(100),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS monitor (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    screen_size DECIMAL(5,2),
+    resolution_width INTEGER,
+    resolution_height INTEGER,
+    refresh_rate INTEGER,
+    response_time DECIMAL(6,3),
+    panel_type VARCHAR(50),
+    aspect_ratio VARCHAR(20)
+);
+
+CREATE TABLE IF NOT EXISTS keyboard (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    style VARCHAR(50),
+    switches VARCHAR(100),
+    backlit VARCHAR(50),
+    tenkeyless BOOLEAN,
+    connection_type VARCHAR(100),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS mouse (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    tracking_method VARCHAR(50),
+    connection_type VARCHAR(100),
+    max_dpi INTEGER,
+    hand_orientation VARCHAR(20),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS headphones (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    type VARCHAR(50),
+    frequency_low_hz DECIMAL(8,2),
+    frequency_high_khz DECIMAL(8,2),
+    microphone BOOLEAN,
+    wireless BOOLEAN,
+    enclosure_type VARCHAR(50),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS speakers (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    configuration DECIMAL(3,1),
+    wattage DECIMAL(8,2),
+    frequency_low_hz DECIMAL(8,2),
+    frequency_high_khz DECIMAL(8,2),
+    color VARCHAR(50)
+);
+
+CREATE TABLE IF NOT EXISTS webcam (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    resolutions VARCHAR(100),
+    connection VARCHAR(100),
+    focus_type VARCHAR(50),
+    os VARCHAR(100),
+    fov DECIMAL(5,2)
+);
+
+CREATE TABLE IF NOT EXISTS operating_system (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    mode VARCHAR(20),
+    max_memory INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS ups (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255) NOT NULL UNIQUE,
+    price DECIMAL(10,2),
+    capacity_w INTEGER,
+    capacity_va INTEGER
+);
+
 -- Compatibility tables
 CREATE TABLE IF NOT EXISTS cpu_motherboard_compatibility (
     id SERIAL PRIMARY KEY,
@@ -129,6 +339,14 @@ CREATE TABLE IF NOT EXISTS memory_motherboard_compatibility (
     UNIQUE(memory_id, motherboard_id)
 );
 
+-- Content hash per imported row, used by the delta import mode in import_data.py
+CREATE TABLE IF NOT EXISTS import_fingerprints (
+    table_name VARCHAR(100) NOT NULL,
+    name VARCHAR(255) NOT NULL,
+    row_hash CHAR(32) NOT NULL,
+    PRIMARY KEY (table_name, name)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_cpu_name ON cpu(name);
 CREATE INDEX idx_motherboard_name ON motherboard(name);
@@ -0,0 +1,171 @@
+// src/lib/priceIndex.ts
+import type { Pool } from "pg";
+
+// The parts API side of src/recommendation/price_index.py: one category's priced,
+// scored parts sorted by price_num, with a sparse table of range maxima over their
+// scores and the running maximum score. "Best part priced from low to high", "top k
+// under a budget" and "cheapest part scoring at least s" are then a binary search on
+// the prices plus O(1) range-maximum lookups. Ties in score go to the cheaper part.
+
+export interface IndexedPart {
+  id: number;
+  name: string;
+  price: string;
+  price_num: number;
+  score: number;
+}
+
+// Rebuilt from the database at most this often; scores only change when
+// update_scores.py runs
+const PRICE_INDEX_TTL_MS = 5 * 60 * 1000;
+
+// First position in sorted whose value is >= value (or > value with after)
+function bisect(sorted: Float64Array, value: number, after = false): number {
+  let low = 0;
+  let high = sorted.length;
+  while (low < high) {
+    const middle = (low + high) >>> 1;
+    if (sorted[middle] < value || (after && sorted[middle] === value)) low = middle + 1;
+    else high = middle;
+  }
+  return low;
+}
+
+export class PriceIndex {
+  private readonly parts: IndexedPart[];
+  private readonly prices: Float64Array;
+  private readonly scores: Float64Array;
+  private readonly runningMax: Float64Array;
+  // sparse[k][i]: position of the best score among the 2 ** k parts from position i
+  private readonly sparse: Int32Array[];
+
+  constructor(parts: IndexedPart[]) {
+    // Price ascending; at one price the best score first
+    this.parts = [...parts].sort(
+      (a, b) => a.price_num - b.price_num || b.score - a.score || a.id - b.id
+    );
+    const n = this.parts.length;
+    this.prices = Float64Array.from(this.parts, (part) => part.price_num);
+    this.scores = Float64Array.from(this.parts, (part) => part.score);
+    this.runningMax = new Float64Array(n);
+    for (let i = 0; i < n; i++) {
+      this.runningMax[i] = i === 0 ? this.scores[0] : Math.max(this.runningMax[i - 1], this.scores[i]);
+    }
+
+    this.sparse = [Int32Array.from(this.parts, (_, i) => i)];
+    for (let width = 1; 2 * width <= n; width *= 2) {
+      const previous = this.sparse[this.sparse.length - 1];
+      const level = new Int32Array(n - 2 * width + 1);
+      for (let i = 0; i < level.length; i++) {
+        const left = previous[i];
+        const right = previous[i + width];
+        level[i] = this.scores[right] > this.scores[left] ? right : left;
+      }
+      this.sparse.push(level);
+    }
+  }
+
+  get size(): number {
+    return this.parts.length;
+  }
+
+  // Position of the best score among positions start to stop - 1 (not empty)
+  private bestPosition(start: number, stop: number): number {
+    const level = 31 - Math.clz32(stop - start);
+    const left = this.sparse[level][start];
+    const right = this.sparse[level][stop - (1 << level)];
+    return this.scores[right] > this.scores[left] ? right : left;
+  }
+
+  bestInRange(low: number, high: number): IndexedPart | null {
+    return this.topInRange(low, high, 1)[0] ?? null;
+  }
+
+  // The k best parts priced from low to high, best first
+  topInRange(low: number, high: number, k: number): IndexedPart[] {
+    // Max-heap of ranges keyed by their best part; taking a part splits its range in two
+    const heap: { best: number; start: number; stop: number }[] = [];
+    const before = (a: number, b: number) =>
+      this.scores[heap[a].best] > this.scores[heap[b].best] ||
+      (this.scores[heap[a].best] === this.scores[heap[b].best] && heap[a].best < heap[b].best);
+    const swap = (a: number, b: number) => ([heap[a], heap[b]] = [heap[b], heap[a]]);
+
+    const push = (start: number, stop: number) => {
+      if (start >= stop) return;
+      heap.push({ best: this.bestPosition(start, stop), start, stop });
+      for (let i = heap.length - 1; i > 0 && before(i, (i - 1) >> 1); i = (i - 1) >> 1) {
+        swap(i, (i - 1) >> 1);
+      }
+    };
+    const pop = () => {
+      const top = heap[0];
+      const last = heap.pop()!;
+      if (heap.length > 0) {
+        heap[0] = last;
+        for (let i = 0; ; ) {
+          let first = i;
+          for (const child of [2 * i + 1, 2 * i + 2]) {
+            if (child < heap.length && before(child, first)) first = child;
+          }
+          if (first === i) break;
+          swap(i, first);
+          i = first;
+        }
+      }
+      return top;
+    };
+
+    push(bisect(this.prices, low), bisect(this.prices, high, true));
+    const top: IndexedPart[] = [];
+    while (heap.length > 0 && top.length < k) {
+      const { best, start, stop } = pop();
+      top.push(this.parts[best]);
+      push(start, best);
+      push(best + 1, stop);
+    }
+    return top;
+  }
+
+  topUnder(budget: number, k: number): IndexedPart[] {
+    return this.topInRange(-Infinity, budget, k);
+  }
+
+  // The cheapest part scoring at least score
+  cheapestWithScore(score: number): IndexedPart | null {
+    // The running maximum first reaches score at the first part that does
+    const position = bisect(this.runningMax, score);
+    return position < this.size ? this.parts[position] : null;
+  }
+}
+
+const indexes = new Map<string, { index: Promise<PriceIndex>; loadedAt: number }>();
+
+// The price index of a scored table, built on first use and kept for PRICE_INDEX_TTL_MS
+export function getPriceIndex(pool: Pool, table: string): Promise<PriceIndex> {
+  const cached = indexes.get(table);
+  if (cached && Date.now() - cached.loadedAt < PRICE_INDEX_TTL_MS) return cached.index;
+
+  const index = pool
+    .query(
+      `SELECT id, name, price, price_num, score FROM ${table}
+       WHERE price_num IS NOT NULL AND score IS NOT NULL`
+    )
+    .then(
+      (result) =>
+        new PriceIndex(
+          result.rows.map((row) => ({
+            id: Number(row.id),
+            name: row.name,
+            price: row.price,
+            price_num: Number(row.price_num),
+            score: Number(row.score),
+          }))
+        )
+    );
+  // Concurrent requests share one load; a failed load is retried by the next request
+  indexes.set(table, { index, loadedAt: Date.now() });
+  index.catch(() => {
+    if (indexes.get(table)?.index === index) indexes.delete(table);
+  });
+  return index;
+}
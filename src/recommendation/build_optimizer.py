@@ -0,0 +1,509 @@
+"""
+Budget-constrained build optimizer over the component scores.
+
+BuildOptimizer picks one CPU, motherboard, memory kit, cooler, GPU, case and PSU that
+maximize a priority-weighted sum of their score columns (written by update_scores.py),
+subject to the budget and the compatibility rules of db/new_compatibility.sql. The PSU
+has to cover the CPU and GPU TDP with 50% headroom, as in the parts API.
+
+The search is a depth-first branch-and-bound. When the catalog is loaded, every part
+that costs more than a compatible alternative without scoring higher is dropped (the
+Pareto frontiers of pareto.py, which can also be saved and loaded instead). During
+the search, candidates are tried best first, and a branch is cut as soon as the best
+score the remaining slots could add within the remaining budget cannot lift it into the
+top K builds found so far.
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from catalog_snapshot import load_snapshot, read_manifest, snapshot_rows
+from compatibility_index import (PCIE_WIDTHS, PSU_CLASS_TYPES, case_max_gpu_mm, gpu_fits_pcie, gpu_length_mm,
+                                 memory_generation, motherboard_pcie_width, psu_class, ram_fits_speed)
+from pareto import CategoryFrontier, load_frontiers, save_frontiers, undominated
+from update_scores import DB_CONFIG, get_pool
+
+# Slot -> table, in the order the search fills them. Each slot's choices depend only on
+# earlier slots; memory and cooler constrain nothing after them, so they come last.
+SLOT_TABLES = {
+    'cpu': 'cpu_specs',
+    'motherboard': 'motherboard_specs',
+    'gpu': 'gpu_specs',
+    'case': 'case_specs',
+    'psu': 'psu_specs',
+    'memory': 'memory_specs',
+    'cooler': 'cooler_specs',
+}
+SEARCH_ORDER = list(SLOT_TABLES)
+CPU, MOTHERBOARD, GPU, CASE = (SEARCH_ORDER.index(slot) for slot in ('cpu', 'motherboard', 'gpu', 'case'))
+
+# Columns the compatibility rules read, besides id, name, price_num and score
+SPEC_COLUMNS = {
+    'cpu': ['manufacturer', 'socket', 'tdp'],
+    'motherboard': ['socket_cpu', 'form_factor', 'pci_slots', 'memory_type', 'memory_speed'],
+    'memory': ['speed'],
+    'cooler': ['cpu_socket'],
+    'gpu': ['chipset', 'interface', 'length', 'tdp'],
+    'case': ['type', 'motherboard_form_factor', 'maximum_video_card_length'],
+    'psu': ['type', 'wattage'],
+}
+
+# How much each point of use-case intensity adds to a slot's weight
+USE_CASE_WEIGHTS = {
+    'gaming': {'gpu': 1.0, 'cpu': 0.5},
+    'video_editing': {'cpu': 0.75, 'memory': 0.75, 'gpu': 0.5},
+    '3d_rendering': {'gpu': 1.0, 'cpu': 0.75, 'memory': 0.5},
+    'programming': {'cpu': 0.75, 'memory': 0.5},
+    'office': {},
+    'streaming': {'cpu': 0.75, 'gpu': 0.5},
+}
+
+CPU_PLATFORMS = ('AMD', 'Intel')
+GRAPHICS_CHIPSETS = {
+    'NVIDIA': ('GeForce', 'Quadro', 'TITAN', 'RTX', 'GTX'),
+    'AMD': ('Radeon', 'FirePro'),
+    'Intel': ('Arc',),
+}
+PSU_HEADROOM = 1.5
+# Bands the search bounds round GPU lengths (mm) and PSU wattages into
+GPU_LENGTH_BAND = 20
+WATTAGE_BAND = 100
+
+
+@dataclass
+class Part:
+    """A catalog row with the attributes the compatibility rules read, parsed once"""
+    slot: str
+    id: int
+    name: str
+    price: float
+    score: int
+    specs: Dict[str, Any]
+
+
+@dataclass
+class BuildRequirements:
+    """The requirements from recommendation_system_info.txt that the optimizer uses"""
+    budget: float  # In the catalog's price units
+    cpu_priority: int = 5
+    gpu_priority: int = 5
+    ram_priority: int = 5
+    use_cases: Dict[str, int] = field(default_factory=dict)  # Use case -> intensity 1-10
+    platform: Optional[str] = None  # 'AMD' or 'Intel'
+    graphics: Optional[str] = None  # 'NVIDIA', 'AMD' or 'Intel'
+
+    def weights(self) -> Dict[str, float]:
+        """Weight of each slot's score: 1, plus its priority, plus what the use cases add"""
+        weights = {slot: 1.0 for slot in SEARCH_ORDER}
+        weights['cpu'] += self.cpu_priority
+        weights['gpu'] += self.gpu_priority
+        weights['memory'] += self.ram_priority
+        for use_case, intensity in self.use_cases.items():
+            if use_case not in USE_CASE_WEIGHTS:
+                raise ValueError(f"Unknown use case: {use_case}")
+            for slot, factor in USE_CASE_WEIGHTS[use_case].items():
+                weights[slot] += factor * intensity
+        return weights
+
+    def allows(self, part: Part) -> bool:
+        if part.slot == 'cpu' and self.platform:
+            return part.specs['brand'] == self.platform
+        if part.slot == 'gpu' and self.graphics:
+            return part.specs['brand'] == self.graphics
+        return True
+
+
+# ========== PARSING ==========
+
+def tdp_watts(tdp: Optional[str]) -> int:
+    """First number in a TDP, 0 if there is none (the parts API's rule)"""
+    match = re.search(r'\d+', tdp) if tdp else None
+    return int(match.group()) if match else 0
+
+
+def _brand(text: Optional[str], brands: Dict[str, Tuple[str, ...]]) -> Optional[str]:
+    for brand, markers in brands.items():
+        if text and any(marker in text for marker in markers):
+            return brand
+    return None
+
+
+def parse_specs(slot: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The attributes of a row the compatibility rules read. None for a part no build can
+    use, e.g. a GPU whose length get_compatible_case cannot read.
+    """
+    if slot == 'cpu':
+        if row['socket'] is None:
+            return None
+        brand = _brand(row['manufacturer'] or row['name'], {platform: (platform,) for platform in CPU_PLATFORMS})
+        return {'brand': brand, 'socket': row['socket'], 'tdp': tdp_watts(row['tdp'])}
+
+    if slot == 'motherboard':
+        if row['socket_cpu'] is None or row['memory_type'] not in ('DDR4', 'DDR5') or row['memory_speed'] is None:
+            return None
+        return {'socket': row['socket_cpu'], 'form_factor': row['form_factor'],
+                'pcie_width': motherboard_pcie_width(row['pci_slots']),
+                'memory_type': row['memory_type'], 'memory_speed': row['memory_speed']}
+
+    if slot == 'memory':
+        generation = memory_generation(row['speed'])
+        return {'generation': generation, 'speed': row['speed']} if generation else None
+
+    if slot == 'cooler':
+        return {'sockets': frozenset(row['cpu_socket'].split('\n'))} if row['cpu_socket'] is not None else None
+
+    if slot == 'gpu':
+        length = gpu_length_mm(row['length'])
+        if length is None:
+            return None
+        return {'brand': _brand(row['chipset'] or row['name'], GRAPHICS_CHIPSETS),
+                'pcie_widths': frozenset(w for w in PCIE_WIDTHS if gpu_fits_pcie(row['interface'], w)),
+                'length_mm': length, 'tdp': tdp_watts(row['tdp'])}
+
+    if slot == 'case':
+        max_gpu = case_max_gpu_mm(row['maximum_video_card_length'])
+        if max_gpu is None or row['motherboard_form_factor'] is None:
+            return None
+        return {'psu_class': psu_class(row['type']), 'max_gpu_mm': max_gpu,
+                'form_factors': frozenset(row['motherboard_form_factor'].split('\n'))}
+
+    if row['wattage'] is None or not any(row['type'] in types for types in PSU_CLASS_TYPES.values()):
+        return None
+    return {'type': row['type'], 'wattage': row['wattage']}
+
+
+# ========== SEARCH ==========
+#
+# The parts chosen so far narrow each later slot to a group of candidates, named by a key:
+# the CPU socket for motherboards and coolers, the motherboard's memory spec for memory,
+# and so on. None means nothing is decided yet.
+
+def group_key(slot: str, build: List[Part], exact: bool = True) -> Any:
+    """
+    What the parts chosen so far (in SEARCH_ORDER) decide about a slot's candidates. For
+    bounds (exact=False) the GPU length and PSU wattage limits are rounded down into bands:
+    looser groups, but far fewer of them.
+    """
+    chosen = len(build)
+    if slot in ('motherboard', 'cooler'):
+        return build[CPU].specs['socket'] if chosen > CPU else None
+    if slot == 'memory':
+        return (build[MOTHERBOARD].specs['memory_type'], build[MOTHERBOARD].specs['memory_speed']) \
+            if chosen > MOTHERBOARD else None
+    if slot == 'gpu':
+        return build[MOTHERBOARD].specs['pcie_width'] if chosen > MOTHERBOARD else None
+    if slot == 'case':
+        if chosen <= MOTHERBOARD:
+            return None
+        length = build[GPU].specs['length_mm'] if chosen > GPU else 0
+        return build[MOTHERBOARD].specs['form_factor'], length if exact else length // GPU_LENGTH_BAND * GPU_LENGTH_BAND
+    if slot == 'psu':
+        if chosen <= GPU:
+            return None
+        required = math.ceil((build[CPU].specs['tdp'] + build[GPU].specs['tdp']) * PSU_HEADROOM)
+        # The PSU class is known once the case is
+        psu_class_name = build[CASE].specs['psu_class'] if chosen > CASE else None
+        return psu_class_name, required if exact else required // WATTAGE_BAND * WATTAGE_BAND
+    return None
+
+
+# Slot -> the attributes of a chosen part that group_key reads for the later slots; parts
+# that agree on them leave the later slots the same groups
+KEY_ATTRIBUTES: Dict[str, Tuple[str, ...]] = {
+    'cpu': ('socket', 'tdp'),
+    'motherboard': ('memory_type', 'memory_speed', 'pcie_width', 'form_factor'),
+    'gpu': ('length_mm', 'tdp'),
+    'case': ('psu_class',),
+    'psu': (),
+    'memory': (),
+    'cooler': (),
+}
+
+# Slot -> whether a part's specs fit the group a (non-None) key names
+GROUP_FITS: Dict[str, Callable[[Dict[str, Any], Any], bool]] = {
+    'motherboard': lambda s, socket: s['socket'] == socket,
+    'cooler': lambda s, socket: socket in s['sockets'],
+    'memory': lambda s, key: s['generation'] == key[0] and ram_fits_speed(s['speed'], key[1]),
+    'gpu': lambda s, width: width in s['pcie_widths'],
+    'case': lambda s, key: key[0] in s['form_factors'] and s['max_gpu_mm'] >= key[1],
+    'psu': lambda s, key: (key[0] is None or s['type'] in PSU_CLASS_TYPES[key[0]]) and s['wattage'] >= key[1],
+}
+
+
+class BuildOptimizer:
+    """The undominated parts of each slot, searched per set of requirements"""
+    def __init__(self, parts: Dict[str, List[Part]], catalog: Optional[Dict[str, str]] = None):
+        self.catalog_size = sum(len(slot_parts) for slot_parts in parts.values())
+        self.parts = {slot: undominated(parts.get(slot, [])) for slot in SEARCH_ORDER}
+        # Slot -> stamp of the catalog its parts were read from: the snapshot version, or the
+        # database and a fingerprint of the rows read (see table_fingerprint)
+        self.catalog = catalog or {}
+
+    @staticmethod
+    def check_frontiers(frontiers: Dict[str, CategoryFrontier], catalog: Dict[str, str]):
+        """Refuse frontiers that lack a slot or were saved from another catalog"""
+        for slot in SLOT_TABLES:
+            if slot not in frontiers:
+                raise ValueError(f"The frontiers have no {slot} slot")
+            if frontiers[slot].catalog != catalog[slot]:
+                raise ValueError(f"The {slot} frontier was saved from {frontiers[slot].catalog}, "
+                                 f"not {catalog[slot]}; save the frontiers again")
+
+    @staticmethod
+    def parse_rows(slot: str, rows: Iterable[Dict[str, Any]]) -> List[Part]:
+        parts = []
+        for row in rows:
+            specs = parse_specs(slot, row)
+            if specs is not None:
+                parts.append(Part(slot, row['id'], row['name'], float(row['price_num']), row['score'], specs))
+        return parts
+
+    @staticmethod
+    def table_fingerprint(cursor, slot: str) -> str:
+        """
+        Row count, largest id and an md5 over every column load reads of a slot's priced,
+        scored rows: any re-import, price, score or spec change alters it. Computed in the
+        database, it takes a fraction of the time of reading the rows.
+        """
+        columns = ['id', 'name', 'price_num', 'score'] + SPEC_COLUMNS[slot]
+        cursor.execute(f"""
+            SELECT count(*), max(id), md5(string_agg(row({', '.join(columns)})::text, ',' ORDER BY id))
+            FROM {SLOT_TABLES[slot]} WHERE price_num IS NOT NULL AND score IS NOT NULL
+        """)
+        rows, max_id, digest = cursor.fetchone()
+        return f"{rows} rows up to id {max_id}, md5 {digest}"
+
+    @classmethod
+    def load(cls, conn, frontiers: Optional[Dict[str, CategoryFrontier]] = None) -> 'BuildOptimizer':
+        """
+        Read the priced, scored rows of every slot's table, or only the rows on the given
+        frontiers (see pareto.py), which must have been saved from the same rows of this
+        database
+        """
+        parts = {}
+        with conn.cursor() as cursor:
+            catalog = {slot: f"database {conn.info.dbname}, {cls.table_fingerprint(cursor, slot)}"
+                       for slot in SLOT_TABLES}
+            if frontiers is not None:
+                cls.check_frontiers(frontiers, catalog)
+            for slot, table in SLOT_TABLES.items():
+                columns = ['id', 'name', 'price_num', 'score'] + SPEC_COLUMNS[slot]
+                query = f"SELECT {', '.join(columns)} FROM {table} WHERE price_num IS NOT NULL AND score IS NOT NULL"
+                if frontiers is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query + " AND id = ANY(%s)", (frontiers[slot].ids.tolist(),))
+                parts[slot] = cls.parse_rows(slot, (dict(zip(columns, values)) for values in cursor.fetchall()))
+        return cls(parts, catalog)
+
+    @classmethod
+    def load_snapshot(cls, path: str, frontiers: Optional[Dict[str, CategoryFrontier]] = None) -> 'BuildOptimizer':
+        """The same as load, from a catalog snapshot (see catalog_snapshot.py) instead of the database"""
+        catalog = {slot: f"snapshot {read_manifest(path)['version']}" for slot in SLOT_TABLES}
+        if frontiers is not None:
+            cls.check_frontiers(frontiers, catalog)
+        tables = load_snapshot(path, list(SLOT_TABLES.values()))
+        parts = {}
+        for slot, table in SLOT_TABLES.items():
+            rows = snapshot_rows(tables[table], ['id', 'name', 'price_num', 'score'] + SPEC_COLUMNS[slot],
+                                 not_null=['price_num', 'score'], ids=frontiers[slot].ids if frontiers else None)
+            parts[slot] = cls.parse_rows(slot, rows)
+        return cls(parts, catalog)
+
+    def frontiers(self) -> Dict[str, CategoryFrontier]:
+        frontiers = {slot: CategoryFrontier.from_parts(parts) for slot, parts in self.parts.items()}
+        for slot, frontier in frontiers.items():
+            frontier.catalog = self.catalog.get(slot, '')
+        return frontiers
+
+    def optimize(self, requirements: BuildRequirements, top_k: int = 5) -> List[Dict[str, Any]]:
+        """The top_k builds by weighted score, best first; fewer if the budget allows fewer"""
+        budget = requirements.budget
+        weights = requirements.weights()
+
+        # (weighted score, part) per slot, best first
+        candidates = {
+            slot: sorted(((weights[slot] * part.score, part) for part in parts
+                          if part.price <= budget and requirements.allows(part)),
+                         key=lambda candidate: (-candidate[0], candidate[1].price))
+            for slot, parts in self.parts.items()
+        }
+        if not all(candidates.values()):
+            return []
+
+        groups: Dict[Tuple[str, Any], List[Tuple[float, Part]]] = {}
+
+        def members(slot: str, key: Any) -> List[Tuple[float, Part]]:
+            """A slot's candidates in the group a key names, best first"""
+            if (slot, key) not in groups:
+                groups[slot, key] = (candidates[slot] if key is None else
+                                     [c for c in candidates[slot] if GROUP_FITS[slot](c[1].specs, key)])
+            return groups[slot, key]
+
+        def frontier(prices: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            """
+            The affordable (price, value) points that no cheaper point matches, by price. Values
+            rise strictly, so the last point within some money is the best it buys; of points
+            with the same price a worse one may be kept too, which costs a lookup nothing.
+            """
+            affordable = prices <= budget
+            prices, values = prices[affordable], values[affordable]
+            # A plain sort by price is several times faster than ordering ties by value as well
+            order = prices.argsort()
+            prices, values = prices[order], values[order]
+            improves = np.ones(len(values), dtype=bool)
+            improves[1:] = values[1:] > np.maximum.accumulate(values)[:-1]
+            return prices[improves], values[improves]
+
+        group_frontiers: Dict[Tuple[str, Any], Tuple[np.ndarray, np.ndarray]] = {}
+
+        def group_frontier(slot: str, key: Any) -> Tuple[np.ndarray, np.ndarray]:
+            if (slot, key) not in group_frontiers:
+                group = members(slot, key)
+                group_frontiers[slot, key] = frontier(np.array([part.price for _, part in group]),
+                                                      np.array([value for value, _ in group]))
+            return group_frontiers[slot, key]
+
+        # Frontiers of one part from each of the slots from some depth on, keyed by their groups.
+        # Compatibility between those slots is ignored, so they bound what the slots can add.
+        tails: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {(): (np.zeros(1), np.zeros(1))}
+
+        def tail(slots: List[str], keys: Tuple) -> Tuple[np.ndarray, np.ndarray]:
+            if keys not in tails:
+                rest_prices, rest_values = tail(slots[1:], keys[1:])
+                prices, values = group_frontier(slots[0], keys[0])
+                tails[keys] = frontier((prices[:, None] + rest_prices).ravel(),
+                                       (values[:, None] + rest_values).ravel())
+            return tails[keys]
+
+        # The same tails as Python lists: bisect on a short list is far cheaper than a NumPy call
+        tail_lists: Dict[Tuple, Tuple[List[float], List[float]]] = {}
+
+        def bound_keys(depth: int, build: List[Part]) -> Tuple:
+            return tuple(group_key(slot, build, exact=False) for slot in SEARCH_ORDER[depth:])
+
+        def bound(depth: int, money: float, keys: Tuple) -> float:
+            """Most the slots from depth on (in the groups keys name) can add with money left; -inf if they cannot all be bought"""
+            if keys not in tail_lists:
+                prices, values = tail(SEARCH_ORDER[depth:], keys)
+                tail_lists[keys] = prices.tolist(), values.tolist()
+            prices, values = tail_lists[keys]
+            i = bisect.bisect_right(prices, money)
+            return values[i - 1] if i else -math.inf
+
+        # Min-heap of the best builds so far: (weighted score, tie breaker, parts)
+        best: List[Tuple[float, int, Tuple[Part, ...]]] = []
+        counter = itertools.count()
+
+        def record(value: float, build: List[Part]):
+            entry = (value, next(counter), tuple(build))
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            else:
+                heapq.heappushpop(best, entry)
+
+        def search(depth: int, value: float, spent: float, build: List[Part]):
+            slot = SEARCH_ORDER[depth]
+            last = depth + 1 == len(SEARCH_ORDER)
+            key = group_key(slot, build)
+            prices, _ = group_frontier(slot, key)
+            left = budget - spent
+            # The most any choice here can be followed by; choices come best first, so once
+            # even that cannot reach the top K, neither can anything after
+            ceiling = bound(depth + 1, left - prices[0], bound_keys(depth + 1, build)) if len(prices) else -math.inf
+            # Bound keys of the later slots by the chosen part's KEY_ATTRIBUTES
+            attribute_names = KEY_ATTRIBUTES[slot]
+            child_keys: Dict[Tuple, Tuple] = {}
+            for choice_value, part in members(slot, key):
+                floor = best[0][0] if len(best) == top_k else -math.inf
+                if value + choice_value + ceiling <= floor:
+                    break
+                if part.price > left:
+                    continue
+                build.append(part)
+                if last:
+                    # Nothing follows the last slot, so an affordable choice here completes a build
+                    record(value + choice_value, build)
+                else:
+                    # Once the part is chosen, the slots it decides are bounded by their compatible groups
+                    attributes = tuple([part.specs[name] for name in attribute_names])
+                    if attributes not in child_keys:
+                        child_keys[attributes] = bound_keys(depth + 1, build)
+                    if value + choice_value + bound(depth + 1, left - part.price, child_keys[attributes]) > floor:
+                        search(depth + 1, value + choice_value, spent + part.price, build)
+                build.pop()
+
+        search(0, 0.0, 0.0, [])
+        return [
+            {
+                'weighted_score': round(value, 2),
+                'price': round(sum(part.price for part in build), 2),
+                'parts': {part.slot: {'id': part.id, 'name': part.name, 'price': part.price, 'score': part.score}
+                          for part in build},
+            }
+            for value, _, build in sorted(best, reverse=True)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the best-scoring compatible builds within a budget")
+    parser.add_argument('--budget', type=float, required=True)
+    parser.add_argument('--top-k', type=int, default=5)
+    parser.add_argument('--priorities', type=int, nargs=3, default=[5, 5, 5], metavar=('CPU', 'GPU', 'RAM'))
+    parser.add_argument('--use-case', action='append', default=[], metavar='NAME=INTENSITY',
+                        help=f"One of {', '.join(USE_CASE_WEIGHTS)}; may be repeated")
+    parser.add_argument('--platform', choices=CPU_PLATFORMS)
+    parser.add_argument('--graphics', choices=list(GRAPHICS_CHIPSETS))
+    parser.add_argument('--snapshot', metavar='PATH', help="Read a catalog snapshot instead of the database")
+    parser.add_argument('--frontiers', metavar='PATH', help="Only load the parts on these saved frontiers")
+    parser.add_argument('--save-frontiers', metavar='PATH', help="Save the loaded catalog's frontiers here")
+    args = parser.parse_args()
+
+    use_cases = {}
+    for use_case in args.use_case:
+        name, _, intensity = use_case.partition('=')
+        use_cases[name] = int(intensity or 5)
+    requirements = BuildRequirements(args.budget, *args.priorities, use_cases=use_cases,
+                                     platform=args.platform, graphics=args.graphics)
+
+    conn = None
+    try:
+        start = time.perf_counter()
+        frontiers = load_frontiers(args.frontiers) if args.frontiers else None
+        if args.snapshot:
+            optimizer = BuildOptimizer.load_snapshot(args.snapshot, frontiers)
+        else:
+            conn = get_pool(DB_CONFIG).getconn()
+            optimizer = BuildOptimizer.load(conn, frontiers)
+        kept = sum(len(parts) for parts in optimizer.parts.values())
+        print(f"Loaded {optimizer.catalog_size} parts in {time.perf_counter() - start:.2f}s, "
+              f"{kept} left after dominance pruning")
+        if args.save_frontiers:
+            save_frontiers(optimizer.frontiers(), args.save_frontiers)
+            print(f"Saved frontiers to {args.save_frontiers}")
+
+        start = time.perf_counter()
+        builds = optimizer.optimize(requirements, args.top_k)
+        print(f"Found {len(builds)} builds in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(json.dumps(builds, indent=2))
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        if conn:
+            get_pool(DB_CONFIG).putconn(conn)
+
+
+if __name__ == "__main__":
+    main()
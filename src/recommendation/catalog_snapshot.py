@@ -0,0 +1,241 @@
+"""
+Versioned columnar snapshots of the *_specs tables.
+
+export_snapshot() copies every table out of PostgreSQL with COPY and writes it as an
+uncompressed Arrow IPC file, next to a manifest.json recording the row counts, schemas
+and checksums. load_snapshot() memory-maps those files, so opening a snapshot takes
+milliseconds whatever its size, and processes that open the same snapshot share its
+pages instead of each holding a copy:
+
+    python catalog_snapshot.py export               # writes snapshots/<version>/
+    python catalog_snapshot.py info                 # the latest snapshot's manifest
+    python build_optimizer.py --budget 1500 --snapshot snapshots/latest
+
+Snapshots are immutable; each export is a new version and snapshots/LATEST names the
+newest. The snapshots directory is not tracked by git. pyarrow is an optional dependency
+(requirements-snapshots.txt), only needed by this module and the tools reading snapshots.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from update_scores import BULK_DB_CONFIG, DB_CONFIG, get_pool
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+SPEC_TABLES = ['cpu_specs', 'gpu_specs', 'memory_specs', 'ssd_specs', 'motherboard_specs', 'psu_specs',
+               'cooler_specs', 'case_specs']
+SNAPSHOT_DIR = Path(__file__).parent / 'snapshots'
+MANIFEST_NAME = 'manifest.json'
+LATEST_NAME = 'LATEST'
+FORMAT_VERSION = 1
+
+# PostgreSQL type oid -> Arrow type name. numeric becomes float64, as in pd.read_sql_query;
+# everything not listed (text, ...) is kept as a string.
+PG_ARROW_TYPES = {
+    16: 'bool_',
+    20: 'int64',
+    21: 'int16',
+    23: 'int32',
+    700: 'float32',
+    701: 'float64',
+    1700: 'float64',
+}
+
+# json and jsonb are stored as their text and marked in the field metadata, to be decoded on load
+JSON_TYPES = {114, 3802}
+
+SnapshotPath = Union[str, Path]
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Catalog snapshots need pyarrow (see requirements-snapshots.txt): pip install pyarrow")
+
+
+def table_schema(cursor, table: str) -> 'pa.Schema':
+    """Arrow schema of a table, from the types PostgreSQL reports for its columns"""
+    cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+    return pa.schema([pa.field(column.name, getattr(pa, PG_ARROW_TYPES.get(column.type_code, 'string'))(),
+                               metadata={'json': 'true'} if column.type_code in JSON_TYPES else None)
+                      for column in cursor.description])
+
+
+def read_table(cursor, table: str) -> 'pa.Table':
+    """A whole table as an Arrow table, streamed out with COPY"""
+    schema = table_schema(cursor, table)
+    buffer = io.BytesIO()
+    cursor.copy_expert(f"COPY {table} TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+    buffer.seek(0)
+    # COPY writes NULL unquoted and an empty string as "", so only unquoted empties are NULL
+    return pa_csv.read_csv(
+        buffer,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(column_types=schema, include_columns=schema.names,
+                                              null_values=[''], strings_can_be_null=True,
+                                              quoted_strings_can_be_null=False, true_values=['t'],
+                                              false_values=['f']),
+    ).cast(schema)  # Puts back the field metadata
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(conn, root: SnapshotPath = SNAPSHOT_DIR, tables: Optional[List[str]] = None) -> Path:
+    """Write every table to a new snapshot version under root and return its directory"""
+    _require_pyarrow()
+    root = Path(root)
+    created = datetime.now(timezone.utc)
+    version = created.strftime('%Y%m%dT%H%M%S%fZ')
+    directory = root / version
+    directory.mkdir(parents=True)
+
+    manifest = {'format': FORMAT_VERSION, 'version': version, 'created_at': created.isoformat(),
+                'database': DB_CONFIG.get('dbname'), 'tables': {}}
+    # One transaction, so every table is read from the same database state
+    with conn.cursor() as cursor:
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        for table in tables or SPEC_TABLES:
+            data = read_table(cursor, table)
+            path = directory / f'{table}.arrow'
+            with pa.OSFile(str(path), 'wb') as sink, pa.ipc.new_file(sink, data.schema) as writer:
+                writer.write_table(data)
+            manifest['tables'][table] = {
+                'file': path.name,
+                'rows': data.num_rows,
+                'columns': {field.name: str(field.type) for field in data.schema},
+                'bytes': path.stat().st_size,
+                'sha256': _sha256(path),
+            }
+    conn.rollback()
+
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    # The manifest is written last: a version directory without one is an unfinished export
+    (root / LATEST_NAME).write_text(version)
+    return directory
+
+
+def resolve_snapshot(path: SnapshotPath = SNAPSHOT_DIR) -> Path:
+    """
+    The version directory a path names: a version directory itself, a snapshot root
+    (its latest version), or <root>/latest
+    """
+    path = Path(path)
+    if path.name == 'latest' and not path.exists():
+        path = path.parent
+    if (path / LATEST_NAME).exists():
+        path = path / (path / LATEST_NAME).read_text().strip()
+    if not (path / MANIFEST_NAME).exists():
+        raise FileNotFoundError(f"No catalog snapshot at {path}")
+    return path
+
+
+def read_manifest(path: SnapshotPath = SNAPSHOT_DIR) -> Dict:
+    return json.loads((resolve_snapshot(path) / MANIFEST_NAME).read_text())
+
+
+def load_snapshot(path: SnapshotPath = SNAPSHOT_DIR, tables: Optional[List[str]] = None,
+                  verify: bool = False) -> Dict[str, 'pa.Table']:
+    """
+    Memory-map a snapshot's tables. Nothing is read until a column is used; verify checks
+    every file against its manifest checksum first, which does read them all.
+    """
+    _require_pyarrow()
+    directory = resolve_snapshot(path)
+    manifest = json.loads((directory / MANIFEST_NAME).read_text())
+    loaded = {}
+    for table in tables or list(manifest['tables']):
+        if table not in manifest['tables']:
+            raise KeyError(f"Snapshot {manifest['version']} has no table {table}")
+        entry = manifest['tables'][table]
+        file_path = directory / entry['file']
+        if verify and _sha256(file_path) != entry['sha256']:
+            raise ValueError(f"{file_path} does not match its manifest checksum")
+        data = pa.ipc.open_file(pa.memory_map(str(file_path), 'r')).read_all()
+        if data.num_rows != entry['rows']:
+            raise ValueError(f"{file_path} has {data.num_rows} rows, its manifest {entry['rows']}")
+        loaded[table] = data
+    return loaded
+
+
+def load_snapshot_frames(path: SnapshotPath = SNAPSHOT_DIR, tables: Optional[List[str]] = None):
+    """A snapshot's tables as pandas DataFrames, shaped like pd.read_sql_query results"""
+    frames = {}
+    for table, data in load_snapshot(path, tables).items():
+        df = data.to_pandas()
+        for field in data.schema:
+            if field.metadata and field.metadata.get(b'json'):
+                df[field.name] = df[field.name].map(json.loads, na_action='ignore').astype(object)
+        frames[table] = df
+    return frames
+
+
+def snapshot_rows(data: 'pa.Table', columns: List[str], not_null: Sequence[str] = (),
+                  ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Some columns of a snapshot table as row dicts, like a SELECT of them: only the rows
+    where the not_null columns are set and, if ids are given, whose id is one of them
+    """
+    keep = pa.array(np.ones(data.num_rows, dtype=bool))
+    for column in not_null:
+        keep = pc.and_(keep, pc.is_valid(data[column]))
+    if ids is not None:
+        keep = pc.and_(keep, pc.is_in(data['id'], value_set=pa.array(ids, type=data.schema.field('id').type)))
+    return data.select(columns).filter(keep).to_pylist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or inspect catalog snapshots")
+    parser.add_argument('command', choices=['export', 'info', 'verify'])
+    parser.add_argument('--root', default=str(SNAPSHOT_DIR), help="Snapshot directory (default: %(default)s)")
+    parser.add_argument('--tables', nargs='+', choices=SPEC_TABLES)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        conn = None
+        try:
+            conn = get_pool(BULK_DB_CONFIG).getconn()
+            start = time.perf_counter()
+            directory = export_snapshot(conn, args.root, args.tables)
+            manifest = read_manifest(directory)
+            rows = sum(entry['rows'] for entry in manifest['tables'].values())
+            size = sum(entry['bytes'] for entry in manifest['tables'].values())
+            print(f"Exported {rows} rows ({size / 1e6:.1f} MB) to {directory} "
+                  f"in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            print(f"Error: {e}")
+        finally:
+            if conn:
+                get_pool(BULK_DB_CONFIG).putconn(conn)
+        return
+
+    start = time.perf_counter()
+    tables = load_snapshot(args.root, args.tables, verify=args.command == 'verify')
+    elapsed = time.perf_counter() - start
+    manifest = read_manifest(args.root)
+    print(f"Snapshot {manifest['version']} from {manifest['database']}, created {manifest['created_at']}")
+    for table, data in tables.items():
+        print(f"  {table}: {data.num_rows} rows, {data.num_columns} columns")
+    print(f"{'Verified and loaded' if args.command == 'verify' else 'Loaded'} in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+In-memory version of the get_compatible_* functions in db/new_compatibility.sql.
+
+CompatibilityIndex loads the *_specs tables once and builds lookup structures for
+every compatibility rule: socket -> motherboards and coolers, memory generation and
+speed -> RAM, form factor -> cases sorted by maximum GPU length, PSU class -> PSUs
+sorted by wattage. Each query is then a dictionary lookup or a binary search
+instead of a scan of the whole table.
+
+Answers match the SQL functions row for row, quirks included: the functions only
+raise for the ids they check with a plain EXISTS, so an unknown motherboard or case
+is not an error everywhere. Run this module to check parity against the database
+and compare query times.
+"""
+
+import bisect
+import random
+import re
+import time
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+
+from update_scores import DB_CONFIG, get_pool
+
+Row = Dict[str, Any]
+
+# Columns each SQL function returns, in order
+MOTHERBOARD_COLUMNS = ['id', 'name', 'price', 'form_factor', 'socket_cpu', 'memory_max', 'memory_slots',
+                       'memory_type', 'memory_speed', 'chipset', 'color', 'm2_slots', 'sata_ports']
+COOLER_COLUMNS = ['id', 'name', 'price', 'fan_rpm', 'noise_level', 'color', 'radiator_size', 'height',
+                  'cpu_socket', 'water_cooled', 'fanless']
+GPU_COLUMNS = ['id', 'name', 'price', 'chipset', 'memory', 'core_clock', 'boost_clock', 'color', 'length',
+               'tdp', 'interface']
+CASE_COLUMNS = ['id', 'name', 'price', 'type', 'color', 'power_supply', 'side_panel', 'motherboard_form_factor',
+                'maximum_video_card_length']
+PSU_COLUMNS = ['id', 'name', 'price', 'type', 'efficiency_rating', 'wattage', 'modular', 'color']
+RAM_COLUMNS = ['id', 'name', 'price', 'speed', 'modules', 'price_per_gb', 'color', 'first_word_latency',
+               'cas_latency', 'voltage', 'timing', 'ecc', 'heat_spreader']
+SSD_COLUMNS = ['id', 'name', 'price', 'capacity', 'price_per_gb', 'type', 'cache', 'form_factor', 'interface']
+
+# Table -> columns to load: the returned ones plus those the rules read
+LOAD_COLUMNS = {
+    'cpu_specs': ['id', 'socket'],
+    'motherboard_specs': MOTHERBOARD_COLUMNS + ['pci_slots'],
+    'cooler_specs': COOLER_COLUMNS,
+    'gpu_specs': GPU_COLUMNS,
+    'case_specs': CASE_COLUMNS,
+    'psu_specs': PSU_COLUMNS,
+    'memory_specs': RAM_COLUMNS,
+    'ssd_specs': SSD_COLUMNS,
+}
+
+# PCIe widths get_compatible_video_cards tells apart
+PCIE_WIDTHS = (16, 8, 4, 1)
+# PSU class of a case -> PSU types it takes
+PSU_CLASS_TYPES = {'ATX': {'ATX'}, 'SFX': {'SFX', 'Mini ITX'}, 'TFX': {'TFX', 'Flex ATX'}}
+
+# The SQL patterns; '.' also matches newlines in PostgreSQL regular expressions
+_NUMBER = re.compile(r'([0-9]+(\.[0-9]+)?)')
+_NUMBER_MM = re.compile(r'([0-9]+(\.[0-9]+)?).*mm', re.DOTALL)
+_NUMBER_IN = re.compile(r'([0-9]+(\.[0-9]+)?).*in', re.DOTALL)
+_NUMBER_INCH_MARK = re.compile(r'([0-9]+(\.[0-9]+)?).*"', re.DOTALL)
+_DDR_SPEED = re.compile(r'DDR[45]-([0-9]+)')
+MM_PER_INCH = Decimal('25.4')
+
+
+def _project(row: Row, columns: List[str]) -> Row:
+    return {column: row[column] for column in columns}
+
+
+def _lines(text: Optional[str]) -> List[str]:
+    """string_to_array(text, E'\\n'); NULL has no elements"""
+    return text.split('\n') if text is not None else []
+
+
+def _first_number(text: str) -> Decimal:
+    return Decimal(_NUMBER.search(text).group(1))
+
+
+def gpu_length_mm(length: Optional[str]) -> Optional[Decimal]:
+    """GPU length as get_compatible_case reads it; None where the function raises"""
+    if length is None or not _NUMBER.search(length):
+        return None
+    if _NUMBER_MM.search(length):
+        return _first_number(length)
+    if _NUMBER_IN.search(length):
+        return _first_number(length) * MM_PER_INCH
+    return _first_number(length)
+
+
+def case_max_gpu_mm(max_length: Optional[str]) -> Optional[Decimal]:
+    """Longest GPU a case takes as get_compatible_case reads it; None never fits"""
+    if max_length is None or not _NUMBER.search(max_length):
+        return None
+    if _NUMBER_MM.search(max_length):
+        return _first_number(max_length)
+    if _NUMBER_INCH_MARK.search(max_length):
+        return _first_number(max_length) * MM_PER_INCH
+    return _first_number(max_length)
+
+
+def motherboard_pcie_width(pci_slots: Optional[str]) -> int:
+    if pci_slots is None:
+        return 1
+    for width in PCIE_WIDTHS[:-1]:
+        if f'PCIe x{width}' in pci_slots:
+            return width
+    return 1
+
+
+def gpu_fits_pcie(interface: Optional[str], width: int) -> bool:
+    """The CASE in get_compatible_video_cards, branch by branch"""
+    if interface is None:
+        return True
+    for gpu_width in PCIE_WIDTHS[:-1]:
+        if f'PCIe x{gpu_width}' in interface and width >= gpu_width:
+            return True
+    return 'PCIe x1' in interface or interface == '' or 'PCIe' in interface
+
+
+def psu_class(case_type: Optional[str]) -> str:
+    """PSU class get_compatible_psu picks for a case type"""
+    if case_type is None:
+        return 'ATX'
+    if case_type.startswith('ATX'):
+        return 'ATX'
+    if case_type.startswith('Mini ITX'):
+        return 'SFX'
+    if case_type == 'HTPC':
+        return 'TFX'
+    return 'ATX'  # MicroATX and everything else
+
+
+def memory_generation(speed: Optional[str]) -> Optional[str]:
+    if speed is None:
+        return None
+    for generation in ('DDR5', 'DDR4'):
+        if speed.startswith(generation):
+            return generation
+    return None
+
+
+def ram_fits_speed(speed: str, mobo_speed: str) -> bool:
+    """mobo_speed LIKE '%' || speed || '%', else the same test on the DDR speed number"""
+    if speed in mobo_speed:
+        return True
+    match = _DDR_SPEED.search(speed)
+    return bool(match) and match.group(1) in mobo_speed
+
+
+class CompatibilityIndex:
+    """The catalog with one lookup structure per get_compatible_* function"""
+    def __init__(self, tables: Dict[str, List[Row]]):
+        self.cpus = {row['id']: row for row in tables['cpu_specs']}
+        self.motherboards = {row['id']: row for row in tables['motherboard_specs']}
+        self.gpus = {row['id']: row for row in tables['gpu_specs']}
+        self.cases = {row['id']: row for row in tables['case_specs']}
+
+        # Socket -> CPUs, motherboards and coolers
+        self.cpus_by_socket: Dict[str, List[int]] = {}
+        for row in tables['cpu_specs']:
+            self.cpus_by_socket.setdefault(row['socket'], []).append(row['id'])
+        self.motherboards_by_socket: Dict[str, List[Row]] = {}
+        for row in tables['motherboard_specs']:
+            self.motherboards_by_socket.setdefault(row['socket_cpu'], []).append(_project(row, MOTHERBOARD_COLUMNS))
+        self.coolers_by_socket: Dict[str, List[Row]] = {}
+        for row in tables['cooler_specs']:
+            for socket in set(_lines(row['cpu_socket'])):
+                self.coolers_by_socket.setdefault(socket, []).append(row)
+
+        # Motherboard PCIe width -> video cards
+        self.video_cards_by_width = {
+            width: [row for row in tables['gpu_specs'] if gpu_fits_pcie(row['interface'], width)]
+            for width in PCIE_WIDTHS
+        }
+
+        # Motherboard form factor -> cases sorted by the longest GPU they take, and those lengths
+        by_form_factor: Dict[str, List[Tuple[Decimal, int, Row]]] = {}
+        for row in tables['case_specs']:
+            max_gpu = case_max_gpu_mm(row['maximum_video_card_length'])
+            if max_gpu is None:
+                continue
+            for form_factor in set(_lines(row['motherboard_form_factor'])):
+                by_form_factor.setdefault(form_factor, []).append((max_gpu, row['id'], row))
+        self.cases_by_form_factor: Dict[str, Tuple[List[Decimal], List[Row]]] = {}
+        for form_factor, entries in by_form_factor.items():
+            entries.sort(key=lambda entry: entry[:2])
+            self.cases_by_form_factor[form_factor] = ([e[0] for e in entries], [e[2] for e in entries])
+
+        # PSU class -> PSUs sorted by wattage, and those wattages
+        self.psus_by_class: Dict[str, Tuple[List[int], List[Row]]] = {}
+        for name, types in PSU_CLASS_TYPES.items():
+            psus = sorted((row for row in tables['psu_specs'] if row['type'] in types and row['wattage'] is not None),
+                          key=lambda row: (row['wattage'], row['id']))
+            self.psus_by_class[name] = ([row['wattage'] for row in psus], psus)
+
+        # Memory generation -> speed text -> modules; answers are memoized per motherboard memory spec
+        self.ram_by_generation: Dict[str, Dict[str, List[Row]]] = {}
+        for row in tables['memory_specs']:
+            generation = memory_generation(row['speed'])
+            if generation:
+                self.ram_by_generation.setdefault(generation, {}).setdefault(row['speed'], []).append(row)
+        self.ram_answers: Dict[Tuple[str, str], List[Row]] = {}
+
+        # (has M.2 slots, has SATA ports) -> SSDs in price per GB order
+        ssds = sorted(tables['ssd_specs'], key=lambda row: (row['price_per_gb'] is None, row['price_per_gb'] or 0, row['id']))
+        self.ssds_by_ports = {
+            (m2, sata): [row for row in ssds
+                         if (m2 and row['form_factor'] == 'M.2-2280')
+                         or (sata and row['interface'] is not None and 'SATA' in row['interface'])]
+            for m2 in (False, True) for sata in (False, True)
+        }
+
+    @classmethod
+    def load(cls, conn) -> 'CompatibilityIndex':
+        """Read every table the compatibility functions use"""
+        tables = {}
+        # Plain tuples zipped into dicts; RealDictCursor is several times slower on whole tables
+        with conn.cursor() as cursor:
+            for table, columns in LOAD_COLUMNS.items():
+                cursor.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+                tables[table] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return cls(tables)
+
+    def compatible_cpus(self, mobo_id: int) -> List[int]:
+        """Ids of the CPUs that fit a motherboard; no SQL function does this lookup"""
+        mobo = self.motherboards.get(mobo_id)
+        if mobo is None or mobo['socket_cpu'] is None:
+            raise ValueError(f"Motherboard with ID {mobo_id} not found or socket information missing")
+        return list(self.cpus_by_socket.get(mobo['socket_cpu'], []))
+
+    def compatible_motherboards(self, cpu_id: int) -> List[Row]:
+        cpu = self.cpus.get(cpu_id)
+        if cpu is None or cpu['socket'] is None:
+            raise ValueError(f"CPU with ID {cpu_id} not found or socket information missing")
+        return list(self.motherboards_by_socket.get(cpu['socket'], []))
+
+    def compatible_cpu_coolers(self, cpu_id: int) -> List[Row]:
+        cpu = self.cpus.get(cpu_id)
+        if cpu is None or cpu['socket'] is None:
+            raise ValueError(f"CPU socket not found for ID {cpu_id}")
+        return list(self.coolers_by_socket.get(cpu['socket'], []))
+
+    def compatible_video_cards(self, mobo_id: int) -> List[Row]:
+        # An unknown motherboard reads as one without PCIe slot information, as in SQL
+        mobo = self.motherboards.get(mobo_id)
+        width = motherboard_pcie_width(mobo['pci_slots'] if mobo else None)
+        return list(self.video_cards_by_width[width])
+
+    def compatible_case(self, gpu_id: int, mobo_id: int) -> List[Row]:
+        gpu = self.gpus.get(gpu_id)
+        if gpu is None:
+            raise ValueError(f"GPU with ID {gpu_id} does not exist")
+        length = gpu_length_mm(gpu['length'])
+        if length is None:
+            raise ValueError(f"GPU length information is not available or not in expected format for GPU ID {gpu_id}")
+
+        # An unknown motherboard has no form factor and so fits no case, as in SQL
+        mobo = self.motherboards.get(mobo_id)
+        if mobo is None or mobo['form_factor'] not in self.cases_by_form_factor:
+            return []
+        lengths, cases = self.cases_by_form_factor[mobo['form_factor']]
+        return cases[bisect.bisect_left(lengths, length):]
+
+    def compatible_psu(self, required_wattage: int, case_id: int) -> List[Row]:
+        """PSUs by ascending wattage"""
+        # An unknown case gets the ATX default, as in SQL
+        case = self.cases.get(case_id)
+        wattages, psus = self.psus_by_class[psu_class(case['type'] if case else None)]
+        return psus[bisect.bisect_left(wattages, required_wattage):]
+
+    def compatible_ram(self, mobo_id: int, cpu_id: int) -> List[Row]:
+        if cpu_id not in self.cpus:
+            raise ValueError(f"CPU with ID {cpu_id} does not exist")
+        mobo = self.motherboards.get(mobo_id)
+        if mobo is None:
+            raise ValueError(f"Motherboard with ID {mobo_id} does not exist")
+
+        generation, mobo_speed = mobo['memory_type'], mobo['memory_speed']
+        if generation not in self.ram_by_generation or mobo_speed is None:
+            return []
+        key = (generation, mobo_speed)
+        if key not in self.ram_answers:
+            self.ram_answers[key] = [row for speed, rows in self.ram_by_generation[generation].items()
+                                     if ram_fits_speed(speed, mobo_speed) for row in rows]
+        return list(self.ram_answers[key])
+
+    def compatible_ssd(self, mobo_id: int) -> List[Row]:
+        """SSDs by ascending price per GB"""
+        # An unknown motherboard has neither M.2 slots nor SATA ports, as in SQL
+        mobo = self.motherboards.get(mobo_id) or {'m2_slots': None, 'sata_ports': None}
+        return list(self.ssds_by_ports[mobo['m2_slots'] is not None, mobo['sata_ports'] is not None])
+
+
+# ========== PARITY CHECK ==========
+
+# SQL function -> (index method, columns it returns, ordering column or None, argument sampler)
+def _parity_cases(index: CompatibilityIndex, rng: random.Random) -> Dict[str, Tuple[Callable, List[str], Optional[str], Callable]]:
+    def ids(table: Dict[int, Row]) -> Callable[[], int]:
+        # Include an id that does not exist now and then
+        keys = list(table)
+        return lambda: rng.choice(keys) if keys and rng.random() > 0.05 else -1
+
+    cpu, mobo, gpu, case = ids(index.cpus), ids(index.motherboards), ids(index.gpus), ids(index.cases)
+    return {
+        'get_compatible_motherboards': (index.compatible_motherboards, MOTHERBOARD_COLUMNS, None, lambda: (cpu(),)),
+        'get_compatible_cpu_coolers': (index.compatible_cpu_coolers, COOLER_COLUMNS, None, lambda: (cpu(),)),
+        'get_compatible_video_cards': (index.compatible_video_cards, GPU_COLUMNS, None, lambda: (mobo(),)),
+        'get_compatible_case': (index.compatible_case, CASE_COLUMNS, None, lambda: (gpu(), mobo())),
+        'get_compatible_psu': (index.compatible_psu, PSU_COLUMNS, 'wattage',
+                               lambda: (rng.choice([0, 300, 450, 650, 850, 1200]), case())),
+        'get_compatible_ram': (index.compatible_ram, RAM_COLUMNS, None, lambda: (mobo(), cpu())),
+        'get_compatible_ssd': (index.compatible_ssd, SSD_COLUMNS, 'price_per_gb', lambda: (mobo(),)),
+    }
+
+
+def check_parity(conn, index: CompatibilityIndex, samples: int = 50, seed: int = 0) -> List[str]:
+    """
+    Call each SQL function and its index counterpart with the same random arguments and
+    return a description of every difference. Rows are compared as sets, plus the order
+    of the sort column for the functions that sort.
+    """
+    rng = random.Random(seed)
+    mismatches = []
+    with conn.cursor() as cursor:
+        for function, (method, columns, order_by, sample) in _parity_cases(index, rng).items():
+            for _ in range(samples):
+                args = sample()
+                try:
+                    cursor.execute(f"SELECT * FROM {function}({', '.join(['%s'] * len(args))})", args)
+                    expected = cursor.fetchall()
+                except psycopg2.Error as e:
+                    conn.rollback()
+                    expected = e.diag.message_primary
+
+                try:
+                    actual = [tuple(row[column] for column in columns) for row in method(*args)]
+                except ValueError as e:
+                    actual = str(e)
+
+                if isinstance(expected, str) or isinstance(actual, str):
+                    same = expected == actual
+                else:
+                    same = sorted(expected) == sorted(actual)
+                    if same and order_by:
+                        position = columns.index(order_by)
+                        same = [row[position] for row in expected] == [row[position] for row in actual]
+                if not same:
+                    mismatches.append(f"{function}{args}: SQL gave {_describe(expected)}, index gave {_describe(actual)}")
+    return mismatches
+
+
+def _describe(result) -> str:
+    return repr(result) if isinstance(result, str) else f"{len(result)} rows"
+
+
+def main():
+    conn = None
+    try:
+        conn = get_pool(DB_CONFIG).getconn()
+        start = time.perf_counter()
+        index = CompatibilityIndex.load(conn)
+        print(f"Built compatibility index in {time.perf_counter() - start:.2f}s")
+
+        mismatches = check_parity(conn, index)
+        for mismatch in mismatches:
+            print(f"  Mismatch: {mismatch}")
+        print(f"Parity check: {len(mismatches)} mismatches")
+
+        # Average time per call, SQL function versus index
+        rng = random.Random(1)
+        with conn.cursor() as cursor:
+            for function, (method, _, _, sample) in _parity_cases(index, rng).items():
+                calls = [sample() for _ in range(200)]
+                start = time.perf_counter()
+                for args in calls:
+                    try:
+                        cursor.execute(f"SELECT * FROM {function}({', '.join(['%s'] * len(args))})", args)
+                        cursor.fetchall()
+                    except psycopg2.Error:
+                        conn.rollback()
+                sql_time = (time.perf_counter() - start) / len(calls)
+                start = time.perf_counter()
+                for args in calls:
+                    try:
+                        method(*args)
+                    except ValueError:
+                        pass
+                index_time = (time.perf_counter() - start) / len(calls)
+                print(f"  {function:<30} SQL {sql_time * 1e3:8.2f} ms   index {index_time * 1e6:8.1f} us")
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        if conn:
+            get_pool(DB_CONFIG).putconn(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+The modules of src/db_setup that the tools in this directory share: the pooled database
+layer (db_pool.py), the catalog CSV registry (catalog_registry.py) and peak memory
+reporting (memory_usage.py).
+
+This is the one place that puts src/db_setup on sys.path; import them from here rather
+than relying on another module having done it first.
+"""
+
+import sys
+from pathlib import Path
+
+DB_SETUP_DIR = str(Path(__file__).resolve().parent.parent / 'db_setup')
+if DB_SETUP_DIR not in sys.path:
+    sys.path.append(DB_SETUP_DIR)
+
+from catalog_registry import CATALOG, read_catalog_csv
+from db_pool import BULK_STATEMENT_TIMEOUT_MS, db_config, get_pool
+from memory_usage import peak_rss_mb
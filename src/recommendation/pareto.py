@@ -0,0 +1,162 @@
+"""
+Per-category Pareto frontiers on price and score, partitioned by compatibility key.
+
+Within a partition parts are interchangeable as far as every compatibility rule and
+requirement filter is concerned: same socket, memory type and speed, form factors, PSU
+class, and so on. A part is on its partition's frontier unless another part there costs
+no more, scores no less and has no worse limits (GPU length and TDP, CPU TDP, case GPU
+clearance, PSU wattage). The limits are compared exactly rather than in bands, so a part
+off the frontier can never be needed by a build.
+
+A CategoryFrontier keeps the frontier parts of one category as flat NumPy arrays, sorted
+by partition and then price, and a whole catalog's frontiers are saved to one .npz file.
+build_optimizer.py writes and reads them (--save-frontiers / --frontiers), so a search
+only has to load the parts on a frontier instead of every row of the tables. Each
+frontier records the catalog it was built from, and one built from another catalog is
+refused.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Category -> (compatibility key, limits), both read from a part's parsed specs.
+# Limits are lower-is-better, so larger-is-better ones are negated.
+DOMINANCE: Dict[str, Tuple[Callable[[Dict], Tuple], Callable[[Dict], Tuple]]] = {
+    'cpu': (lambda s: (s['brand'], s['socket']), lambda s: (s['tdp'],)),
+    'motherboard': (lambda s: (s['socket'], s['form_factor'], s['pcie_width'], s['memory_type'], s['memory_speed']),
+                    lambda s: ()),
+    'memory': (lambda s: (s['speed'],), lambda s: ()),
+    'cooler': (lambda s: (s['sockets'],), lambda s: ()),
+    'gpu': (lambda s: (s['brand'], s['pcie_widths']), lambda s: (s['length_mm'], s['tdp'])),
+    'case': (lambda s: (s['psu_class'], s['form_factors']), lambda s: (-s['max_gpu_mm'],)),
+    'psu': (lambda s: (s['type'],), lambda s: (-s['wattage'],)),
+}
+
+
+def pareto_mask(prices: np.ndarray, scores: np.ndarray, partitions: np.ndarray,
+                limits: Optional[np.ndarray] = None, ids: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Which rows no other row of their partition beats on price, score and limits (one
+    column per limit). Of identical rows only the one with the smallest id is kept.
+    """
+    n = len(prices)
+    limits = np.zeros((n, 0)) if limits is None else limits.reshape(n, -1)
+    ids = np.arange(n) if ids is None else ids
+    # Partition, then price, then score descending, then limits, then id
+    order = np.lexsort((ids, *limits.T[::-1], -scores, prices, partitions))
+    prices, scores, partitions, limits = prices[order], scores[order], partitions[order], limits[order]
+
+    keep = np.zeros(n, dtype=bool)
+    starts = np.flatnonzero(np.r_[True, partitions[1:] != partitions[:-1]]) if n else np.zeros(0, dtype=int)
+    for start, end in zip(starts, np.r_[starts[1:], n]):
+        if not limits.shape[1]:
+            # Everything earlier costs no more, so a row is kept iff it beats the best score so far
+            segment = scores[start:end]
+            keep[start] = True
+            keep[start + 1:end] = segment[1:] > np.maximum.accumulate(segment)[:-1]
+            continue
+        kept: List[int] = []
+        for i in range(start, end):
+            if not kept or not np.any((scores[kept] >= scores[i]) & np.all(limits[kept] <= limits[i], axis=1)):
+                kept.append(i)
+        keep[kept] = True
+
+    mask = np.zeros(n, dtype=bool)
+    mask[order] = keep
+    return mask
+
+
+def partition_ids(keys: Sequence[Hashable]) -> np.ndarray:
+    """Integer id of each key, in order of first appearance"""
+    index: Dict[Hashable, int] = {}
+    return np.array([index.setdefault(key, len(index)) for key in keys], dtype=np.int32)
+
+
+def undominated(parts: List[Any]) -> List[Any]:
+    """The parts (of one category, with slot, id, price, score and specs) on their frontiers"""
+    if not parts:
+        return []
+    key, limits = DOMINANCE[parts[0].slot]
+    mask = pareto_mask(np.array([part.price for part in parts], dtype=float),
+                       np.array([part.score for part in parts], dtype=float),
+                       partition_ids([key(part.specs) for part in parts]),
+                       np.array([limits(part.specs) for part in parts], dtype=float),
+                       np.array([part.id for part in parts]))
+    return [part for part, kept in zip(parts, mask) if kept]
+
+
+def _key_json(key: Tuple) -> str:
+    return json.dumps(key, default=sorted)
+
+
+@dataclass
+class CategoryFrontier:
+    """The frontier parts of one category, sorted by partition and then price"""
+    ids: np.ndarray  # int64
+    prices: np.ndarray  # float64
+    scores: np.ndarray  # float64
+    partitions: np.ndarray  # int32, index into keys
+    keys: List[str]  # Compatibility key of each partition, as JSON
+    catalog: str = ''  # Stamp of the catalog the parts were read from (see BuildOptimizer.catalog)
+
+    @classmethod
+    def from_parts(cls, parts: List[Any]) -> 'CategoryFrontier':
+        parts = undominated(parts)
+        keys = sorted({_key_json(DOMINANCE[part.slot][0](part.specs)) for part in parts})
+        index = {key: i for i, key in enumerate(keys)}
+        partitions = np.array([index[_key_json(DOMINANCE[part.slot][0](part.specs))] for part in parts],
+                              dtype=np.int32)
+        prices = np.array([part.price for part in parts], dtype=np.float64)
+        order = np.lexsort((prices, partitions))
+        return cls(np.array([part.id for part in parts], dtype=np.int64)[order], prices[order],
+                   np.array([part.score for part in parts], dtype=np.float64)[order], partitions[order], keys)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def partition(self, key: Tuple) -> slice:
+        """Rows of a compatibility key's partition; empty if it has none"""
+        try:
+            i = self.keys.index(_key_json(key))
+        except ValueError:
+            return slice(0, 0)
+        return slice(*self.partitions.searchsorted([i, i + 1]))
+
+    def affordable(self, key: Tuple, budget: float) -> np.ndarray:
+        """Ids in a key's partition that cost at most budget, cheapest first"""
+        rows = self.partition(key)
+        return self.ids[rows][:self.prices[rows].searchsorted(budget, 'right')]
+
+
+def save_frontiers(frontiers: Dict[str, CategoryFrontier], path: str):
+    arrays = {}
+    for category, frontier in frontiers.items():
+        arrays.update({
+            f'{category}_ids': frontier.ids,
+            f'{category}_prices': frontier.prices,
+            f'{category}_scores': frontier.scores,
+            f'{category}_partitions': frontier.partitions,
+            f'{category}_keys': np.array(frontier.keys, dtype=str),
+            f'{category}_catalog': np.array(frontier.catalog, dtype=str),
+        })
+    np.savez_compressed(path, categories=np.array(list(frontiers), dtype=str), **arrays)
+
+
+def load_frontiers(path: str) -> Dict[str, CategoryFrontier]:
+    with np.load(path) as data:
+        if 'categories' not in data:
+            raise ValueError(f"{path} is not a frontiers file")
+        categories = data['categories'].tolist()
+        unstamped = [category for category in categories if f'{category}_catalog' not in data]
+        if unstamped:
+            raise ValueError(f"{path} does not record the catalog of its {', '.join(unstamped)} frontiers; "
+                             f"save them again")
+        return {
+            category: CategoryFrontier(data[f'{category}_ids'], data[f'{category}_prices'],
+                                       data[f'{category}_scores'], data[f'{category}_partitions'],
+                                       data[f'{category}_keys'].tolist(), data[f'{category}_catalog'].item())
+            for category in categories
+        }
@@ -0,0 +1,187 @@
+"""
+Per-category price index for "best part for the money" queries.
+
+A PriceIndex holds one category's priced, scored parts sorted by price_num, with a
+sparse table of range maxima over their scores and the running maximum score, so
+
+    best_in_range(low, high)     the highest-scoring part priced from low to high
+    top_in_range(low, high, k)   the k highest-scoring parts priced from low to high
+    top_under(budget, k)         the k highest-scoring parts priced at most budget
+    cheapest_with_score(score)   the cheapest part scoring at least score
+
+are a binary search on the prices plus O(1) range-maximum lookups: O(log n), and
+O(log n + k log k) for the top k. Ties in score go to the cheaper part.
+
+The index is built from the database or a catalog snapshot, by the absolute score or
+the relative_score of update_scores.py. src/lib/priceIndex.ts is the same index for
+the parts API (?max_price=, ?min_price=, ?top=, ?min_score=).
+
+    python price_index.py gpu --max-price 500 --top 5
+    python price_index.py cpu --min-price 200 --max-price 300
+    python price_index.py memory --min-score 70
+"""
+
+import argparse
+import heapq
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from catalog_snapshot import load_snapshot, snapshot_rows
+from update_scores import DB_CONFIG, get_pool
+
+CATEGORY_TABLES = {
+    'cpu': 'cpu_specs',
+    'motherboard': 'motherboard_specs',
+    'memory': 'memory_specs',
+    'cooler': 'cooler_specs',
+    'gpu': 'gpu_specs',
+    'case': 'case_specs',
+    'psu': 'psu_specs',
+}
+SCORE_COLUMNS = ['score', 'relative_score']
+
+
+@dataclass
+class IndexedPart:
+    id: int
+    name: str
+    price: float
+    score: float
+
+    def as_dict(self) -> Dict:
+        return {'id': self.id, 'name': self.name, 'price': self.price, 'score': self.score}
+
+
+class PriceIndex:
+    """One category's parts by price, with range-maximum lookups over their scores"""
+    def __init__(self, ids: np.ndarray, names: List[str], prices: np.ndarray, scores: np.ndarray):
+        # Price ascending; at one price the best score first, so ties in score go to the cheaper part
+        order = np.lexsort((ids, -scores, prices))
+        self.ids, self.prices, self.scores = ids[order], prices[order], scores[order]
+        self.names = [names[i] for i in order]
+        self.running_max = np.maximum.accumulate(self.scores) if len(self.scores) else self.scores
+
+        # sparse[k][i]: position of the best score among the 2**k parts from position i
+        n = len(self.scores)
+        self.sparse = [np.arange(n)]
+        width = 1
+        while 2 * width <= n:
+            previous = self.sparse[-1]
+            left, right = previous[:n - 2 * width + 1], previous[width:n - width + 1]
+            self.sparse.append(np.where(self.scores[right] > self.scores[left], right, left))
+            width *= 2
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict], score_column: str = 'score') -> 'PriceIndex':
+        return cls(np.array([row['id'] for row in rows], dtype=np.int64), [row['name'] for row in rows],
+                   np.array([float(row['price_num']) for row in rows], dtype=float),
+                   np.array([float(row[score_column]) for row in rows], dtype=float))
+
+    @classmethod
+    def load(cls, conn, table: str, score_column: str = 'score') -> 'PriceIndex':
+        """The priced, scored rows of a table"""
+        columns = ['id', 'name', 'price_num', score_column]
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT {', '.join(columns)} FROM {table} "
+                           f"WHERE price_num IS NOT NULL AND {score_column} IS NOT NULL")
+            return cls.from_rows([dict(zip(columns, values)) for values in cursor.fetchall()], score_column)
+
+    @classmethod
+    def load_snapshot(cls, path: str, table: str, score_column: str = 'score') -> 'PriceIndex':
+        """The same as load, from a catalog snapshot (see catalog_snapshot.py)"""
+        data = load_snapshot(path, [table])[table]
+        columns = ['id', 'name', 'price_num', score_column]
+        return cls.from_rows(snapshot_rows(data, columns, not_null=['price_num', score_column]), score_column)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def part(self, position: int) -> IndexedPart:
+        return IndexedPart(int(self.ids[position]), self.names[position], float(self.prices[position]),
+                           float(self.scores[position]))
+
+    def positions(self, low: float, high: float) -> range:
+        """Positions of the parts priced from low to high"""
+        return range(int(self.prices.searchsorted(low, 'left')), int(self.prices.searchsorted(high, 'right')))
+
+    def best_position(self, start: int, stop: int) -> int:
+        """Position of the best score among positions start to stop - 1 (not empty)"""
+        level = (stop - start).bit_length() - 1
+        left, right = self.sparse[level][start], self.sparse[level][stop - (1 << level)]
+        return int(right if self.scores[right] > self.scores[left] else left)
+
+    def best_in_range(self, low: float, high: float) -> Optional[IndexedPart]:
+        span = self.positions(low, high)
+        return self.part(self.best_position(span.start, span.stop)) if span else None
+
+    def top_in_range(self, low: float, high: float, k: int) -> List[IndexedPart]:
+        """The k best parts priced from low to high, best first"""
+        span = self.positions(low, high)
+        if not span or k <= 0:
+            return []
+        # Max-heap of ranges keyed by their best part; taking a part splits its range in two
+        heap = []
+
+        def push(start: int, stop: int):
+            if start < stop:
+                best = self.best_position(start, stop)
+                heapq.heappush(heap, (-self.scores[best], best, start, stop))
+
+        push(span.start, span.stop)
+        top = []
+        while heap and len(top) < k:
+            _, best, start, stop = heapq.heappop(heap)
+            top.append(self.part(best))
+            push(start, best)
+            push(best + 1, stop)
+        return top
+
+    def top_under(self, budget: float, k: int) -> List[IndexedPart]:
+        return self.top_in_range(-np.inf, budget, k)
+
+    def cheapest_with_score(self, score: float) -> Optional[IndexedPart]:
+        """The cheapest part scoring at least score"""
+        # The running maximum first reaches score at the first part that does
+        position = int(self.running_max.searchsorted(score, 'left'))
+        return self.part(position) if position < len(self) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the best parts of a category by price")
+    parser.add_argument('category', choices=list(CATEGORY_TABLES))
+    parser.add_argument('--min-price', type=float, default=-np.inf)
+    parser.add_argument('--max-price', type=float, default=np.inf)
+    parser.add_argument('--top', type=int, default=1, help="How many parts to list, best first")
+    parser.add_argument('--min-score', type=float, help="Find the cheapest part scoring at least this instead")
+    parser.add_argument('--score-column', choices=SCORE_COLUMNS, default='score')
+    parser.add_argument('--snapshot', metavar='PATH', help="Read a catalog snapshot instead of the database")
+    args = parser.parse_args()
+
+    table = CATEGORY_TABLES[args.category]
+    conn = None
+    try:
+        if args.snapshot:
+            index = PriceIndex.load_snapshot(args.snapshot, table, args.score_column)
+        else:
+            conn = get_pool(DB_CONFIG).getconn()
+            index = PriceIndex.load(conn, table, args.score_column)
+
+        if args.min_score is not None:
+            cheapest = index.cheapest_with_score(args.min_score)
+            parts = [cheapest] if cheapest else []
+        else:
+            parts = index.top_in_range(args.min_price, args.max_price, args.top)
+        print(json.dumps([part.as_dict() for part in parts], indent=2))
+
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        if conn:
+            get_pool(DB_CONFIG).putconn(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Benchmark the scoring path on synthetic catalogs of any size.
+
+generate_catalog() builds *_specs rows by resampling the catalog CSVs in src/data and
+rendering their values in the display-string format of the scraped tables ('4.2 GHz',
+'2 x 16GB', 'DDR5-6000', '500 - 1800 RPM', ...). Rows are drawn whole, so values that
+go together stay together and every column keeps its CSV distribution and missing rate;
+a share of the missing text values is written as the 'NaN' the scraped tables hold.
+The CSVs leave most prices empty (parts no longer sold) while the scraped tables price
+nearly every part, so prices are drawn from the priced rows and only a small share left
+NULL. Fields the CSVs do not have are drawn from short lists of typical values.
+
+Each table is timed in three separate phases:
+
+    parse   spec_parser.parse_fields: the spec strings into their *_num values
+    score   the engine's scorer: FRAME_SCORERS ('vectorized') or the per-row functions ('row')
+    write   update_scores.write_scores into a temporary table (only with --write)
+
+and the results are printed as JSON. A saved run can be passed back as --baseline to
+report every phase that got slower:
+
+    python scoring_benchmark.py --rows 10000 100000 1000000 --output baseline.json
+    python scoring_benchmark.py --rows 10000 100000 1000000 --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from update_scores import BULK_DB_CONFIG, SCORED_TABLES, get_pool, write_scores
+from vector_scores import FRAME_SCORERS, SPEC_FIELDS
+from spec_parser import parse_fields
+from db_setup_modules import CATALOG, read_catalog_csv
+
+DATA_DIR = Path(__file__).parent.parent / 'data'
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+ENGINES = ['vectorized', 'row']
+NAN_TOKEN_SHARE = 0.3  # Share of missing text values written as 'NaN' instead of NULL
+PRICE_MISSING_SHARE = 0.05  # Share of rows without a price
+FORMAT_VERSION = 1
+MIN_COMPARED_SECONDS = 0.001  # Faster phases are left out of baseline comparisons as noise
+
+# Typical values of the fields the catalog CSVs do not have
+CPU_L3_CACHES = ['4 MB', '8 MB', '12 MB', '16 MB', '24 MB', '32 MB', '36 MB', '64 MB', '96 MB']
+MOTHERBOARD_M2_SLOTS = ['2242/2260/2280 M-key', '2242/2260/2280 M-key\n2280 M-key',
+                        '2242/2260/2280/22110 M-key\n2260/2280 M-key\n2280 M-key']
+COOLER_SOCKETS = ['AM4\nAM5', 'AM4\nAM5\nLGA1200\nLGA1700\nLGA1851', 'LGA1700\nLGA1851', 'AM5',
+                  'AM4\nAM5\nLGA1150\nLGA1151\nLGA1155\nLGA1200\nLGA1700', 'sTRX4\nsWRX8']
+GPU_COOLING = ['1 Fan', '2 Fans', '3 Fans', 'Liquid']
+CASE_FRONT_USB = ['USB 3.2 Gen 1 Type-A\nUSB 3.2 Gen 2 Type-C', 'USB 3.2 Gen 1 Type-A', 'USB 2.0 Type-A']
+CASE_GPU_LENGTHS = ['280 mm / 11.024"', '330 mm / 12.992"', '360 mm / 14.173"', '405 mm / 15.945"']
+
+Generator = Callable[[pd.DataFrame, np.random.Generator], pd.DataFrame]
+
+
+def _render(values: pd.Series, template: str) -> pd.Series:
+    """template.format(value) for every present value; missing values stay None"""
+    present = values.notna()
+    rendered = pd.Series(None, index=values.index, dtype=object)
+    rendered[present] = [template.format(value) for value in values[present].tolist()]
+    return rendered
+
+
+def _range(low: pd.Series, high: pd.Series, unit: str) -> pd.Series:
+    """"500 - 1800 RPM" for a range, "1550 RPM" for a single value"""
+    single = _render(low, '{:g} ' + unit)
+    ranged = _render(low, '{:g}') + ' - ' + _render(high, '{:g} ' + unit)
+    return single.where(low.eq(high).fillna(True).astype(bool), ranged)
+
+
+def _choice(rng: np.random.Generator, n: int, values: Sequence) -> np.ndarray:
+    return np.array(values, dtype=object)[rng.integers(len(values), size=n)]
+
+
+def _cpu(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({
+        'core_count': csv['core_count'],
+        'thread_count': csv['core_count'] * csv['smt'].fillna(False).map({True: 2, False: 1}).astype('Int64'),
+        'performance_core_clock': _render(csv['core_clock'], '{:g} GHz'),
+        'performance_core_boost_clock': _render(csv['boost_clock'], '{:g} GHz'),
+        'l3_cache': _choice(rng, len(csv), CPU_L3_CACHES),
+        'price_num': csv['price'],
+    })
+
+
+def _motherboard(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    brand = csv['socket'].str.startswith('LGA').map({True: 'Intel', False: 'AMD'})
+    chipset = csv['name'].str.extract(r'\b([ABHXZ]\d{2,3}[EM]?)\b', expand=False)
+    return pd.DataFrame({
+        'form_factor': csv['form_factor'],
+        'memory_max': _render(csv['max_memory'], '{} GB'),
+        'memory_slots': csv['memory_slots'],
+        'chipset': (brand + ' ' + chipset).astype(object).where(chipset.notna(), None),
+        'wireless_networking': csv['name'].str.contains('WIFI', case=False).map({True: 'Wi-Fi 6E', False: 'None'}),
+        'm2_slots': _choice(rng, len(csv), MOTHERBOARD_M2_SLOTS),
+        'price_num': csv['price'],
+    })
+
+
+def _cooler(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({
+        'fan_rpm': _range(csv['rpm_min'], csv['rpm_max'], 'RPM'),
+        'noise_level': _range(csv['noise_level_min'], csv['noise_level_max'], 'dB'),
+        'cpu_socket': _choice(rng, len(csv), COOLER_SOCKETS),
+        'water_cooled': csv['size'].notna(),  # Only liquid coolers list a radiator size
+        'price_num': csv['price'],
+    })
+
+
+def _gpu(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame({
+        'chipset': csv['chipset'],
+        'memory': _render(csv['memory'], '{:g} GB'),
+        'core_clock': _render(csv['core_clock'], '{:g} MHz'),
+        'boost_clock': _render(csv['boost_clock'], '{:g} MHz'),
+        'cooling': _choice(rng, len(csv), GPU_COOLING),
+        'price_num': csv['price'],
+    })
+
+
+def _case(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    form_factors = pd.Series('ATX\nMicro ATX\nMini ITX', index=csv.index, dtype=object)
+    form_factors[csv['type'].str.startswith('MicroATX').fillna(False).astype(bool)] = 'Micro ATX\nMini ITX'
+    form_factors[csv['type'].str.startswith('Mini ITX').fillna(False).astype(bool)] = 'Mini ITX'
+    return pd.DataFrame({
+        'side_panel': csv['side_panel'],
+        'motherboard_form_factor': form_factors,
+        'drive_bays': _render(csv['internal_35_bays'], '{} x Internal 3.5"') + '\n2 x Internal 2.5"',
+        'power_supply_shroud': rng.random(len(csv)) < 0.6,
+        'front_panel_usb': _choice(rng, len(csv), CASE_FRONT_USB),
+        'maximum_video_card_length': _choice(rng, len(csv), CASE_GPU_LENGTHS),
+        'price_num': csv['price'],
+    })
+
+
+def _psu(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    rating = ('80+ ' + csv['efficiency'].str.title()).replace('80+ Plus', '80+')
+    return pd.DataFrame({
+        'wattage': csv['wattage'],
+        'efficiency_rating': rating.astype(object).where(rating.notna(), None),
+        'modular': csv['modular'].replace('false', 'No'),
+        'price_num': csv['price'],
+    })
+
+
+def _memory(csv: pd.DataFrame, rng: np.random.Generator) -> pd.DataFrame:
+    speed = _render(csv['memory_speed'], '{}')
+    ddr = _render(csv['ddr_version'], 'DDR{}-')
+    return pd.DataFrame({
+        'speed': (ddr + speed).where(ddr.notna(), speed),
+        'modules': _render(csv['module_count'], '{} x ') + _render(csv['module_size_gb'], '{}GB'),
+        'first_word_latency': _render(csv['first_word_latency'], '{:g} ns'),
+        'heat_spreader': rng.random(len(csv)) < 0.7,
+        'price_num': csv['price'],
+    })
+
+
+# Table -> (catalog CSV, builder of the table's scorer columns from it)
+GENERATORS: Dict[str, Tuple[str, Generator]] = {
+    'cpu_specs': ('cpu.csv', _cpu),
+    'motherboard_specs': ('motherboard.csv', _motherboard),
+    'cooler_specs': ('cpu-cooler.csv', _cooler),
+    'gpu_specs': ('video-card.csv', _gpu),
+    'case_specs': ('case.csv', _case),
+    'psu_specs': ('power-supply.csv', _psu),
+    'memory_specs': ('memory.csv', _memory),
+}
+
+
+def generate_table(table: str, rows: int, seed: int = 0, data_dir: Path = DATA_DIR) -> pd.DataFrame:
+    """rows synthetic rows of a *_specs table, shaped like the rows update_scores reads"""
+    rng = np.random.default_rng(seed)
+    csv_file, build = GENERATORS[table]
+    template = build(read_catalog_csv(data_dir / csv_file, CATALOG[csv_file]), rng).reset_index(drop=True)
+    # Numbers come back from PostgreSQL as plain values with None for NULL
+    template = template.astype(object).where(template.notna(), None)
+
+    frame = template.iloc[rng.integers(len(template), size=rows)].reset_index(drop=True)
+    prices = template['price_num'].dropna().to_numpy()
+    frame['price_num'] = np.where(rng.random(rows) < PRICE_MISSING_SHARE, None, rng.choice(prices, rows))
+    for column in frame.columns:
+        missing = frame[column].isna().to_numpy()
+        if template[column].map(lambda value: isinstance(value, str)).any():
+            frame.loc[missing & (rng.random(rows) < NAN_TOKEN_SHARE), column] = 'NaN'
+    frame.insert(0, 'id', np.arange(1, rows + 1))
+    frame['score'] = None
+    return frame
+
+
+def generate_catalog(rows: int, seed: int = 0, tables: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+    return {table: generate_table(table, rows, seed) for table in tables or list(GENERATORS)}
+
+
+def _timed(function: Callable[[], Any]) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def parse_phase(table: str, frame: pd.DataFrame) -> tuple:
+    """The frame with its *_num columns added, and the number of rejected values"""
+    if table not in SPEC_FIELDS:
+        return frame, 0
+    numbers, quality = parse_fields(table, frame)
+    return frame.join(numbers), sum(field.rejected for field in quality)
+
+
+def score_phase(table: str, frame: pd.DataFrame, records: Optional[List[Dict]], engine: str) -> List[int]:
+    if engine == 'vectorized':
+        return FRAME_SCORERS[table](frame).tolist()
+    _, score_row = SCORED_TABLES[table]
+    with contextlib.redirect_stdout(io.StringIO()):  # The row scorers print every rejected row
+        return [score_row(record) for record in records]
+
+
+def write_phase(cursor, table: str, ids: List[int], scores: List[int]) -> int:
+    """Write the scores the way update_scores does, into a temporary copy of the score column"""
+    target = f'benchmark_{table}'
+    cursor.execute(f"CREATE TEMP TABLE {target} (id INTEGER PRIMARY KEY, score INTEGER) ON COMMIT DROP")
+    cursor.execute(f"INSERT INTO {target} (id) SELECT generate_series(1, %s)", (len(ids),))
+    return write_scores(cursor, target, list(zip(ids, scores)))
+
+
+def benchmark_table(table: str, rows: int, engine: str, repeat: int = 3, seed: int = 0,
+                    conn=None) -> Dict[str, Any]:
+    """Time the phases of one table repeat times; every phase reports its fastest run"""
+    frame, generate_seconds = _timed(lambda: generate_table(table, rows, seed))
+    runs: Dict[str, List[float]] = {'parse': [], 'score': [], 'write': []}
+    records = None
+    if engine == 'row':
+        records = frame.to_dict('records')
+    for _ in range(repeat):
+        (parsed, rejected), seconds = _timed(lambda: parse_phase(table, frame))
+        runs['parse'].append(seconds)
+        scores, seconds = _timed(lambda: score_phase(table, parsed, records, engine))
+        runs['score'].append(seconds)
+        if conn is not None:
+            with conn.cursor() as cursor:
+                _, seconds = _timed(lambda: write_phase(cursor, table, frame['id'].tolist(), scores))
+            conn.rollback()
+            runs['write'].append(seconds)
+
+    best = {phase: min(seconds) if seconds else None for phase, seconds in runs.items()}
+    return {
+        'table': table, 'rows': rows, 'engine': engine,
+        'generate_s': round(generate_seconds, 6),
+        **{f'{phase}_s': None if seconds is None else round(seconds, 6) for phase, seconds in best.items()},
+        **{f'{phase}_median_s': round(statistics.median(seconds), 6) for phase, seconds in runs.items() if seconds},
+        'score_rows_per_s': round(rows / best['score']) if best['score'] else None,
+        'rejected_values': rejected,
+        'zero_scores': int(sum(score == 0 for score in scores)),
+    }
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Every phase slower than tolerance times its baseline, as readable lines"""
+    previous = {(r['table'], r['rows'], r['engine']): r for r in baseline}
+    slower = []
+    for result in results:
+        before = previous.get((result['table'], result['rows'], result['engine']))
+        for phase in ['parse', 'score', 'write']:
+            now, then = result[f'{phase}_s'], before and before.get(f'{phase}_s')
+            if now is not None and then and then >= MIN_COMPARED_SECONDS and now > then * tolerance:
+                slower.append(f"{result['table']} {result['rows']} rows {result['engine']} {phase}: "
+                              f"{then:.4f}s -> {now:.4f}s ({now / then:.2f}x)")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scoring on synthetic catalogs and print JSON results")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--tables', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=['vectorized'])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per phase; the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write', action='store_true',
+                        help="Also time writing the scores back (needs the database; nothing is kept)")
+    parser.add_argument('--output', help="Write the JSON here instead of printing it")
+    parser.add_argument('--baseline', help="Earlier --output file to compare against")
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help="Report phases slower than this times the baseline (default: %(default)s)")
+    args = parser.parse_args()
+
+    conn = get_pool(BULK_DB_CONFIG).getconn() if args.write else None
+    results = []
+    try:
+        for rows in args.rows:
+            for table in args.tables:
+                for engine in args.engines:
+                    result = benchmark_table(table, rows, engine, args.repeat, args.seed, conn)
+                    print(f"{table} {rows} rows {engine}: parse {result['parse_s']:.4f}s, "
+                          f"score {result['score_s']:.4f}s", file=sys.stderr)
+                    results.append(result)
+    finally:
+        if conn:
+            get_pool(BULK_DB_CONFIG).putconn(conn)
+
+    report = {
+        'format': FORMAT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+                        'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'settings': {'seed': args.seed, 'repeat': args.repeat, 'nan_token_share': NAN_TOKEN_SHARE,
+                     'price_missing_share': PRICE_MISSING_SHARE},
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        slower = compare(results, json.loads(Path(args.baseline).read_text())['results'], args.tolerance)
+        for line in slower:
+            print(f"Slower: {line}", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Parse the display-string spec columns once and store them as numbers.
+
+For every field in vector_scores.SPEC_FIELDS ('4.2 GHz', '32 MB', '2 x 16GB',
+'DDR5-6000', '20 - 25 dB', drive bays joined with newlines, ...) this adds a
+<column>_num DOUBLE PRECISION column to its table and fills it with the value the
+scorers use: NULL where the source is missing or cannot be parsed. Run it after
+importing or enriching; update_scores.py also runs it before scoring. The scorers,
+catalog snapshots and SQL can then read the numbers directly.
+
+Values that cannot be parsed are not silently turned into zeros: every run reports,
+per field, how many rows parsed, were missing or were rejected, with the most
+common rejected strings.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from psycopg2.extras import execute_values
+
+from vector_scores import SPEC_FIELDS
+
+READ_CHUNK_SIZE = 10_000  # Rows read from a server-side cursor, parsed and written back at a time
+WRITE_PAGE_SIZE = 10_000  # Rows per UPDATE statement
+REJECTED_EXAMPLES = 5  # Most common rejected strings kept per field
+
+
+@dataclass
+class FieldQuality:
+    """Data-quality counts for one parsed field"""
+    table: str
+    source: str
+    rows: int = 0
+    parsed: int = 0
+    missing: int = 0  # NULL or 'NaN'/'NULL' where the scorers skip it
+    rejected: int = 0  # Present but unparseable; such a row scores 0
+    examples: Dict[str, int] = field(default_factory=dict)  # Rejected value -> rows
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'table': self.table, 'field': self.source, 'rows': self.rows, 'parsed': self.parsed,
+                'missing': self.missing, 'rejected': self.rejected, 'rejected_examples': self.examples}
+
+    def add(self, other: 'FieldQuality'):
+        """Add the counts of another chunk of the same field"""
+        self.rows += other.rows
+        self.parsed += other.parsed
+        self.missing += other.missing
+        self.rejected += other.rejected
+        for value, count in other.examples.items():
+            self.examples[value] = self.examples.get(value, 0) + count
+
+    def trim_examples(self, examples: int = REJECTED_EXAMPLES):
+        """Keep only the most common rejected strings"""
+        self.examples = dict(sorted(self.examples.items(), key=lambda item: -item[1])[:examples])
+
+
+def parse_fields(table: str, frame: pd.DataFrame,
+                 examples: Optional[int] = REJECTED_EXAMPLES) -> Tuple[pd.DataFrame, List[FieldQuality]]:
+    """
+    The *_num values of a table's rows (aligned with frame) and the quality of each field,
+    with its examples most common rejected strings (all of them for None)
+    """
+    numbers = pd.DataFrame(index=frame.index)
+    quality = []
+    for source, spec in SPEC_FIELDS[table].items():
+        values = frame[source]
+        skipped = spec.skipped(values)
+        numbers[spec.column] = spec.stored(values)
+        rejected = ~skipped & numbers[spec.column].isna()
+        shown = values[rejected].map(lambda v: 'NULL' if pd.isna(v) else str(v))
+        counts = shown.value_counts().head(examples)
+        quality.append(FieldQuality(table, source, rows=len(values), parsed=int((~skipped & ~rejected).sum()),
+                                    missing=int(skipped.sum()), rejected=int(rejected.sum()),
+                                    examples={value: int(count) for value, count in counts.items()}))
+    return numbers, quality
+
+
+def ensure_numeric_columns(cursor, table: str):
+    for spec in SPEC_FIELDS[table].values():
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {spec.column} DOUBLE PRECISION")
+
+
+def write_numbers(cursor, table: str, ids: pd.Series, numbers: pd.DataFrame) -> int:
+    """Write the given *_num values by id; returns the number of rows updated"""
+    columns = list(numbers.columns)
+    rows = [(int(row_id), *(None if pd.isna(v) else float(v) for v in values))
+            for row_id, values in zip(ids, numbers.itertuples(index=False))]
+    updated = 0
+    for start in range(0, len(rows), WRITE_PAGE_SIZE):
+        page = rows[start:start + WRITE_PAGE_SIZE]
+        # A NULL in the first row would make VALUES guess text; the casts keep every column numeric
+        execute_values(cursor, f"""
+            UPDATE {table} AS t
+            SET {', '.join(f'{column} = v.{column}' for column in columns)}
+            FROM (VALUES %s) AS v(id, {', '.join(columns)})
+            WHERE t.id = v.id
+        """, page, template=f"(%s, {', '.join(['%s::double precision'] * len(columns))})", page_size=len(page))
+        updated += cursor.rowcount
+    return updated
+
+
+def stream_spec_rows(conn, table: str, columns: List[str], chunk_size: int = READ_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """A table's ids and the given columns, chunk_size rows at a time from a server-side cursor"""
+    with conn.cursor(name=f"parse_{table}") as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table}")
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield pd.DataFrame.from_records(rows, columns=['id'] + columns)
+
+
+def update_numeric_columns(conn, tables: Optional[List[str]] = None, verbose: bool = True,
+                           chunk_size: int = READ_CHUNK_SIZE) -> List[FieldQuality]:
+    """
+    Parse every spec field of the tables into its *_num column; returns the quality report.
+    Rows are read, parsed and written chunk_size at a time, so only one chunk is held in memory.
+    """
+    report = []
+    with conn.cursor() as cursor:
+        for table in tables or list(SPEC_FIELDS):
+            start = time.perf_counter()
+            ensure_numeric_columns(cursor, table)
+            sources = list(SPEC_FIELDS[table])
+            stored = [spec.column for spec in SPEC_FIELDS[table].values()]
+            table_quality = [FieldQuality(table, source) for source in sources]
+            rows = updated = 0
+            parse_seconds = 0.0
+            for frame in stream_spec_rows(conn, table, sources + stored, chunk_size):
+                parse_start = time.perf_counter()
+                # Every rejected string is counted per chunk; the most common are kept once they are added up
+                numbers, quality = parse_fields(table, frame, examples=None)
+                parse_seconds += time.perf_counter() - parse_start
+                # Only send the rows whose numbers changed
+                current = frame[stored].astype(float)
+                changed = ~((numbers == current) | (numbers.isna() & current.isna())).all(axis=1)
+                updated += write_numbers(cursor, table, frame['id'][changed], numbers[changed])
+                for total, chunk in zip(table_quality, quality):
+                    total.add(chunk)
+                rows += len(frame)
+            for quality in table_quality:
+                quality.trim_examples()
+            report.extend(table_quality)
+            if verbose:
+                print(f"{table}: parsed {rows} rows in {parse_seconds:.3f}s, updated {updated} "
+                      f"({time.perf_counter() - start:.2f}s in all)")
+    conn.commit()
+    return report
+
+
+def print_report(report: List[FieldQuality]):
+    print(f"\n{'field':<45} {'rows':>8} {'parsed':>8} {'missing':>8} {'rejected':>8}")
+    for quality in report:
+        print(f"{quality.table + '.' + quality.source:<45} {quality.rows:>8} {quality.parsed:>8} "
+              f"{quality.missing:>8} {quality.rejected:>8}")
+        for value, count in quality.examples.items():
+            print(f"    {count:>6} x {value!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Store the parsed spec strings in *_num columns")
+    parser.add_argument('--tables', nargs='+', choices=list(SPEC_FIELDS))
+    parser.add_argument('--json', action='store_true', help="Print the data-quality report as JSON")
+    args = parser.parse_args()
+    # update_scores.py imports this module to refresh the columns before scoring
+    from update_scores import BULK_DB_CONFIG, get_pool
+
+    conn = None
+    try:
+        conn = get_pool(BULK_DB_CONFIG).getconn()
+        report = update_numeric_columns(conn, args.tables, verbose=not args.json)
+        if args.json:
+            print(json.dumps([quality.as_dict() for quality in report], indent=2))
+        else:
+            print_report(report)
+    except Exception as e:
+        print(f"Error: {e}")
+    finally:
+        if conn:
+            get_pool(BULK_DB_CONFIG).putconn(conn)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,37 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
-
-# Database configuration - Update these values to match your database
-DB_CONFIG = {
-    'host': 'localhost',
-    'database': 'pc_builder_prod', 
-    'user': 'pc_builder_admin',      
-    'password': 'pc_builder'          
-}
+import argparse
+import hashlib
+import inspect
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from psycopg2.extras import RealDictCursor, execute_values
+from vector_scores import FRAME_SCORERS, combine_percentiles, metric_distributions, metric_values
+from spec_parser import update_numeric_columns
+from db_setup_modules import BULK_STATEMENT_TIMEOUT_MS, db_config, get_pool, peak_rss_mb
+
+# Database configuration - set PGHOST, PGDATABASE, PGUSER, PGPASSWORD etc. to override.
+# DB_CONFIG has the default statement timeout; runs that read or write whole tables use BULK_DB_CONFIG
+DB_CONFIG = db_config('pc_builder_prod')
+BULK_DB_CONFIG = db_config('pc_builder_prod', BULK_STATEMENT_TIMEOUT_MS)
+
+# 'vectorized' scores each table as a DataFrame (vector_scores.py), 'row' uses the per-row functions below
+SCORING_ENGINE = 'vectorized'
+# Only rescore rows whose inputs changed since the last run (tracked in score_state)
+INCREMENTAL_SCORING = True
+# Rows read from a server-side cursor, scored and written back at a time
+SCORE_CHUNK_SIZE = 10_000
+# Processes scoring chunks at the same time; 1 scores every table in this process
+SCORE_WORKERS = 1
+# Rank a whole table again once the parts ranked against its stored distributions exceed this share of it
+RELATIVE_REFRESH_SHARE = 0.1
+
+# Bounds of the INTEGER id columns, used to cover a whole table with id ranges
+MIN_ID, MAX_ID = -2 ** 31, 2 ** 31 - 1
+
+# Hash of every column except the scores themselves; changes whenever a scorer input changes
+INPUT_HASH_SQL = "md5((to_jsonb(t) - 'score' - 'relative_score')::text)"
 
 # ========== COMPONENT SCORING FUNCTIONS ==========
 
@@ -360,89 +384,425 @@ def score_memory(mem):
 
 # ========== DATABASE UPDATE FUNCTIONS ==========
 
-def update_component_scores(conn):
+# Table -> (label used in progress messages, per-row scorer)
+SCORED_TABLES = {
+    'cpu_specs': ('CPU', score_cpu),
+    'motherboard_specs': ('motherboard', score_motherboard),
+    'cooler_specs': ('cooler', score_cooler),
+    'gpu_specs': ('GPU', score_gpu),
+    'case_specs': ('case', score_case),
+    'psu_specs': ('PSU', score_psu),
+    'memory_specs': ('memory', score_memory),
+}
+
+
+def score_rows(table, rows):
+    """Return (id, score) pairs for the fetched rows of a *_specs table"""
+    if SCORING_ENGINE == 'vectorized':
+        frame = pd.DataFrame(rows)
+        if frame.empty:
+            return []
+        scores = FRAME_SCORERS[table](frame)
+        return list(zip(frame['id'].tolist(), scores.tolist()))
+
+    _, score_row = SCORED_TABLES[table]
+    return [(row['id'], score_row(row)) for row in rows]
+
+
+def write_scores(cursor, table, scores, column='score'):
+    """Write (id, score) pairs back in one statement; returns the number of rows updated"""
+    if not scores:
+        return 0
+    execute_values(cursor, f"""
+        UPDATE {table} AS t
+        SET {column} = v.score
+        FROM (VALUES %s) AS v(id, score)
+        WHERE t.id = v.id AND t.{column} IS DISTINCT FROM v.score
+    """, scores, page_size=len(scores))
+    return cursor.rowcount
+
+
+def scorer_version(table):
+    """Stamp of the scoring code for a table; a new stamp forces a full rescore"""
+    _, score_row = SCORED_TABLES[table]
+    source = inspect.getsource(score_row) + inspect.getsource(inspect.getmodule(FRAME_SCORERS[table]))
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+def stream_rows_to_score(conn, table, incremental, chunk_size=SCORE_CHUNK_SIZE, id_range=None, state_name=None):
+    """
+    Rows to rescore with their input hash (all of them, or only those changed since the last run),
+    yielded chunk_size at a time from a server-side cursor so only one chunk is held in memory.
+    id_range limits them to ids from id_range[0] to id_range[1] inclusive; state_name is the
+    score_state table_name the last run recorded its hashes under (default: the table).
+    """
+    query = f"SELECT t.*, {INPUT_HASH_SQL} AS input_hash FROM {table} t"
+    conditions, params = [], []
+    if incremental:
+        query += " LEFT JOIN score_state s ON s.table_name = %s AND s.id = t.id"
+        conditions.append(f"s.input_hash IS DISTINCT FROM {INPUT_HASH_SQL}")
+        params.append(state_name or table)
+    if id_range:
+        conditions.append("t.id BETWEEN %s AND %s")
+        params.extend(id_range)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    with conn.cursor(name=f"score_{table}", cursor_factory=RealDictCursor) as cursor:
+        cursor.itersize = chunk_size
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+
+def score_changes(table, rows):
+    """Scores of the rows that differ from the stored ones, and (id, input hash) of every row"""
+    current = {row['id']: row.get('score') for row in rows}
+    changed = [(component_id, score) for component_id, score in score_rows(table, rows)
+               if current[component_id] != score]
+    return changed, [(row['id'], row['input_hash']) for row in rows]
+
+
+def id_ranges(cursor, table, chunk_size=SCORE_CHUNK_SIZE):
+    """Consecutive id ranges of about chunk_size rows each that together cover the whole table"""
+    cursor.execute(f"""
+        SELECT id FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM {table}) numbered
+        WHERE n %% %s = 1 ORDER BY id
+    """, (chunk_size,))
+    starts = [row[0] for row in cursor.fetchall()][1:]
+    return list(zip([MIN_ID] + starts, [start - 1 for start in starts] + [MAX_ID]))
+
+
+def score_id_range(table, id_range, incremental, snapshot):
+    """
+    Worker process task: score one id range of a table, reading the rows on this process's
+    own connection as of the coordinator's exported snapshot. Returns the changed scores,
+    the (id, input hash) pairs and the seconds spent scoring.
+    """
+    pool = get_pool(BULK_DB_CONFIG)
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            cursor.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+        changed, states, seconds = [], [], 0.0
+        for rows in stream_rows_to_score(conn, table, incremental, id_range=id_range):
+            start = time.perf_counter()
+            chunk_changed, chunk_states = score_changes(table, rows)
+            seconds += time.perf_counter() - start
+            changed.extend(chunk_changed)
+            states.extend(chunk_states)
+        return changed, states, seconds
+    finally:
+        pool.putconn(conn)
+
+
+def score_in_workers(conn, incremental_tables, workers):
+    """
+    Score the tables in a pool of worker processes, one id range of SCORE_CHUNK_SIZE rows per
+    task. The workers read their rows themselves as of a snapshot of this transaction, so only
+    ids, scores and hashes cross between processes. Returns table -> (changed scores,
+    (id, input hash) pairs, seconds spent scoring summed over the workers).
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_export_snapshot()")
+        snapshot = cursor.fetchone()[0]
+        tasks = [(table, id_range, incremental) for table, incremental in incremental_tables.items()
+                 for id_range in id_ranges(cursor, table)]
+
+    print(f"Scoring {len(tasks)} chunks of {len(incremental_tables)} tables with {workers} workers...")
+    changed = {table: [] for table in incremental_tables}
+    states = {table: [] for table in incremental_tables}
+    seconds = dict.fromkeys(incremental_tables, 0.0)
+    # spawn, so no worker inherits this process's pooled connections
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {executor.submit(score_id_range, *task, snapshot): task[0] for task in tasks}
+        for future in as_completed(futures):
+            table = futures[future]
+            chunk_changed, chunk_states, chunk_seconds = future.result()
+            changed[table].extend(chunk_changed)
+            states[table].extend(chunk_states)
+            seconds[table] += chunk_seconds
+    return {table: (changed[table], states[table], seconds[table]) for table in incremental_tables}
+
+
+def record_score_state(cursor, table, states):
+    """Remember the input hash of every scored row, from (id, input hash) pairs"""
+    if states:
+        execute_values(cursor, """
+            INSERT INTO score_state (table_name, id, input_hash) VALUES %s
+            ON CONFLICT (table_name, id) DO UPDATE SET input_hash = EXCLUDED.input_hash
+        """, [(table, component_id, input_hash) for component_id, input_hash in states], page_size=len(states))
+
+
+def forget_deleted_rows(cursor, table, state_name=None):
+    """Drop the score_state of rows deleted from the table since the last run"""
+    cursor.execute(f"""
+        DELETE FROM score_state s
+        WHERE s.table_name = %s AND NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = s.id)
+    """, (state_name or table,))
+
+
+def record_scorer_version(cursor, table, version):
+    """Remember the scorer version used, once every row of the table is scored"""
+    forget_deleted_rows(cursor, table)
+    cursor.execute("""
+        INSERT INTO score_versions (table_name, scorer_version) VALUES (%s, %s)
+        ON CONFLICT (table_name) DO UPDATE SET scorer_version = EXCLUDED.scorer_version
+    """, (table, version))
+
+
+def update_component_scores(conn, incremental=INCREMENTAL_SCORING, workers=SCORE_WORKERS):
     """Update scores for all components in the database"""
     try:
         # Create a cursor
         with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            print("Updating CPU scores...")
-            # Get all components and calculate their scores
-            cursor.execute("SELECT * FROM cpu_specs")
-            cpus = cursor.fetchall()
-            for cpu in cpus:
-                score = score_cpu(cpu)
-                cursor.execute("UPDATE cpu_specs SET score = %s WHERE id = %s", (score, cpu['id']))
-            
-            print("Updating motherboard scores...")
-            cursor.execute("SELECT * FROM motherboard_specs")
-            motherboards = cursor.fetchall()
-            for mobo in motherboards:
-                score = score_motherboard(mobo)
-                cursor.execute("UPDATE motherboard_specs SET score = %s WHERE id = %s", (score, mobo['id']))
-            
-            print("Updating cooler scores...")
-            cursor.execute("SELECT * FROM cooler_specs")
-            coolers = cursor.fetchall()
-            for cooler in coolers:
-                score = score_cooler(cooler)
-                cursor.execute("UPDATE cooler_specs SET score = %s WHERE id = %s", (score, cooler['id']))
-            
-            print("Updating GPU scores...")
-            cursor.execute("SELECT * FROM gpu_specs")
-            gpus = cursor.fetchall()
-            for gpu in gpus:
-                score = score_gpu(gpu)
-                cursor.execute("UPDATE gpu_specs SET score = %s WHERE id = %s", (score, gpu['id']))
-            
-            print("Updating case scores...")
-            cursor.execute("SELECT * FROM case_specs")
-            cases = cursor.fetchall()
-            for case in cases:
-                score = score_case(case)
-                cursor.execute("UPDATE case_specs SET score = %s WHERE id = %s", (score, case['id']))
-            
-            print("Updating PSU scores...")
-            cursor.execute("SELECT * FROM psu_specs")
-            psus = cursor.fetchall()
-            for psu in psus:
-                score = score_psu(psu)
-                cursor.execute("UPDATE psu_specs SET score = %s WHERE id = %s", (score, psu['id']))
-            
-            print("Updating memory scores...")
-            cursor.execute("SELECT * FROM memory_specs")
-            memories = cursor.fetchall()
-            for memory in memories:
-                score = score_memory(memory)
-                cursor.execute("UPDATE memory_specs SET score = %s WHERE id = %s", (score, memory['id']))
+            cursor.execute("SELECT table_name, scorer_version FROM score_versions")
+            versions = {row['table_name']: row['scorer_version'] for row in cursor.fetchall()}
+            table_versions = {table: scorer_version(table) for table in SCORED_TABLES}
+            incremental_tables = {table: incremental and versions.get(table) == version
+                                  for table, version in table_versions.items()}
+
+            # With workers every table is scored first, then each is written back in one statement
+            results = score_in_workers(conn, incremental_tables, workers) if workers > 1 else {}
+
+            for table, (label, _) in SCORED_TABLES.items():
+                print(f"Updating {label} scores...")
+                if incremental and not incremental_tables[table]:
+                    print("  No previous run with the current scoring code, rescoring every row")
+
+                if table in results:
+                    changed, states, score_seconds = results[table]
+                    start = time.perf_counter()
+                    written = write_scores(cursor, table, changed)
+                    record_score_state(cursor, table, states)
+                    write_seconds = time.perf_counter() - start
+                    scored, unchanged = len(states), len(states) - len(changed)
+                else:
+                    # Read, score and write back one chunk at a time
+                    scored = written = unchanged = 0
+                    score_seconds = write_seconds = 0.0
+                    for rows in stream_rows_to_score(conn, table, incremental_tables[table]):
+                        start = time.perf_counter()
+                        # Only send scores that differ from what is stored
+                        changed, states = score_changes(table, rows)
+                        score_seconds += time.perf_counter() - start
+
+                        start = time.perf_counter()
+                        written += write_scores(cursor, table, changed)
+                        record_score_state(cursor, table, states)
+                        write_seconds += time.perf_counter() - start
+                        scored += len(states)
+                        unchanged += len(states) - len(changed)
+
+                print(f"  Scored {scored} rows in {score_seconds:.3f}s")
+                print(f"  Wrote {written} changed scores in {write_seconds:.3f}s ({unchanged} unchanged)")
+                record_scorer_version(cursor, table, table_versions[table])
         
         # Commit the changes
         conn.commit()
         print("All component scores updated successfully!")
+        peak = peak_rss_mb()
+        if peak is not None:
+            print(f"Peak memory: {peak:.0f} MB")
     
     except Exception as e:
         print(f"Error updating component scores: {e}")
         conn.rollback()
 
 
+def benchmark_workers(conn, worker_counts):
+    """Time a full rescore with each number of workers; returns workers -> seconds"""
+    timings = {}
+    for workers in worker_counts:
+        print(f"\n--- Full rescore with {workers} worker{'s' if workers > 1 else ''} ---")
+        start = time.perf_counter()
+        update_component_scores(conn, incremental=False, workers=workers)
+        timings[workers] = time.perf_counter() - start
+
+    print(f"\n{'workers':>8} {'seconds':>9} {'speedup':>8}")
+    for workers, seconds in timings.items():
+        print(f"{workers:>8} {seconds:>9.2f} {timings[worker_counts[0]] / seconds:>7.2f}x")
+    return timings
+
+
+def read_and_score(table, streamed):
+    """
+    Memory benchmark task, run in a fresh process: read and score every row of the table
+    (nothing is written), streamed SCORE_CHUNK_SIZE rows at a time or all at once with
+    fetchall() as before streaming. Returns the rows scored and the process's peak RSS in MB.
+    """
+    pool = get_pool(BULK_DB_CONFIG)
+    conn = pool.getconn()
+    try:
+        if streamed:
+            chunks = stream_rows_to_score(conn, table, incremental=False)
+        else:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(f"SELECT t.*, {INPUT_HASH_SQL} AS input_hash FROM {table} t")
+                chunks = [cursor.fetchall()]
+        scored = 0
+        for rows in chunks:
+            scored += len(score_changes(table, rows)[1])
+        return scored, peak_rss_mb()
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+def benchmark_memory():
+    """
+    Peak RSS of reading and scoring each table with fetchall() (the baseline) and streamed,
+    each in its own process so one run's peak does not hide the other's; returns
+    table -> {'rows': ..., 'fetchall': MB, 'streamed': MB}
+    """
+    results = {}
+    for table in SCORED_TABLES:
+        results[table] = {}
+        for mode in ('fetchall', 'streamed'):
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                rows, peak = executor.submit(read_and_score, table, mode == 'streamed').result()
+            results[table].update({'rows': rows, mode: peak})
+
+    print(f"\n{'table':<20} {'rows':>9} {'fetchall MB':>12} {'streamed MB':>12} {'saved':>7}")
+    for table, result in results.items():
+        saved = 1 - result['streamed'] / result['fetchall']
+        print(f"{table:<20} {result['rows']:>9} {result['fetchall']:>12.0f} {result['streamed']:>12.0f} {saved:>7.0%}")
+    return results
+
+
+def relative_state_name(table):
+    """score_state table_name of the relative scores, tracked apart from the absolute ones"""
+    return f'{table}:relative'
+
+
+def load_distributions(cursor, table, version):
+    """
+    A table's stored metric distributions and the number of parts ranked against them
+    since they were built; (None, 0) if there are none from this scorer version
+    """
+    cursor.execute("""
+        SELECT metric, scorer_version, pending, sorted_values FROM score_distributions WHERE table_name = %s
+    """, (table,))
+    rows = cursor.fetchall()
+    if not rows or any(row['scorer_version'] != version for row in rows):
+        return None, 0
+    return {row['metric']: np.array(row['sorted_values'], dtype=float) for row in rows}, rows[0]['pending']
+
+
+def save_distributions(cursor, table, version, distributions):
+    cursor.execute("DELETE FROM score_distributions WHERE table_name = %s", (table,))
+    execute_values(cursor, """
+        INSERT INTO score_distributions (table_name, metric, scorer_version, pending, sorted_values) VALUES %s
+    """, [(table, metric, version, 0, values.tolist()) for metric, values in distributions.items()])
+
+
+def write_relative_scores(cursor, table, ids, stored, scores):
+    """Write the relative scores that moved by 0.01 or more; returns the number of rows updated"""
+    changed = [(component_id, float(score)) for component_id, current, score in zip(ids, stored, scores)
+               if current is None or abs(current - score) >= 0.005]
+    return write_scores(cursor, table, changed, column='relative_score')
+
+
+def rank_table(conn, cursor, table, version):
+    """Rank every row of a table against the whole table and store the distributions used"""
+    ids, stored, states, values, invalid = [], [], [], [], []
+    for rows in stream_rows_to_score(conn, table, incremental=False):
+        chunk_values, chunk_invalid = metric_values(table, pd.DataFrame(rows))
+        values.append(chunk_values)
+        invalid.append(chunk_invalid)
+        ids.extend(row['id'] for row in rows)
+        stored.extend(row['relative_score'] for row in rows)
+        states.extend((row['id'], row['input_hash']) for row in rows)
+    if not ids:
+        return 0, 0
+
+    # One pass over the whole table: sort every metric once, then rank each row with searchsorted
+    values = {name: np.concatenate([chunk[name] for chunk in values]) for name in values[0]}
+    invalid = np.concatenate(invalid)
+    distributions = metric_distributions(values, invalid)
+    written = write_relative_scores(cursor, table, ids, stored, combine_percentiles(table, values, invalid,
+                                                                                     distributions))
+    record_score_state(cursor, relative_state_name(table), states)
+    forget_deleted_rows(cursor, table, relative_state_name(table))
+    save_distributions(cursor, table, version, distributions)
+    return written, len(ids)
+
+
+def rank_changed_rows(conn, cursor, table, distributions):
+    """Rank the rows added or changed since the last run against the stored distributions"""
+    written = ranked = 0
+    for rows in stream_rows_to_score(conn, table, incremental=True, state_name=relative_state_name(table)):
+        values, invalid = metric_values(table, pd.DataFrame(rows))
+        scores = combine_percentiles(table, values, invalid, distributions)
+        written += write_relative_scores(cursor, table, [row['id'] for row in rows],
+                                         [row['relative_score'] for row in rows], scores)
+        record_score_state(cursor, relative_state_name(table), [(row['id'], row['input_hash']) for row in rows])
+        ranked += len(rows)
+    cursor.execute("UPDATE score_distributions SET pending = pending + %s WHERE table_name = %s", (ranked, table))
+    return written, ranked
+
+
+def update_relative_scores(conn, incremental=INCREMENTAL_SCORING):
+    """
+    Store every part's relative_score: its 0-100 percentile rank within its category
+    (vector_scores.relative_scores). A full pass ranks a table against itself and stores
+    each metric's sorted values; later runs rank only the parts added or changed since,
+    against those values, until they come to more than RELATIVE_REFRESH_SHARE of the table.
+    """
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            for table, (label, _) in SCORED_TABLES.items():
+                print(f"Updating {label} relative scores...")
+                start = time.perf_counter()
+                version = scorer_version(table)
+                distributions, pending = load_distributions(cursor, table, version) if incremental else (None, 0)
+                written = ranked = 0
+                if distributions is not None:
+                    written, ranked = rank_changed_rows(conn, cursor, table, distributions)
+                    cursor.execute(f"SELECT count(*) AS n FROM {table}")
+                    if pending + ranked > RELATIVE_REFRESH_SHARE * cursor.fetchone()['n']:
+                        print(f"  {pending + ranked} parts ranked since the last full pass, ranking every row again")
+                        distributions = None
+
+                if distributions is None:
+                    rewritten, ranked = rank_table(conn, cursor, table, version)
+                    written += rewritten
+                print(f"  Ranked {ranked} rows and wrote {written} changed relative scores "
+                      f"in {time.perf_counter() - start:.3f}s")
+
+        conn.commit()
+        print("All relative scores updated successfully!")
+
+    except Exception as e:
+        print(f"Error updating relative scores: {e}")
+        conn.rollback()
+
+
 def ensure_score_columns_exist(conn):
-    """Make sure all component tables have a score column"""
+    """Make sure all component tables have the score and relative_score columns"""
     try:
         with conn.cursor() as cursor:
-            # Add score column to each table if it doesn't exist
+            # Add the score columns to each table if they don't exist
             tables = [
                 'cpu_specs', 'motherboard_specs', 'cooler_specs',
                 'gpu_specs', 'case_specs', 'psu_specs', 'memory_specs'
             ]
             
             for table in tables:
-                cursor.execute(f"""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = '{table}' AND column_name = 'score'
-                """)
-                if not cursor.fetchone():
-                    print(f"Adding score column to {table}...")
-                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN score INTEGER")
+                for column, column_type in [('score', 'INTEGER'), ('relative_score', 'REAL')]:
+                    cursor.execute(f"""
+                        SELECT column_name 
+                        FROM information_schema.columns 
+                        WHERE table_name = '{table}' AND column_name = '{column}'
+                    """)
+                    if not cursor.fetchone():
+                        print(f"Adding {column} column to {table}...")
+                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
         
         conn.commit()
         print("Score columns added where needed")
@@ -452,18 +812,80 @@ def ensure_score_columns_exist(conn):
         conn.rollback()
 
 
+def ensure_score_state_tables(conn):
+    """Create the tables incremental scoring uses to track what was scored"""
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_state (
+                    table_name TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    input_hash TEXT NOT NULL,
+                    PRIMARY KEY (table_name, id)
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_versions (
+                    table_name TEXT PRIMARY KEY,
+                    scorer_version TEXT NOT NULL
+                )
+            """)
+            # Sorted values of each relative-score metric, which new parts are ranked against
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS score_distributions (
+                    table_name TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    scorer_version TEXT NOT NULL,
+                    pending INTEGER NOT NULL,
+                    sorted_values DOUBLE PRECISION[] NOT NULL,
+                    PRIMARY KEY (table_name, metric)
+                )
+            """)
+        conn.commit()
+
+    except Exception as e:
+        print(f"Error ensuring score state tables exist: {e}")
+        conn.rollback()
+
+
 def main():
     """Main function to connect to database and update scores"""
+    parser = argparse.ArgumentParser(description="Score every component and store the scores")
+    parser.add_argument('--workers', type=int, default=SCORE_WORKERS,
+                        help="Processes scoring in parallel (default: %(default)s)")
+    parser.add_argument('--benchmark-workers', type=int, nargs='+', metavar='N',
+                        help="Time a full rescore with each number of workers, e.g. 1 2 4 8")
+    parser.add_argument('--benchmark-memory', action='store_true',
+                        help="Compare the peak memory of streamed and fetchall() reads; writes nothing")
+    args = parser.parse_args()
+    if args.benchmark_memory and peak_rss_mb() is None:
+        parser.error("--benchmark-memory needs the resource module (Unix only)")
+
+    conn = None
     try:
         # Connect to database using config settings
         print("Connecting to database...")
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = get_pool(BULK_DB_CONFIG).getconn()
         
         # Make sure all tables have a score column
         ensure_score_columns_exist(conn)
+        ensure_score_state_tables(conn)
+
+        # The scorers read the parsed *_num columns, so bring them up to date first
+        print("Parsing spec strings...")
+        report = update_numeric_columns(conn)
+        rejected = sum(quality.rejected for quality in report)
+        if rejected:
+            print(f"  {rejected} values could not be parsed (run spec_parser.py for the details)")
         
         # Update all component scores
-        update_component_scores(conn)
+        if args.benchmark_memory:
+            benchmark_memory()
+        elif args.benchmark_workers:
+            benchmark_workers(conn, args.benchmark_workers)
+        else:
+            update_component_scores(conn, workers=args.workers)
+            update_relative_scores(conn)
         
         print("Database update complete!")
         
@@ -471,7 +893,9 @@ def main():
         print(f"Error: {e}")
     finally:
         if conn:
-            conn.close()
+            get_pool(BULK_DB_CONFIG).putconn(conn)
+            # db_pool logs this at exit too, but this tool does not configure logging
+            print(f"Database pool: {get_pool(BULK_DB_CONFIG).metrics.summary()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,634 @@
+"""
+Columnar versions of the scorers in update_scores.py.
+
+Each score_*_frame function takes a whole *_specs table as a DataFrame and
+returns a Series of integer scores aligned with its index. The results match
+the per-row functions exactly, including their quirks: a value the per-row
+scorer cannot parse (which makes it print an error and return 0) marks the
+row invalid here and its score is 0. SQL NULLs may arrive as None or NaN.
+
+The display strings the scorers parse ('4.2 GHz', '2 x 16GB', ...) are listed in
+SPEC_FIELDS. spec_parser.py stores each one parsed in a <column>_num column; when
+a frame has those columns the scorers read the numbers instead of parsing again.
+
+relative_scores() scores parts against the rest of their category instead: every
+sub-metric in RELATIVE_METRICS becomes the part's percentile among the valid rows
+(from sorted arrays and searchsorted), and their weighted mean maps the part onto
+0-100. Unlike the capped absolute scores, these keep separating the top of the
+catalog as hardware improves.
+"""
+
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+NULL_TOKENS = ['NaN', 'NULL']
+# pandas.api.types.infer_dtype results for columns holding only numbers (and NULL)
+NUMERIC_KINDS = {'integer', 'floating', 'mixed-integer-float', 'decimal', 'boolean', 'empty'}
+
+_INT_PATTERN = r'^\s*([+-]?\d+)\s*$'
+_FLOAT_PATTERN = r'^\s*([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)\s*$'
+_FIRST_WORD_PATTERN = r'^\s*(\S+)'
+
+
+# ========== PARSING HELPERS ==========
+#
+# Catalog columns repeat the same few strings across thousands of rows, so every
+# helper factorizes its column once, parses the distinct values with vectorized
+# string operations and broadcasts the results back to the rows through the codes.
+
+def _distinct(s: pd.Series) -> Tuple[np.ndarray, pd.Series]:
+    """Codes into the distinct values of a text column; every NULL maps to a trailing None"""
+    codes, uniques = pd.factorize(s)
+    # Code -1 indexes the appended None
+    return codes, pd.Series(list(uniques) + [None], dtype=object)
+
+
+def _by_value(s: pd.Series, parse: Callable[[pd.Series], Tuple[pd.Series, ...]]) -> Tuple[pd.Series, ...]:
+    """
+    Run parse over the distinct values of a text column and align its results with the rows.
+    Other columns are parsed whole: numbers rarely repeat, and values of different types can
+    compare equal (1 == True) yet parse differently.
+    """
+    if pd.api.types.infer_dtype(s, skipna=True) != 'string':
+        return tuple(pd.Series(np.asarray(result), index=s.index) for result in parse(s.astype(object)))
+    codes, uniques = _distinct(s)
+    return tuple(pd.Series(np.asarray(result)[codes], index=s.index) for result in parse(uniques))
+
+
+def _is_text(s: pd.Series) -> pd.Series:
+    """Values that are Python strings (string methods like .replace only work on these)"""
+    return s.map(type).eq(str)
+
+
+def _is_token(s: pd.Series, none: bool = False) -> pd.Series:
+    """Values the per-row scorer skips: 'NaN'/'NULL' strings, plus NULL when none=True"""
+    token = s.isin(NULL_TOKENS)
+    return token | s.isna() if none else token
+
+
+def _to_number(text: pd.Series, integer: bool) -> pd.Series:
+    """int()/float() of strings, NaN where Python would raise"""
+    pattern = _INT_PATTERN if integer else _FLOAT_PATTERN
+    return pd.to_numeric(text.str.extract(pattern, expand=False), errors='coerce').astype(float)
+
+
+def _str_of(s: pd.Series) -> pd.Series:
+    """str(v), with NULL rendered like str(None)"""
+    return s.where(s.notna(), 'None').astype(str)
+
+
+def _text_number(s: pd.Series, default: float, none: bool = False, integer: bool = False,
+                 strip: str = None, first_word: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """
+    Mimic float(v.replace(strip, '').strip()) or int(v.split()[0]) on values that are not skipped.
+    Returns the parsed values and a mask of rows where the per-row call would raise.
+    """
+    def parse(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        skip = _is_token(values, none)
+        text = values.where(_is_text(values) & ~skip)
+        if strip is not None:
+            text = text.str.replace(strip, '', regex=False)
+        if first_word:
+            text = text.str.extract(_FIRST_WORD_PATTERN, expand=False)
+        parsed = _to_number(text, integer)
+        return parsed.where(~skip, default), ~skip & parsed.isna()
+
+    return _by_value(s, parse)
+
+
+def _number(s: pd.Series, default: float, none: bool = False,
+            integer: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """Mimic int(v)/float(v) on strings or numbers; NULL raises unless skipped"""
+    def parse(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        skip = _is_token(values, none)
+        is_text = _is_text(values)
+        numeric = pd.to_numeric(values.where(~is_text & values.notna()), errors='coerce').astype(float)
+        if integer:
+            numeric = np.trunc(numeric)
+        parsed = _to_number(values.where(is_text), integer).where(is_text, numeric)
+        # int() rejects NaN and infinity outright; float() lets them through to fail in round()
+        bad = parsed.isna() | (integer & ~np.isfinite(parsed.fillna(0)))
+        return parsed.where(~skip, default), ~skip & bad
+
+    if pd.api.types.infer_dtype(s, skipna=True) in NUMERIC_KINDS:
+        # No strings, so no tokens to skip and nothing to parse
+        values = s.astype(float)
+        values = np.trunc(values) if integer else values
+        bad = values.isna() | (integer & ~np.isfinite(values.fillna(0)))
+        skip = s.isna() if none else pd.Series(False, index=s.index)
+        return values.where(~skip, default), ~skip & bad
+    return _by_value(s, parse)
+
+
+def _line_count(s: pd.Series, none: bool = True) -> pd.Series:
+    """len(str(v).split('\\n')) for values that are not skipped, else 0"""
+    def parse(values: pd.Series) -> Tuple[pd.Series]:
+        return (_str_of(values).str.count('\n').add(1).where(~_is_token(values, none), 0),)
+
+    return _by_value(s, parse)[0]
+
+
+def _tier(s: pd.Series, tiers: List[Tuple[float, List[str]]], other: float = 0) -> pd.Series:
+    """
+    Score of the first tier with a needle found in str(v), checked in order like an if/elif chain.
+    Values without a match score other; skipped values (tokens or NULL) score 0.
+    """
+    def parse(values: pd.Series) -> Tuple[np.ndarray]:
+        text = _str_of(values)
+        conditions = [pd.concat([text.str.contains(needle, regex=False) for needle in needles], axis=1).any(axis=1)
+                      for _, needles in tiers]
+        scores = np.select(conditions, [score for score, _ in tiers], default=other)
+        return (np.where(_is_token(values, none=True), 0, scores),)
+
+    return _by_value(s, parse)[0]
+
+
+def _truthy(s: pd.Series) -> pd.Series:
+    """bool(v) with NULL as False"""
+    return _by_value(s, lambda values: (values.where(values.notna(), False).astype(bool),))[0]
+
+
+@dataclass(frozen=True)
+class SpecField:
+    """A display-string column the scorers parse into a number"""
+    source: str
+    parse: Callable[[pd.Series], Tuple[pd.Series, pd.Series]]  # -> (values, rows the per-row scorer rejects)
+    none: bool = True  # NULL is skipped like the 'NaN'/'NULL' tokens, instead of being rejected
+    default: float = 0  # Value of skipped rows
+
+    @property
+    def column(self) -> str:
+        return f'{self.source}_num'
+
+    def skipped(self, s: pd.Series) -> pd.Series:
+        return _is_token(s, self.none)
+
+    def stored(self, s: pd.Series) -> pd.Series:
+        """What the *_num column holds: the parsed value, NULL where skipped or rejected"""
+        values, rejected = self.parse(s)
+        return values.astype(float).where(~self.skipped(s) & ~rejected)
+
+
+def _spec(frame: pd.DataFrame, table: str, source: str) -> Tuple[pd.Series, pd.Series]:
+    """A field's values and rejected rows, read from its *_num column if the frame has one"""
+    field = SPEC_FIELDS[table][source]
+    if field.column not in frame:
+        return field.parse(frame[source])
+    skip = field.skipped(frame[source])
+    stored = frame[field.column].astype(float)
+    return stored.where(~skip, field.default), ~skip & stored.isna()
+
+
+def _finish(total: pd.Series, invalid: pd.Series) -> pd.Series:
+    """min(round(total), 100), with 0 wherever the per-row scorer would have raised"""
+    total = total.astype(float)
+    invalid = invalid | ~np.isfinite(total)
+    rounded = np.round(total.where(~invalid, 0))
+    return np.minimum(rounded, 100).astype(int)
+
+
+# ========== COMPONENT SCORERS ==========
+
+def cpu_metrics(cpu: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed CPU inputs and the rows score_cpu would reject"""
+    core_count, bad_cores = _number(cpu['core_count'], 0, integer=True)
+    thread_count, bad_threads = _number(cpu['thread_count'], 0, integer=True)
+    base_clock, bad_base = _spec(cpu, 'cpu_specs', 'performance_core_clock')
+    boost_clock, bad_boost = _spec(cpu, 'cpu_specs', 'performance_core_boost_clock')
+    l3_cache, bad_cache = _spec(cpu, 'cpu_specs', 'l3_cache')
+    price, bad_price = _number(cpu['price_num'], 1000)
+
+    metrics = pd.DataFrame({
+        'core_count': core_count, 'thread_count': thread_count, 'base_clock': base_clock,
+        'boost_clock': boost_clock, 'l3_cache': l3_cache, 'price': price,
+    })
+    return metrics, bad_cores | bad_threads | bad_base | bad_boost | bad_cache | bad_price
+
+
+def score_cpu_frame(cpu: pd.DataFrame) -> pd.Series:
+    m, invalid = cpu_metrics(cpu)
+    core_score = np.minimum(m['core_count'] * 5, 40)
+    thread_score = np.minimum((m['thread_count'] - m['core_count']) * 2.5, 10)
+    base_clock_score = np.minimum(m['base_clock'] * 2, 10)
+    boost_clock_score = np.minimum(m['boost_clock'] * 3, 15)
+    cache_score = np.minimum(m['l3_cache'] / 2, 10)
+    value_score = np.maximum(25 - (m['price'] / 40), 0)
+
+    total = core_score + thread_score + base_clock_score + boost_clock_score + cache_score + value_score
+    return _finish(total, invalid)
+
+
+MOTHERBOARD_FORM_FACTORS = {"ATX": 10, "Micro ATX": 8, "Mini ITX": 6}
+MOTHERBOARD_CHIPSET_TIERS = [(20, ["Z"]), (15, ["B"]), (10, ["H"])]
+
+
+def motherboard_metrics(mobo: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed motherboard inputs and the rows score_motherboard would reject"""
+    memory_max, bad_memory = _spec(mobo, 'motherboard_specs', 'memory_max')
+    memory_slots, bad_slots = _number(mobo['memory_slots'], 0, integer=True)
+    price, bad_price = _number(mobo['price_num'], 1000)
+
+    form_factor_score = _by_value(mobo['form_factor'],
+                                  lambda values: (values.map(MOTHERBOARD_FORM_FACTORS).fillna(5),))[0]
+
+    metrics = pd.DataFrame({
+        'memory_max': memory_max, 'memory_slots': memory_slots, 'form_factor_score': form_factor_score,
+        'm2_slots': _spec(mobo, 'motherboard_specs', 'm2_slots')[0],
+        'wifi_score': _tier(mobo['wireless_networking'], [(10, ["Wi-Fi"])]),
+        'chipset_tier': _tier(mobo['chipset'], MOTHERBOARD_CHIPSET_TIERS), 'price': price,
+    })
+    return metrics, bad_memory | bad_slots | bad_price
+
+
+def score_motherboard_frame(mobo: pd.DataFrame) -> pd.Series:
+    m, invalid = motherboard_metrics(mobo)
+    memory_max_score = np.minimum(m['memory_max'] / 16, 10)
+    memory_slots_score = np.minimum(m['memory_slots'] * 2.5, 10)
+    m2_slots_score = np.minimum(m['m2_slots'] * 5, 15)
+    value_score = np.maximum(20 - (m['price'] / 50), 0)
+
+    total = (memory_max_score + memory_slots_score + m['form_factor_score'] + m2_slots_score
+             + m['wifi_score'] + m['chipset_tier'] + value_score)
+    return _finish(total, invalid)
+
+
+def _noise_level(values: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """"20 - 25 dB" keeps the text before the dash, "25 dB" the first word"""
+    skip = _is_token(values, none=True)
+    text = values.where(_is_text(values) & ~skip)
+    ranged = text.str.contains('-', regex=False).fillna(False).astype(bool)
+    range_low = _to_number(text.str.split('-').str[0], integer=False)
+    first_word = _to_number(text.str.extract(_FIRST_WORD_PATTERN, expand=False), integer=False)
+    noise_level = range_low.where(ranged, first_word)
+    return noise_level.where(~skip, 0), ~skip & noise_level.isna(), ~skip
+
+
+def cooler_metrics(cooler: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed cooler inputs and the rows score_cooler would reject"""
+    price, bad_price = _number(cooler['price_num'], 1000)
+    rpm, bad_rpm = _spec(cooler, 'cooler_specs', 'fan_rpm')
+    noise_level, bad_noise = _spec(cooler, 'cooler_specs', 'noise_level')
+
+    metrics = pd.DataFrame({
+        'rpm': rpm, 'noise_level': noise_level, 'noise_known': ~_is_token(cooler['noise_level'], none=True),
+        'sockets': _spec(cooler, 'cooler_specs', 'cpu_socket')[0], 'water_cooled': _truthy(cooler['water_cooled']),
+        'price': price,
+    })
+    return metrics, bad_price | bad_rpm | bad_noise
+
+
+def score_cooler_frame(cooler: pd.DataFrame) -> pd.Series:
+    m, invalid = cooler_metrics(cooler)
+    rpm_score = np.minimum(m['rpm'] / 500, 10)
+    noise_score = np.where(m['noise_known'], np.maximum(20 - m['noise_level'], 0), 0)
+    socket_score = np.minimum(m['sockets'] * 2, 20)
+    cooling_type_score = np.where(m['water_cooled'], 15, 0)
+    value_score = np.maximum(35 - (m['price'] / 10), 0)
+
+    total = rpm_score + noise_score + socket_score + cooling_type_score + value_score
+    return _finish(total, invalid)
+
+
+GPU_CHIPSET_TIERS = [
+    (25, ["5090", "4090"]),
+    (20, ["5080", "4080", "3090"]),
+    (15, ["5070", "4070", "3080"]),
+    (10, ["5060", "4060", "3070"]),
+]
+
+
+def gpu_metrics(gpu: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed GPU inputs and the rows score_gpu would reject"""
+    memory, bad_memory = _spec(gpu, 'gpu_specs', 'memory')
+    core_clock, bad_core = _spec(gpu, 'gpu_specs', 'core_clock')
+    boost_clock, bad_boost = _spec(gpu, 'gpu_specs', 'boost_clock')
+    price, bad_price = _number(gpu['price_num'], 2000)
+    fans, bad_fans = _spec(gpu, 'gpu_specs', 'cooling')
+
+    metrics = pd.DataFrame({
+        'memory': memory, 'core_clock': core_clock, 'boost_clock': boost_clock,
+        'chipset_tier': _tier(gpu['chipset'], GPU_CHIPSET_TIERS, other=5), 'fans': fans, 'price': price,
+    })
+    return metrics, bad_memory | bad_core | bad_boost | bad_price | bad_fans
+
+
+def score_gpu_frame(gpu: pd.DataFrame) -> pd.Series:
+    m, invalid = gpu_metrics(gpu)
+    memory_score = np.minimum(m['memory'] * 2, 30)
+    core_clock_score = np.minimum(m['core_clock'] / 100, 10)
+    boost_clock_score = np.minimum(m['boost_clock'] / 100, 15)
+    cooling_score = m['fans'] * 5
+    value_score = np.maximum(20 - (m['price'] / 150), 0)
+
+    total = memory_score + core_clock_score + boost_clock_score + m['chipset_tier'] + cooling_score + value_score
+    return _finish(total, invalid)
+
+
+CASE_USB_TIERS = [(15, ["USB 3.2 Gen 2 Type-C"]), (10, ["USB 3.2 Gen 1"])]
+
+
+def _drive_bays(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Sum the leading count of every "N x ..." line (grouped by position, not label)"""
+    text = _str_of(values).where(~_is_token(values, none=True), '')
+    lines = text.str.split('\n').explode()
+    counted = lines.str.contains('x', regex=False)
+    counts = _to_number(lines.where(counted).str.split('x').str[0], integer=True)
+    drive_count = counts.where(counted, 0).groupby(level=0).sum()
+    return drive_count, (counted & counts.isna()).groupby(level=0).any()
+
+
+def case_metrics(case: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed case inputs and the rows score_case would reject"""
+    price, bad_price = _number(case['price_num'], 200)
+    gpu_length, bad_length = _spec(case, 'case_specs', 'maximum_video_card_length')
+    drive_count, bad_bays = _spec(case, 'case_specs', 'drive_bays')
+
+    metrics = pd.DataFrame({
+        'form_factors': _spec(case, 'case_specs', 'motherboard_form_factor')[0],
+        'glass_score': _tier(case['side_panel'], [(10, ["Glass"])]),
+        'shroud': _truthy(case['power_supply_shroud']), 'usb_score': _tier(case['front_panel_usb'], CASE_USB_TIERS),
+        'gpu_length': gpu_length, 'drive_count': drive_count, 'price': price,
+    })
+    return metrics, bad_price | bad_length | bad_bays
+
+
+def score_case_frame(case: pd.DataFrame) -> pd.Series:
+    m, invalid = case_metrics(case)
+    form_factor_score = np.minimum(m['form_factors'] * 5, 15)
+    shroud_score = np.where(m['shroud'], 10, 0)
+    gpu_length_score = np.minimum(m['gpu_length'] / 30, 10)
+    drive_score = np.minimum(m['drive_count'] * 2, 15)
+    value_score = np.maximum(25 - (m['price'] / 20), 0)
+
+    total = (form_factor_score + m['glass_score'] + shroud_score + m['usb_score']
+             + gpu_length_score + drive_score + value_score)
+    return _finish(total, invalid)
+
+
+PSU_EFFICIENCY_TIERS = [(25, ["Titanium"]), (20, ["Platinum"]), (15, ["Gold"]),
+                        (10, ["Silver"]), (5, ["Bronze"]), (3, ["80+"])]
+PSU_MODULARITY = {"Full": 15, "Semi": 10}
+
+
+def psu_metrics(psu: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed PSU inputs and the rows score_psu would reject"""
+    wattage, bad_wattage = _number(psu['wattage'], 0, none=True, integer=True)
+    price, bad_price = _number(psu['price_num'], 200)
+    modularity_score = _by_value(psu['modular'],
+                                 lambda values: (values.map(PSU_MODULARITY).fillna(0),))[0]
+
+    metrics = pd.DataFrame({
+        'wattage': wattage, 'efficiency_score': _tier(psu['efficiency_rating'], PSU_EFFICIENCY_TIERS),
+        'modularity_score': modularity_score, 'price': price,
+    })
+    return metrics, bad_wattage | bad_price
+
+
+def score_psu_frame(psu: pd.DataFrame) -> pd.Series:
+    m, invalid = psu_metrics(psu)
+    wattage_score = np.minimum(m['wattage'] / 20, 30)
+    value_score = np.maximum(30 - (m['price'] / 30), 0)
+
+    total = wattage_score + m['efficiency_score'] + m['modularity_score'] + value_score
+    return _finish(total, invalid)
+
+
+def _memory_speed(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """"DDR5-6000" keeps the second dash-separated field, plain speeds are parsed whole"""
+    skip = _is_token(values, none=True)
+    is_text = _is_text(values)
+    text = values.where(is_text & ~skip)
+    is_ddr = text.str.contains('DDR', regex=False).fillna(False).astype(bool)
+    speed = _to_number(text.where(~is_ddr, text.str.split('-').str[1]), integer=True)
+    # A non-string speed fails the "DDR" in check before parsing
+    return speed.where(~skip, 0), ~skip & (speed.isna() | ~is_text)
+
+
+def _memory_capacity(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """"2 x 16GB" -> 32; anything that does not split into exactly two parts counts as 0"""
+    skip = _is_token(values, none=True)
+    is_text = _is_text(values)
+    parts = values.where(is_text & ~skip).str.split('x')
+    two_parts = parts.str.len().eq(2)
+    count = _to_number(parts.str[0].where(two_parts), integer=True)
+    size = _to_number(parts.str[1].where(two_parts).str.strip().str.replace('GB', '', regex=False), integer=True)
+    bad = (~skip & ~is_text) | (two_parts & (count.isna() | size.isna()))
+    return (count * size).where(two_parts & ~skip, 0).fillna(0), bad
+
+
+def memory_metrics(mem: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
+    """Parsed memory inputs and the rows score_memory would reject"""
+    price, bad_price = _number(mem['price_num'], 200)
+    speed, bad_speed = _spec(mem, 'memory_specs', 'speed')
+    total_capacity, bad_modules = _spec(mem, 'memory_specs', 'modules')
+    latency, bad_latency = _spec(mem, 'memory_specs', 'first_word_latency')
+
+    metrics = pd.DataFrame({
+        'speed': speed, 'total_capacity': total_capacity, 'latency': latency,
+        'latency_known': ~_by_value(mem['first_word_latency'], lambda values: (_is_token(values, none=True),))[0],
+        'heat_spreader': _truthy(mem['heat_spreader']), 'price': price,
+    })
+    return metrics, bad_price | bad_speed | bad_modules | bad_latency
+
+
+def score_memory_frame(mem: pd.DataFrame) -> pd.Series:
+    m, invalid = memory_metrics(mem)
+    speed_score = np.minimum(m['speed'] / 200, 30)
+    capacity_score = np.minimum(m['total_capacity'] / 4, 25)
+    latency_score = np.where(m['latency_known'], np.maximum(15 - m['latency'], 0), 0)
+    heat_spreader_score = np.where(m['heat_spreader'], 10, 0)
+
+    has_capacity = m['total_capacity'] > 0
+    per_gb = m['price'] / m['total_capacity'].where(has_capacity, 1) * 2
+    value_score = np.where(has_capacity, np.maximum(20 - per_gb, 0), 0)
+
+    total = speed_score + capacity_score + latency_score + heat_spreader_score + value_score
+    return _finish(total, invalid)
+
+
+def _line_counts(none: bool) -> Callable[[pd.Series], Tuple[pd.Series, pd.Series]]:
+    return lambda s: (_line_count(s, none), pd.Series(False, index=s.index))
+
+
+# Table name -> display-string column -> how the scorers parse it
+SPEC_FIELDS: Dict[str, Dict[str, SpecField]] = {
+    table: {field.source: field for field in fields}
+    for table, fields in {
+        'cpu_specs': [
+            SpecField('performance_core_clock', lambda s: _text_number(s, 0, strip='GHz'), none=False),
+            SpecField('performance_core_boost_clock', lambda s: _text_number(s, 0, strip='GHz'), none=False),
+            SpecField('l3_cache', lambda s: _text_number(s, 0, strip='MB'), none=False),
+        ],
+        'motherboard_specs': [
+            SpecField('memory_max', lambda s: _text_number(s, 0, integer=True, strip='GB'), none=False),
+            SpecField('m2_slots', _line_counts(none=False), none=False),  # Number of lines
+        ],
+        'cooler_specs': [
+            SpecField('fan_rpm', lambda s: _text_number(s, 0, none=True, first_word=True)),
+            SpecField('noise_level', lambda s: _by_value(s, _noise_level)[:2]),
+            SpecField('cpu_socket', _line_counts(none=True)),  # Number of sockets
+        ],
+        'gpu_specs': [
+            SpecField('memory', lambda s: _text_number(s, 0, none=True, integer=True, first_word=True)),
+            SpecField('core_clock', lambda s: _text_number(s, 0, none=True, strip='MHz')),
+            SpecField('boost_clock', lambda s: _text_number(s, 0, none=True, strip='MHz')),
+            SpecField('cooling', lambda s: _text_number(s, 0, none=True, integer=True, first_word=True)),  # Fans
+        ],
+        'case_specs': [
+            SpecField('maximum_video_card_length', lambda s: _text_number(s, 0, none=True, first_word=True)),
+            SpecField('drive_bays', lambda s: _by_value(s, _drive_bays)),  # Total bays
+            SpecField('motherboard_form_factor', _line_counts(none=True)),  # Number of form factors
+        ],
+        'memory_specs': [
+            SpecField('speed', lambda s: _by_value(s, _memory_speed)),
+            SpecField('modules', lambda s: _by_value(s, _memory_capacity)),  # Total GB
+            SpecField('first_word_latency', lambda s: _text_number(s, 0, none=True, strip='ns')),
+        ],
+    }.items()
+}
+
+# Table name -> columnar scorer
+FRAME_SCORERS: Dict[str, Callable[[pd.DataFrame], pd.Series]] = {
+    'cpu_specs': score_cpu_frame,
+    'motherboard_specs': score_motherboard_frame,
+    'cooler_specs': score_cooler_frame,
+    'gpu_specs': score_gpu_frame,
+    'case_specs': score_case_frame,
+    'psu_specs': score_psu_frame,
+    'memory_specs': score_memory_frame,
+}
+
+# Table name -> parsed scorer inputs and the rows its scorer rejects
+FRAME_METRICS: Dict[str, Callable[[pd.DataFrame], Tuple[pd.DataFrame, pd.Series]]] = {
+    'cpu_specs': cpu_metrics,
+    'motherboard_specs': motherboard_metrics,
+    'cooler_specs': cooler_metrics,
+    'gpu_specs': gpu_metrics,
+    'case_specs': case_metrics,
+    'psu_specs': psu_metrics,
+    'memory_specs': memory_metrics,
+}
+
+
+# ========== RELATIVE SCORES ==========
+
+@dataclass(frozen=True)
+class RelativeMetric:
+    """A sub-metric of the relative score, read from a table's metrics frame"""
+    weight: float  # The cap of the matching part of the absolute score
+    values: Callable[[pd.DataFrame], pd.Series]  # NaN where unknown; an unknown value ranks last
+    higher_is_better: bool = True
+
+
+def _metric(column: str, known: str = None) -> Callable[[pd.DataFrame], pd.Series]:
+    return lambda m: m[column].astype(float) if known is None else m[column].astype(float).where(m[known])
+
+
+def _per_gb(m: pd.DataFrame) -> pd.Series:
+    return (m['price'] / m['total_capacity']).where(m['total_capacity'] > 0)
+
+
+# Table name -> metric name -> RelativeMetric
+RELATIVE_METRICS: Dict[str, Dict[str, RelativeMetric]] = {
+    'cpu_specs': {
+        'core_count': RelativeMetric(40, _metric('core_count')),
+        'thread_count': RelativeMetric(10, _metric('thread_count')),
+        'base_clock': RelativeMetric(10, _metric('base_clock')),
+        'boost_clock': RelativeMetric(15, _metric('boost_clock')),
+        'l3_cache': RelativeMetric(10, _metric('l3_cache')),
+        'price': RelativeMetric(25, _metric('price'), higher_is_better=False),
+    },
+    'motherboard_specs': {
+        'memory_max': RelativeMetric(10, _metric('memory_max')),
+        'memory_slots': RelativeMetric(10, _metric('memory_slots')),
+        'form_factor': RelativeMetric(10, _metric('form_factor_score')),
+        'm2_slots': RelativeMetric(15, _metric('m2_slots')),
+        'wifi': RelativeMetric(10, _metric('wifi_score')),
+        'chipset': RelativeMetric(20, _metric('chipset_tier')),
+        'price': RelativeMetric(20, _metric('price'), higher_is_better=False),
+    },
+    'cooler_specs': {
+        'rpm': RelativeMetric(10, _metric('rpm')),
+        'noise_level': RelativeMetric(20, _metric('noise_level', known='noise_known'), higher_is_better=False),
+        'sockets': RelativeMetric(20, _metric('sockets')),
+        'water_cooled': RelativeMetric(15, _metric('water_cooled')),
+        'price': RelativeMetric(35, _metric('price'), higher_is_better=False),
+    },
+    'gpu_specs': {
+        'memory': RelativeMetric(30, _metric('memory')),
+        'core_clock': RelativeMetric(10, _metric('core_clock')),
+        'boost_clock': RelativeMetric(15, _metric('boost_clock')),
+        'chipset': RelativeMetric(25, _metric('chipset_tier')),
+        'fans': RelativeMetric(15, _metric('fans')),
+        'price': RelativeMetric(20, _metric('price'), higher_is_better=False),
+    },
+    'case_specs': {
+        'form_factors': RelativeMetric(15, _metric('form_factors')),
+        'glass': RelativeMetric(10, _metric('glass_score')),
+        'shroud': RelativeMetric(10, _metric('shroud')),
+        'usb': RelativeMetric(15, _metric('usb_score')),
+        'gpu_length': RelativeMetric(10, _metric('gpu_length')),
+        'drive_count': RelativeMetric(15, _metric('drive_count')),
+        'price': RelativeMetric(25, _metric('price'), higher_is_better=False),
+    },
+    'psu_specs': {
+        'wattage': RelativeMetric(30, _metric('wattage')),
+        'efficiency': RelativeMetric(25, _metric('efficiency_score')),
+        'modularity': RelativeMetric(15, _metric('modularity_score')),
+        'price': RelativeMetric(30, _metric('price'), higher_is_better=False),
+    },
+    'memory_specs': {
+        'speed': RelativeMetric(30, _metric('speed')),
+        'total_capacity': RelativeMetric(25, _metric('total_capacity')),
+        'latency': RelativeMetric(15, _metric('latency', known='latency_known'), higher_is_better=False),
+        'heat_spreader': RelativeMetric(10, _metric('heat_spreader')),
+        'price_per_gb': RelativeMetric(20, _per_gb, higher_is_better=False),
+    },
+}
+
+
+def metric_values(table: str, frame: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Every relative metric of the frame's rows, and the rows the absolute scorer rejects"""
+    metrics, invalid = FRAME_METRICS[table](frame)
+    values = {name: metric.values(metrics).to_numpy(dtype=float, na_value=np.nan)
+              for name, metric in RELATIVE_METRICS[table].items()}
+    return values, invalid.to_numpy(dtype=bool)
+
+
+def metric_distributions(values: Dict[str, np.ndarray], invalid: np.ndarray) -> Dict[str, np.ndarray]:
+    """Each metric's known values over the valid rows, sorted"""
+    return {name: np.sort(v[~invalid & ~np.isnan(v)]) for name, v in values.items()}
+
+
+def percentiles(values: np.ndarray, distribution: np.ndarray) -> np.ndarray:
+    """Share of the distribution below each value, ties counting half; NaN where the value is unknown"""
+    if not len(distribution):
+        return np.full(len(values), np.nan)
+    below = np.searchsorted(distribution, values, 'left')
+    through = np.searchsorted(distribution, values, 'right')
+    return np.where(np.isnan(values), np.nan, (below + through) / (2 * len(distribution)))
+
+
+def combine_percentiles(table: str, values: Dict[str, np.ndarray], invalid: np.ndarray,
+                        distributions: Dict[str, np.ndarray]) -> np.ndarray:
+    """Weighted mean percentile of every row on 0-100, rounded to 0.01; 0 for rejected rows"""
+    total = np.zeros(len(invalid))
+    for name, metric in RELATIVE_METRICS[table].items():
+        share = percentiles(values[name], distributions[name])
+        total += metric.weight * np.nan_to_num(share if metric.higher_is_better else 1 - share, nan=0.0)
+    weights = sum(metric.weight for metric in RELATIVE_METRICS[table].values())
+    return np.where(invalid, 0.0, np.round(100 * total / weights, 2))
+
+
+def relative_scores(table: str, frame: pd.DataFrame,
+                    distributions: Dict[str, np.ndarray] = None) -> Tuple[pd.Series, Dict[str, np.ndarray]]:
+    """
+    0-100 relative scores of a frame's rows and the distributions they were ranked
+    against: the frame's own, unless earlier ones are given
+    """
+    values, invalid = metric_values(table, frame)
+    if distributions is None:
+        distributions = metric_distributions(values, invalid)
+    return pd.Series(combine_percentiles(table, values, invalid, distributions), index=frame.index), distributions